@@ -1,6 +1,11 @@
 from .modelos import TicketSoporte, RespuestaClasificacion
 from .acciones import motor_inferencia, sugerir_tecnico, obtener_solucion_sugerida
-from .base_conocimiento import REGLAS_CLASIFICACION, MAPEO_TECNICOS
+from .base_conocimiento import REGLAS_BASE, REGLAS_CLASIFICACION, REGLAS_DERIVADAS, MAPEO_TECNICOS, PALABRAS_CLAVE
+from .conocimiento import BASE_ACTIVA, Conocimiento
+from .condiciones import cargar_reglas, compilar_condicion
+from .hechos import codificar_hechos, decodificar_hechos
+from .rete import RedRete
+from .texto import extraer_hechos
 
 __all__ = [
 	"TicketSoporte",
@@ -8,7 +13,18 @@ __all__ = [
 	"motor_inferencia",
 	"sugerir_tecnico",
 	"obtener_solucion_sugerida",
+	"REGLAS_BASE",
 	"REGLAS_CLASIFICACION",
+	"REGLAS_DERIVADAS",
 	"MAPEO_TECNICOS",
+	"PALABRAS_CLAVE",
+	"BASE_ACTIVA",
+	"Conocimiento",
+	"cargar_reglas",
+	"compilar_condicion",
+	"codificar_hechos",
+	"decodificar_hechos",
+	"RedRete",
+	"extraer_hechos",
 ]
 
@@ -0,0 +1,124 @@
+# experto_general/agrupamiento.py
+
+# Agrupamiento de casi-duplicados entre los textos de nuevos síntomas, para revisar una
+# frase por grupo antes de escribir una regla nueva en base_conocimiento.py.
+#
+# Método (sublineal, sin comparar todos contra todos):
+# 1. Cada texto se normaliza (minúsculas, sin acentos, sin números) y se parte en shingles
+#    de 4 caracteres.
+# 2. Firma MinHash de una sola permutación: cada shingle se hashea una vez (64 bits) y cae
+#    en una de `bins` cubetas; la firma es el mínimo por cubeta (las vacías se completan con
+#    la siguiente cubeta no vacía). La fracción de cubetas iguales entre dos firmas estima la
+#    similitud de Jaccard de sus conjuntos de shingles.
+# 3. LSH por bandas: la firma se corta en bandas de `filas` cubetas; dos textos son
+#    candidatos si coinciden en alguna banda entera.
+# 4. Cada candidato se verifica contra el representante de su cubeta LSH con la similitud
+#    estimada y los que superan `umbral` se unen (union-find).
+# El costo es lineal en la cantidad de textos; la memoria, una firma compacta por texto.
+import array
+import zlib
+from typing import Iterable, Optional
+
+from .texto import normalizar_texto
+
+TAMANO_SHINGLE = 4
+BINS = 64
+FILAS_POR_BANDA = 4
+UMBRAL = 0.5
+
+_MASCARA_64 = (1 << 64) - 1
+_VACIO = _MASCARA_64
+
+
+def shingles(texto: str, k: int = TAMANO_SHINGLE) -> set[str]:
+    if len(texto) <= k:
+        return {texto} if texto else set()
+    return {texto[i:i + k] for i in range(len(texto) - k + 1)}
+
+
+def _hash64(shingle: str) -> int:
+    datos = shingle.encode("utf-8")
+    return (zlib.crc32(datos) << 32) | zlib.crc32(datos, 0x9E3779B9)
+
+
+def firma(texto: str, bins: int = BINS) -> Optional[array.array]:
+    """Firma MinHash (una permutación + densificación) del texto ya normalizado."""
+    conjunto = shingles(texto)
+    if not conjunto:
+        return None
+    minimos = [_VACIO] * bins
+    for sh in conjunto:
+        h = _hash64(sh)
+        cubeta = h % bins
+        valor = h // bins
+        if valor < minimos[cubeta]:
+            minimos[cubeta] = valor
+    # Densificación: una cubeta vacía toma el valor de la siguiente no vacía (circular),
+    # marcado con la distancia para no confundirlo con un mínimo propio
+    for i in range(bins):
+        if minimos[i] == _VACIO:
+            for salto in range(1, bins):
+                j = (i + salto) % bins
+                if minimos[j] != _VACIO:
+                    minimos[i] = (minimos[j] * 31 + salto) & (_MASCARA_64 >> 1)
+                    break
+    return array.array("Q", minimos)
+
+
+def similitud(a: array.array, b: array.array) -> float:
+    """Jaccard estimado entre dos firmas."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.padre: dict[int, int] = {}
+
+    def raiz(self, x: int) -> int:
+        padre = self.padre
+        padre.setdefault(x, x)
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    def unir(self, a: int, b: int) -> None:
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            # La raíz es siempre el id menor: el cluster se identifica por su primer reporte
+            if rb < ra:
+                ra, rb = rb, ra
+            self.padre[rb] = ra
+
+
+def agrupar(textos: Iterable[tuple[int, str]], umbral: float = UMBRAL, bins: int = BINS,
+            filas: int = FILAS_POR_BANDA) -> dict[int, int]:
+    """
+    Recibe pares (id, texto) y devuelve {id: cluster_id}, donde cluster_id es el menor id
+    del grupo (un texto sin casi-duplicados queda en su propio grupo). Textos que quedan
+    vacíos tras normalizar se agrupan todos juntos.
+    """
+    uf = _UnionFind()
+    firmas: dict[int, array.array] = {}
+    # Por banda: valor de la banda -> id representante (el primero visto)
+    cubetas: list[dict[bytes, int]] = [dict() for _ in range(bins // filas)]
+    vacio: Optional[int] = None
+    for id_, texto in textos:
+        uf.raiz(id_)
+        f = firma(normalizar_texto(texto), bins)
+        if f is None:
+            if vacio is None:
+                vacio = id_
+            else:
+                uf.unir(vacio, id_)
+            continue
+        firmas[id_] = f
+        crudo = f.tobytes()
+        ancho = filas * f.itemsize
+        for banda, cubeta in enumerate(cubetas):
+            clave = crudo[banda * ancho:(banda + 1) * ancho]
+            representante = cubeta.setdefault(clave, id_)
+            if representante != id_ and uf.raiz(representante) != uf.raiz(id_):
+                if similitud(firmas[representante], f) >= umbral:
+                    uf.unir(representante, id_)
+    return {id_: uf.raiz(id_) for id_ in uf.padre}
@@ -0,0 +1,144 @@
+# experto_general/analisis.py
+
+# Análisis estático de la base de reglas, hecho una vez al compilarla (ver compilador.py).
+#
+# Cada condición declarativa ("cuando") se lleva a forma normal disyuntiva: una lista de
+# términos, cada uno un par (hechos que deben ser verdaderos, hechos que deben ser falsos).
+# Con eso se detecta:
+#   - insatisfacible: todos los términos se contradicen (p. ej. {"all": ["a", {"not": "a"}]}).
+#   - duplicada: misma condición que una regla anterior.
+#   - sombreada: cada término está cubierto por un término de alguna regla anterior (otro
+#     término con un subconjunto de sus literales); con primera coincidencia nunca gana.
+#   - hecho_desconocido: usa un hecho que no existe en la interfaz (sin bit asignado) ni
+#     es un hecho derivado del motor encadenado; por máscara ese hecho nunca es verdadero.
+#   - id_duplicado: dos reglas con el mismo id.
+# La cobertura por términos es suficiente, no necesaria: una regla cubierta sólo por la
+# unión de varias condiciones anteriores, sin un término que la contenga, no se informa.
+#
+# Las reglas insatisfacibles, duplicadas y sombreadas se quitan del índice de primera
+# coincidencia; siguen en el ranking completo (el asistente iterativo las ofrece después).
+from typing import Optional
+
+from .condiciones import hechos_referenciados, validar_condicion
+from .hechos import BIT
+
+# Tope de términos por condición; condiciones más grandes no se analizan
+LIMITE_TERMINOS = 256
+
+Termino = tuple[frozenset, frozenset]
+
+
+class _Demasiado(Exception):
+    pass
+
+
+def _producto(a: list[Termino], b: list[Termino]) -> list[Termino]:
+    salida = []
+    for pos_a, neg_a in a:
+        for pos_b, neg_b in b:
+            pos, neg = pos_a | pos_b, neg_a | neg_b
+            if not pos & neg:
+                salida.append((pos, neg))
+    if len(salida) > LIMITE_TERMINOS:
+        raise _Demasiado()
+    return salida
+
+
+def _minimizar(terminos: list[Termino]) -> list[Termino]:
+    """Quita repetidos y términos absorbidos por otro más general."""
+    unicos = sorted(set(terminos), key=lambda t: (len(t[0]) + len(t[1]), sorted(t[0]), sorted(t[1])))
+    salida: list[Termino] = []
+    for pos, neg in unicos:
+        if not any(p <= pos and n <= neg for p, n in salida):
+            salida.append((pos, neg))
+    return salida
+
+
+def forma_normal(expr, negada: bool = False) -> list[Termino]:
+    """Términos de la condición en forma normal disyuntiva (lista vacía: insatisfacible)."""
+    if isinstance(expr, str):
+        literal = frozenset((expr,))
+        return [(frozenset(), literal)] if negada else [(literal, frozenset())]
+    op = next(iter(expr))
+    if op == "not":
+        return forma_normal(expr["not"], not negada)
+    hijos = [forma_normal(hijo, negada) for hijo in expr[op]]
+    # 'all' (o un 'any' negado) es conjunción: producto de términos; si no, unión
+    if (op == "all") != negada:
+        terminos = [(frozenset(), frozenset())]
+        for h in hijos:
+            terminos = _minimizar(_producto(terminos, h))
+        return terminos
+    union = [t for h in hijos for t in h]
+    if len(union) > LIMITE_TERMINOS:
+        raise _Demasiado()
+    return _minimizar(union)
+
+
+def _cubierto(termino: Termino, por: list[Termino]) -> bool:
+    pos, neg = termino
+    return any(p <= pos and n <= neg for p, n in por)
+
+
+def _hallazgo(tipo: str, regla: dict, pos: int, detalle: str, por: Optional[list] = None) -> dict:
+    return {"tipo": tipo, "regla": regla.get("id"), "posicion": pos, "por": por or [], "detalle": detalle}
+
+
+def analizar_reglas(reglas: list, conocidos=BIT) -> dict:
+    """
+    Analiza la lista de reglas (en orden de prioridad) y devuelve:
+    - hallazgos: lista de {"tipo", "regla", "posicion", "por", "detalle"}
+    - descartadas: posiciones que no pueden ganar con primera coincidencia
+    Las reglas sin "cuando" (sólo con un predicado) no se analizan ni cubren a otras.
+    """
+    hallazgos: list[dict] = []
+    descartadas: list[int] = []
+    ids: dict = {}
+    # Términos de las reglas anteriores: (id, términos)
+    anteriores: list[tuple[object, list[Termino]]] = []
+    for pos, regla in enumerate(reglas):
+        rid = regla.get("id")
+        if rid is not None:
+            if rid in ids:
+                hallazgos.append(_hallazgo("id_duplicado", regla, pos, f"mismo id que la regla en la posición {ids[rid]}"))
+            else:
+                ids[rid] = pos
+        if "cuando" not in regla:
+            continue
+        expr = regla["cuando"]
+        try:
+            validar_condicion(expr)
+        except ValueError as e:
+            hallazgos.append(_hallazgo("no_analizada", regla, pos, str(e)))
+            continue
+        desconocidos = [h for h in hechos_referenciados(expr) if h not in conocidos]
+        if desconocidos:
+            hallazgos.append(_hallazgo("hecho_desconocido", regla, pos, f"hechos sin bit asignado: {desconocidos}"))
+        try:
+            terminos = forma_normal(expr)
+        except _Demasiado:
+            hallazgos.append(_hallazgo("no_analizada", regla, pos, f"más de {LIMITE_TERMINOS} términos"))
+            continue
+
+        tipo, por, detalle = None, [], ""
+        if not terminos:
+            tipo, detalle = "insatisfacible", "la condición se contradice y nunca se cumple"
+        else:
+            iguales = [otro for otro, t in anteriores if set(t) == set(terminos)]
+            if iguales:
+                tipo, por, detalle = "duplicada", iguales[:1], "misma condición que una regla anterior"
+            else:
+                for termino in terminos:
+                    cubren = [otro for otro, t in anteriores if _cubierto(termino, t)]
+                    if not cubren:
+                        por = []
+                        break
+                    if cubren[0] not in por:
+                        por.append(cubren[0])
+                if por:
+                    tipo, detalle = "sombreada", "toda coincidencia ya la gana una regla anterior"
+        if tipo:
+            hallazgos.append(_hallazgo(tipo, regla, pos, detalle, por))
+            descartadas.append(pos)
+        anteriores.append((rid, terminos))
+    return {"reglas": len(reglas), "hallazgos": hallazgos, "descartadas": descartadas}
@@ -1,14 +1,21 @@
 # experto_general/base_conocimiento.py
 
+from .condiciones import cargar_reglas
+
 # --- Base de Conocimiento (Reglas de Clasificación) ---
 
-REGLAS_CLASIFICACION = [
+# Las condiciones se escriben como datos (ver `condiciones.py`): un nombre de hecho, o
+# {"all": [...]}, {"any": [...]}, {"not": ...}. REGLAS_BASE es serializable (json/pickle);
+# REGLAS_CLASIFICACION es la misma lista con las condiciones ya compiladas a predicados
+# y los hechos de soporte ("hechos") que el motor usa para indexar cada regla.
+
+REGLAS_BASE = [
     # Reglas de Hardware
     {
         "id": "R-HW-PSU-01",
         "titulo": "Fuente de poder falla",
         "descripcion": "Si hay síntomas de falla de PSU (apagones, no arranca, clicks), clasificar como Hardware.",
-        "condicion": lambda h: h.get("psu_falla", False),
+        "cuando": "psu_falla",
         "resultado": "Hardware",
         "solucion": "Probar con PSU conocida o tester, revisar cables del panel frontal y cortos.",
         "soluciones": [
@@ -25,7 +32,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-THERM-01",
         "titulo": "Sobrecalentamiento",
         "descripcion": "Si hay temperaturas elevadas o thermal throttling, clasificar como Hardware.",
-        "condicion": lambda h: h.get("sobrecalentamiento", False),
+        "cuando": "sobrecalentamiento",
         "resultado": "Hardware",
         "solucion": "Limpiar ventiladores/disipadores, renovar pasta térmica y mejorar flujo de aire.",
         "soluciones": [
@@ -42,7 +49,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-RAM-01",
         "titulo": "Memoria RAM defectuosa",
         "descripcion": "Si hay síntomas de RAM defectuosa (pitidos al arrancar, pantallazos aleatorios, pruebas fallidas), clasificar como Hardware.",
-        "condicion": lambda h: h.get("ram_falla", False),
+        "cuando": "ram_falla",
         "resultado": "Hardware",
         "solucion": "Probar módulos de RAM individualmente y con MemTest; limpiar contactos y revisar compatibilidad.",
         "soluciones": [
@@ -59,7 +66,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-DISK-01",
         "titulo": "Disco/almacenamiento con errores",
         "descripcion": "Si hay sectores reasignados, ruidos extraños o errores de lectura/escritura, clasificar como Hardware.",
-        "condicion": lambda h: h.get("disco_falla", False),
+        "cuando": "disco_falla",
         "resultado": "Hardware",
         "solucion": "Respaldar datos, verificar SMART, ejecutar diagnóstico del fabricante y considerar reemplazo.",
         "soluciones": [
@@ -78,7 +85,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-MON-01",
         "titulo": "Monitor sin señal",
         "descripcion": "Si el monitor no enciende o no recibe señal, clasificar como Hardware.",
-        "condicion": lambda h: h.get("monitor_sin_senal", False),
+        "cuando": "monitor_sin_senal",
         "resultado": "Hardware",
         "solucion": "Verificar alimentación, cable y entrada de video seleccionada; probar con otro cable/monitor.",
         "soluciones": [
@@ -95,7 +102,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-01",
         "titulo": "PC no enciende",
         "descripcion": "Si la PC no enciende, clasificar como Hardware (posible fallo físico).",
-        "condicion": lambda h: h.get("pc_no_enciende", False),
+        "cuando": "pc_no_enciende",
         "resultado": "Hardware",
         "solucion": "Revisar fuente de alimentación, conexiones y realizar diagnóstico de hardware.",
         # Nuevo: múltiples soluciones y sugerencias futuras
@@ -115,7 +122,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-02",
         "titulo": "Periférico roto",
         "descripcion": "Si un periférico crítico está roto (ratón/teclado), clasificar como Hardware.",
-        "condicion": lambda h: h.get("periferico_roto", False),
+        "cuando": "periferico_roto",
         "resultado": "Hardware",
         "solucion": "Sustituir o reparar el periférico. Probar con otro puerto/maquina.",
         "soluciones": [
@@ -133,7 +140,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-HW-VID-01",
         "titulo": "Tarjeta de video falla",
         "descripcion": "Si hay indicios de fallo de GPU (sin video, artefactos, cuelgues al iniciar gráficos), clasificar como Hardware.",
-        "condicion": lambda h: h.get("tarjeta_video_falla", False),
+        "cuando": "tarjeta_video_falla",
         "resultado": "Hardware",
         "solucion": "Actualizar/reinstalar drivers de video (DDU en modo seguro), verificar cables/puertos y alimentación PCIe, revisar temperaturas/ventiladores y probar la tarjeta en otro equipo. Si persisten artefactos o pantallazos, considerar reemplazo.",
         "soluciones": [
@@ -154,7 +161,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-RED-01",
         "titulo": "Problema de conexión WiFi / Internet",
         "descripcion": "Si no puede conectar al WiFi o no tiene acceso a Internet, clasificar como Red.",
-        "condicion": lambda h: h.get("no_puede_conectar_wifi", False) or h.get("sin_acceso_internet", False),
+        "cuando": {"any": ["no_puede_conectar_wifi", "sin_acceso_internet"]},
         "resultado": "Red",
         "solucion": "Verificar SSID, credenciales, DHCP, y estado del router/switch.",
         "soluciones": [
@@ -175,7 +182,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-SW-UPD-01",
         "titulo": "Actualizaciones fallidas",
         "descripcion": "Si las actualizaciones de sistema/app fallan, clasificar como Software.",
-        "condicion": lambda h: h.get("actualizaciones_fallidas", False),
+        "cuando": "actualizaciones_fallidas",
         "resultado": "Software",
         "solucion": "Limpiar cachés/servicios de actualización y aplicar parche manual si es necesario.",
         "soluciones": [
@@ -191,7 +198,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-SW-COMP-01",
         "titulo": "Incompatibilidad de software",
         "descripcion": "Si el software no es compatible con el SO/arquitectura, clasificar como Software.",
-        "condicion": lambda h: h.get("incompatibilidad_software", False),
+        "cuando": "incompatibilidad_software",
         "resultado": "Software",
         "solucion": "Usar versión compatible, modo compatibilidad o dependencias requeridas.",
         "soluciones": [
@@ -207,7 +214,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-SW-CORP-01",
         "titulo": "Aplicación corporativa falla/BD corrupta",
         "descripcion": "Si falla una aplicación corporativa o su BD presenta corrupción, clasificar como Software.",
-        "condicion": lambda h: h.get("software_corporativo_falla", False),
+        "cuando": "software_corporativo_falla",
         "resultado": "Software",
         "solucion": "Revisar logs de la app/servidor, restaurar backup y coordinar con el equipo de la aplicación.",
         "soluciones": [
@@ -226,7 +233,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-SW-01",
         "titulo": "Programa se cierra / Lentitud",
         "descripcion": "Si un programa se cierra inesperadamente o el sistema está muy lento, clasificar como Software.",
-        "condicion": lambda h: h.get("programa_se_cierra", False) or h.get("lentitud_sistema", False),
+        "cuando": {"any": ["programa_se_cierra", "lentitud_sistema"]},
         "resultado": "Software",
         "solucion": "Revisar logs de la aplicación, actualizar/reinstalar el software o verificar recursos del sistema.",
         "soluciones": [
@@ -240,12 +247,32 @@ REGLAS_CLASIFICACION = [
         ]
     },
 
+    # Regla sobre un hecho derivado (ver REGLAS_DERIVADAS): sólo la cumple el motor
+    # encadenado. Va antes de Permisos para que un acceso denegado con riesgo de seguridad
+    # se trate como incidente y no como pedido de permisos.
+    {
+        "id": "R-SEC-CUENTA-01",
+        "titulo": "Cuenta posiblemente comprometida",
+        "descripcion": "Si hay riesgo de seguridad (malware o correo sospechoso) junto con accesos denegados, clasificar como Seguridad.",
+        "cuando": "posible_cuenta_comprometida",
+        "resultado": "Seguridad",
+        "solucion": "Bloquear la sesión, restablecer credenciales y revisar los accesos recientes de la cuenta.",
+        "soluciones": [
+            "Cerrar sesiones activas y restablecer la contraseña.",
+            "Revisar inicios de sesión y cambios de permisos recientes.",
+            "Aislar el equipo si hay malware y escanear con AV/EDR."
+        ],
+        "sugerencias_futuras": [
+            "Habilitar MFA en la cuenta.",
+            "Revisar alertas de acceso anómalo con el equipo de seguridad."
+        ]
+    },
     # Reglas de Permisos
     {
         "id": "R-PM-01",
         "titulo": "Problema de permisos / instalación",
         "descripcion": "Si hay acceso denegado o no puede instalar software, clasificar como Permisos.",
-        "condicion": lambda h: h.get("acceso_denegado", False) or h.get("no_puede_instalar", False),
+        "cuando": {"any": ["acceso_denegado", "no_puede_instalar"]},
         "resultado": "Permisos",
         "solucion": "Revisar permisos del usuario y las políticas de control de aplicaciones.",
         "soluciones": [
@@ -265,7 +292,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-SEC-01",
         "titulo": "Email sospechoso",
         "descripcion": "Si se detecta un email sospechoso (posible phishing), clasificar como Seguridad.",
-        "condicion": lambda h: h.get("email_sospechoso", False),
+        "cuando": "email_sospechoso",
         "resultado": "Seguridad",
         "solucion": "Aislar el equipo, ejecutar análisis de seguridad y seguir protocolo de incidentes.",
         "soluciones": [
@@ -283,7 +310,7 @@ REGLAS_CLASIFICACION = [
         "id": "R-SEC-MAL-01",
         "titulo": "Malware detectado",
         "descripcion": "Si hay infección o señales de malware, clasificar como Seguridad.",
-        "condicion": lambda h: h.get("malware_detectado", False),
+        "cuando": "malware_detectado",
         "resultado": "Seguridad",
         "solucion": "Aislar equipo, escanear con EDR/AV y restaurar desde respaldo si es necesario.",
         "soluciones": [
@@ -297,6 +324,68 @@ REGLAS_CLASIFICACION = [
     },
 ]
 
+REGLAS_CLASIFICACION = cargar_reglas(REGLAS_BASE)
+
+# --- Hechos derivados (encadenamiento hacia adelante, ver `rete.py`) ---
+
+# Cada regla concluye un hecho intermedio ("deriva") que otras reglas pueden usar en su
+# condición. Sólo se niegan hechos base: un 'not' sobre un hecho derivado es un error.
+# Se informan como explicación y, con el motor encadenado (/clasificar_ticket/encadenado),
+# las reglas de clasificación que los usan (p. ej. R-SEC-CUENTA-01) pueden cumplirse. La
+# primera coincidencia, el ranking y el asistente trabajan con los hechos base y no los ven.
+
+REGLAS_DERIVADAS = [
+    {
+        "id": "D-RED-DNS-01",
+        "titulo": "Posible problema de DNS",
+        "descripcion": "Sin acceso a internet pero con la conexión WiFi funcionando: la resolución de nombres es sospechosa.",
+        "cuando": {"all": ["sin_acceso_internet", {"not": "no_puede_conectar_wifi"}]},
+        "deriva": "problema_dns",
+    },
+    {
+        "id": "D-RED-LOCAL-01",
+        "titulo": "Falla de la red local",
+        "descripcion": "No conecta al WiFi: el problema está en el enlace local, antes de internet.",
+        "cuando": "no_puede_conectar_wifi",
+        "deriva": "problema_red_local",
+    },
+    {
+        "id": "D-HW-ENERGIA-01",
+        "titulo": "Falla de alimentación",
+        "descripcion": "El equipo no enciende o la fuente falla.",
+        "cuando": {"any": ["psu_falla", "pc_no_enciende"]},
+        "deriva": "falla_energia",
+    },
+    {
+        "id": "D-HW-TERMICO-01",
+        "titulo": "Degradación térmica",
+        "descripcion": "Sobrecalentamiento junto con lentitud o cierres: probable thermal throttling.",
+        "cuando": {"all": ["sobrecalentamiento", {"any": ["lentitud_sistema", "programa_se_cierra"]}]},
+        "deriva": "degradacion_termica",
+    },
+    {
+        "id": "D-HW-INESTABLE-01",
+        "titulo": "Hardware inestable",
+        "descripcion": "Degradación térmica o memoria defectuosa: los cierres de programas pueden ser de hardware.",
+        "cuando": {"any": ["degradacion_termica", "ram_falla"]},
+        "deriva": "hardware_inestable",
+    },
+    {
+        "id": "D-SEC-RIESGO-01",
+        "titulo": "Riesgo de seguridad",
+        "descripcion": "Hay malware detectado o un correo sospechoso.",
+        "cuando": {"any": ["malware_detectado", "email_sospechoso"]},
+        "deriva": "riesgo_seguridad",
+    },
+    {
+        "id": "D-SEC-CUENTA-01",
+        "titulo": "Posible cuenta comprometida",
+        "descripcion": "Riesgo de seguridad junto con accesos denegados: revisar la cuenta del usuario.",
+        "cuando": {"all": ["riesgo_seguridad", "acceso_denegado"]},
+        "deriva": "posible_cuenta_comprometida",
+    },
+]
+
 # --- Lógica del Técnico Responsable Sugerido (Datos) ---
 
 MAPEO_TECNICOS = {
@@ -306,4 +395,225 @@ MAPEO_TECNICOS = {
     "Permisos": "Técnica Ana (Administradora de Accesos)",
     "Seguridad": "Técnico Luis (Especialista en Ciberseguridad)",
     "Sin clasificar (General)": "Coordinador de Soporte"
-}
\ No newline at end of file
+}
+# --- Soluciones sugeridas (Datos) ---
+
+# Una solución por regla (y, si la regla no tiene, por categoría) para `solucion_sugerida`
+SOLUCION_POR_REGLA = {
+    # Hardware
+    "R-HW-01": "Probar con otra toma/cable, revisar PSU y placa base con tester; si no enciende, escalar a diagnóstico de HW.",
+    "R-HW-02": "Probar periférico en otro puerto/equipo; si falla, reemplazo. Actualizar/instalar drivers genéricos si aplica.",
+    "R-HW-VID-01": "Reinstalar drivers con DDU, verificar alimentación PCIe y temperaturas; si persisten artefactos/pantallazos, evaluar reemplazo de GPU.",
+    "R-HW-RAM-01": "Ejecutar MemTest, probar módulos individualmente y reemplazar el módulo defectuoso si falla.",
+    "R-HW-DISK-01": "Respaldar datos, revisar SMART/diagnóstico del fabricante; reemplazar unidad si persisten errores.",
+    "R-HW-MON-01": "Verificar alimentación y entrada de video; probar con otro cable/monitor para descartar.",
+    # Red
+    "R-RED-01": "Olvidar/redescubrir red, renovar IP (DHCP), reiniciar router/switch; validar DNS/puerta de enlace.",
+    # Software
+    "R-SW-01": "Actualizar app/SO, revisar logs del visor de eventos, ejecutar en modo seguro/limpio; reinstalar si persiste.",
+    "R-SW-CORP-01": "Revisar logs/dependencias, ejecutar reparación; restaurar backup validado y coordinar con equipo de la aplicación.",
+    # Permisos
+    "R-PM-01": "Solicitar elevación o permisos necesarios; validar políticas (GPO/AppLocker) y listas de control de acceso.",
+    # Seguridad
+    "R-SEC-01": "No abrir enlaces/adjuntos, reportar a seguridad, aislar equipo y ejecutar escaneo avanzado (EDR/AV).",
+}
+
+SOLUCION_POR_CATEGORIA = {
+    "Red": "Verificar conectividad física/lógica, renovar IP y reiniciar equipos de red.",
+    "Hardware": "Ejecutar diagnóstico de hardware, revisar conexiones y reemplazar el componente defectuoso.",
+    "Software": "Actualizar o reinstalar software; revisar compatibilidad y dependencias.",
+    "Seguridad": "Realizar análisis completo, cambiar credenciales y aplicar políticas de hardening.",
+    "Permisos": "Revisar pertenencia a grupos/roles y políticas de instalación/acceso.",
+    "Sin clasificar (General)": "Revisar detalles y solicitar información adicional al usuario.",
+    "Otra causa": "Derivar a soporte remoto para triage y diagnóstico guiado."
+}
+
+# Dos sugerencias por regla (o por categoría) para `soluciones_sugeridas`
+SOLUCIONES_POR_REGLA = {
+    # Hardware
+    "R-HW-01": [
+        "Revisar/medir PSU y conexiones internas.",
+        "Probar fuera del gabinete con configuración mínima (placa+CPU+1 RAM).",
+    ],
+    "R-HW-02": [
+        "Probar en otro equipo/puerto y reinstalar drivers.",
+        "Reemplazar periférico si falla en pruebas cruzadas.",
+    ],
+    "R-HW-VID-01": [
+        "Reinstalar drivers con DDU en modo seguro.",
+        "Verificar alimentación PCIe/temperaturas y probar otro cable/monitor.",
+    ],
+    "R-HW-RAM-01": [
+        "Ejecutar MemTest/Diagnóstico de memoria.",
+        "Probar módulos individualmente y reemplazar el defectuoso.",
+    ],
+    "R-HW-DISK-01": [
+        "Respaldar datos y revisar SMART/diagnóstico del fabricante.",
+        "Cambiar cable/puerto y reemplazar unidad si persisten errores.",
+    ],
+    "R-HW-MON-01": [
+        "Verificar entrada seleccionada y probar otro cable/monitor.",
+        "Actualizar/reinstalar drivers de video.",
+    ],
+    "R-HW-PSU-01": [
+        "Probar PSU con tester o reemplazo temporal.",
+        "Verificar cables del panel frontal y corto en periféricos.",
+    ],
+    "R-HW-THERM-01": [
+        "Limpiar ventiladores/disipadores y renovar pasta térmica.",
+        "Revisar flujo de aire y perfiles de ventilación en BIOS/OS.",
+    ],
+    # Red
+    "R-RED-01": [
+        "Olvidar y reconectar a la red; renovar IP/DNS.",
+        "Reiniciar router/AP o probar por cable.",
+    ],
+    # Software
+    "R-SW-01": [
+        "Actualizar app/SO y revisar conflictos en inicio limpio.",
+        "Reinstalar o reparar la aplicación.",
+    ],
+    "R-SW-UPD-01": [
+        "Limpiar caché de actualizaciones y reiniciar servicios.",
+        "Aplicar manualmente el parche/installer oficial.",
+    ],
+    "R-SW-COMP-01": [
+        "Ejecutar en compatibilidad o usar versión soportada.",
+        "Revisar dependencias/SDK y documentación del proveedor.",
+    ],
+    "R-SW-CORP-01": [
+        "Revisar logs y dependencias; ejecutar reparación.",
+        "Coordinar restauración de backup validado.",
+    ],
+    # Permisos
+    "R-PM-01": [
+        "Validar rol/grupos y solicitar elevación controlada.",
+        "Revisar GPO/AppLocker y política de instalación.",
+    ],
+    # Seguridad
+    "R-SEC-01": [
+        "No interactuar; reportar y aislar equipo.",
+        "Ejecutar escaneo EDR/AV y cambio de credenciales.",
+    ],
+    "R-SEC-MAL-01": [
+        "Aislar el equipo y ejecutar escaneo completo.",
+        "Restaurar sistema/archivos desde respaldo confiable.",
+    ],
+    "R-SEC-CUENTA-01": [
+        "Restablecer credenciales y cerrar sesiones activas.",
+        "Revisar accesos recientes y habilitar MFA.",
+    ],
+}
+
+SOLUCIONES_POR_CATEGORIA = {
+    "Hardware": [
+        "Revisar conexiones/diagnóstico del componente.",
+        "Probar reemplazo temporal o escalar a laboratorio.",
+    ],
+    "Red": [
+        "Renovar IP/DNS y revisar credenciales.",
+        "Reiniciar equipo de red o escalar a NOC.",
+    ],
+    "Software": [
+        "Actualizar/reparar aplicación y dependencias.",
+        "Reinstalar o usar versión soportada.",
+    ],
+    "Permisos": [
+        "Solicitar elevación controlada.",
+        "Ajustar rol/grupos y políticas.",
+    ],
+    "Seguridad": [
+        "Aislar equipo y escanear con EDR/AV.",
+        "Cambiar credenciales y revisar indicadores.",
+    ],
+    "Sin clasificar (General)": [
+        "Solicitar más detalle del síntoma.",
+        "Registrar nuevo síntoma para mejorar el sistema.",
+    ],
+    "Otra causa": [
+        "Derivar a soporte remoto para triage.",
+        "Solicitar captura/logs para análisis.",
+    ],
+}
+
+# --- Palabras clave por hecho (texto libre -> banderas) ---
+
+# Frases que, encontradas en el texto del ticket, activan cada hecho (ver `texto.py`).
+# Se comparan sin acentos ni mayúsculas y por palabras completas; un '*' final acepta
+# cualquier terminación ("imprim*" cubre imprime, imprimir, imprimiendo...).
+PALABRAS_CLAVE = {
+    "pc_no_enciende": [
+        "no enciende", "no prende", "no arranca", "no inicia", "no da imagen ni luz",
+        "no enciende la pc", "no prende la computadora", "equipo muerto", "no hace nada al presionar",
+    ],
+    "periferico_roto": [
+        "teclado", "mouse", "raton", "impresora*", "no imprim*", "escaner", "webcam", "camara web",
+        "auricular*", "periferico*", "usb no funciona",
+    ],
+    "tarjeta_video_falla": [
+        "tarjeta de video", "tarjeta grafica", "gpu", "artefactos en pantalla", "driver de video",
+        "controlador de video", "pantalla con rayas", "graficos corruptos",
+    ],
+    "ram_falla": [
+        "memoria ram", "ram", "pitido*", "memtest", "pantallazo*", "pantalla azul", "bsod",
+        "modulo de memoria",
+    ],
+    "disco_falla": [
+        "disco duro", "disco", "ssd", "hdd", "sectores defectuosos", "smart", "ruido del disco",
+        "no detecta el disco", "disco lleno",
+    ],
+    "monitor_sin_senal": [
+        "monitor sin senal", "sin senal", "monitor negro", "pantalla negra", "no hay senal",
+        "monitor no muestra", "no da imagen",
+    ],
+    "psu_falla": [
+        "fuente de poder", "fuente de alimentacion", "psu", "se apaga solo", "se apaga sola",
+        "se apaga de golpe", "olor a quemado", "chispazo*",
+    ],
+    "sobrecalentamiento": [
+        "sobrecalent*", "se calienta", "calienta mucho", "temperatura alta", "temperatura*",
+        "ventilador*", "throttling", "muy caliente",
+    ],
+    "no_puede_conectar_wifi": [
+        "wifi", "wi fi", "wireless", "red inalambrica", "no conecta a la red", "no se conecta a la red",
+        "no encuentra la red",
+    ],
+    "sin_acceso_internet": [
+        "sin internet", "no hay internet", "no tengo internet", "sin conexion", "no carga ninguna pagina",
+        "no abre paginas", "sin acceso a internet", "dns",
+    ],
+    "programa_se_cierra": [
+        "se cierra", "se cierra solo", "se cierra sola", "se crashea", "crash*", "se cuelga",
+        "deja de responder", "no responde", "se congela",
+    ],
+    "lentitud_sistema": [
+        "lento", "lenta", "lentitud", "lentisim*", "tarda mucho", "demora*", "se pone lenta", "va lento", "rendimiento bajo",
+    ],
+    "actualizaciones_fallidas": [
+        "actualizacion*", "update", "windows update", "no se actualiza", "error al actualizar",
+        "parche*",
+    ],
+    "incompatibilidad_software": [
+        "incompatib*", "no es compatible", "version no soportada", "no compatible",
+    ],
+    "acceso_denegado": [
+        "acceso denegado", "permiso denegado", "sin permisos", "no tengo permisos", "no tengo acceso",
+        "contrasena", "clave bloqueada", "usuario bloqueado", "cuenta bloqueada", "no puedo iniciar sesion",
+    ],
+    "no_puede_instalar": [
+        "no puedo instalar", "no se instala", "no deja instalar", "error al instalar", "instalacion fallida",
+        "falla la instalacion", "instalador",
+    ],
+    "email_sospechoso": [
+        "correo sospechoso", "email sospechoso", "phishing", "correo raro", "correo extrano",
+        "enlace sospechoso", "adjunto sospechoso", "suplantacion",
+    ],
+    "software_corporativo_falla": [
+        "erp", "sap", "crm", "sistema de nominas", "sistema interno", "aplicacion corporativa",
+        "software corporativo", "intranet", "vpn",
+    ],
+    "malware_detectado": [
+        "malware", "virus", "ransomware", "troyano", "antivirus detecto", "infectad*", "spyware",
+        "archivos cifrados",
+    ],
+}
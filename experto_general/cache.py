@@ -0,0 +1,145 @@
+# experto_general/cache.py
+
+# Caché LRU acotada y segura entre hilos, con contadores de aciertos/fallos, y una variante
+# con vencimiento por tiempo (CacheTTL).
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Caché con capacidad máxima: al llenarse descarta la entrada usada hace más tiempo.
+
+    `version` permite invalidarla en bloque: una consulta con una versión más nueva que la
+    vigente la vacía antes de continuar (p. ej. al recargar la base de conocimiento). Con
+    una versión anterior (peticiones que empezaron antes de la recarga) no se lee ni se
+    guarda nada, y la caché queda intacta. Las versiones deben ser comparables entre sí.
+    """
+
+    def __init__(self, capacidad: int = 1024):
+        self.capacidad = capacidad
+        self.version: Optional[Hashable] = None
+        self._datos: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.evicciones = 0
+        self.invalidaciones = 0
+
+    def _verificar_version(self, version: Hashable) -> bool:
+        """True si `version` es la vigente (vaciando antes la caché si es más nueva)."""
+        if version == self.version:
+            return True
+        if self.version is not None and (version is None or version < self.version):
+            return False
+        if self._datos:
+            self.invalidaciones += 1
+        self._datos.clear()
+        self.version = version
+        return True
+
+    def obtener(self, clave: Hashable, version: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            if not self._verificar_version(version):
+                self.fallos += 1
+                return None
+            try:
+                valor = self._datos[clave]
+            except KeyError:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, version: Hashable = None) -> None:
+        with self._lock:
+            if not self._verificar_version(version):
+                return
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+                self.evicciones += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def metricas(self) -> dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "version": self.version,
+                "entradas": len(self._datos),
+                "capacidad": self.capacidad,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "evicciones": self.evicciones,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+class CacheTTL(CacheLRU):
+    """
+    CacheLRU cuyas entradas vencen `ttl` segundos después del último uso. Una entrada
+    vencida cuenta como fallo y se descarta al consultarla (o en `purgar_vencidas`).
+    """
+
+    def __init__(self, capacidad: int = 1024, ttl: float = 900.0, reloj=time.monotonic):
+        super().__init__(capacidad)
+        self.ttl = ttl
+        self._reloj = reloj
+        self.vencidas = 0
+
+    def obtener(self, clave: Hashable, version: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            if not self._verificar_version(version):
+                self.fallos += 1
+                return None
+            try:
+                vence, valor = self._datos[clave]
+            except KeyError:
+                self.fallos += 1
+                return None
+            ahora = self._reloj()
+            if vence <= ahora:
+                del self._datos[clave]
+                self.vencidas += 1
+                self.fallos += 1
+                return None
+            # Vencimiento deslizante: cada uso renueva el plazo
+            self._datos[clave] = (ahora + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, version: Hashable = None) -> None:
+        super().guardar(clave, (self._reloj() + self.ttl, valor), version)
+
+    def eliminar(self, clave: Hashable) -> bool:
+        with self._lock:
+            return self._datos.pop(clave, None) is not None
+
+    def purgar_vencidas(self) -> int:
+        """Descarta las entradas vencidas. Las más viejas están al principio del orden LRU."""
+        with self._lock:
+            ahora = self._reloj()
+            n = 0
+            while self._datos:
+                clave, (vence, _) = next(iter(self._datos.items()))
+                if vence > ahora:
+                    break
+                del self._datos[clave]
+                n += 1
+            self.vencidas += n
+            return n
+
+    def metricas(self) -> dict:
+        salida = super().metricas()
+        salida["ttl"] = self.ttl
+        salida["vencidas"] = self.vencidas
+        return salida
@@ -0,0 +1,184 @@
+# experto_general/clasificador.py
+
+# Armado de la respuesta del flujo clásico (/clasificar_ticket/) a partir de la máscara de
+# hechos, con una caché de resultados: el espacio de entradas es pequeño y muy repetitivo,
+# así que la misma combinación de síntomas no vuelve a pasar por el motor.
+import json
+import threading
+from typing import Optional
+
+from .acciones import sugerir_tecnico, obtener_soluciones_sugeridas
+from .cache import CacheLRU
+from .conocimiento import BASE_ACTIVA, Conocimiento
+from .hechos import BIT, BIT_OTRA_CAUSA, MASCARA_SINTOMAS, SINTOMAS, sintomas_activos
+
+CAPACIDAD_CACHE = 1024
+
+CACHE_RESPUESTAS = CacheLRU(CAPACIDAD_CACHE)
+
+
+def construir_respuesta(mascara: int, base: Optional[Conocimiento] = None) -> dict:
+    """
+    Ejecuta la inferencia y arma la respuesta clásica (sin 'otra_descripcion') con la base
+    de conocimiento indicada (por defecto, la vigente).
+    """
+    base = base or BASE_ACTIVA.actual()
+    regla_usada = None
+    # Sin síntomas no se ejecuta el motor
+    if mascara & MASCARA_SINTOMAS:
+        regla_usada = base.compilada.primera_coincidencia_mascara(mascara)
+    return respuesta_para_regla(mascara, regla_usada, base)
+
+
+def respuesta_para_regla(mascara: int, regla_usada: Optional[dict], base: Optional[Conocimiento] = None) -> dict:
+    """
+    Arma la respuesta clásica a partir de la regla ganadora (None si ninguna coincidió),
+    sea cual sea el motor que la eligió.
+    """
+    base = base or BASE_ACTIVA.actual()
+    # Determinar sintoma activo (diseño del frontend: solo uno debe ser True)
+    activos = sintomas_activos(mascara)
+    sintoma_activo = activos[0] if activos else None
+
+    if not sintoma_activo or regla_usada is None:
+        clasificacion_final = "Sin clasificar (General)"
+        regla_usada = None
+    else:
+        clasificacion_final = regla_usada["resultado"]
+
+    # Priorizar siempre 'Otra causa' si el usuario lo marcó explícitamente
+    if mascara & BIT_OTRA_CAUSA:
+        tecnico_sugerido = "Técnico en línea (Soporte Remoto)"
+        clasificacion_final = "Otra causa"
+    else:
+        tecnico_sugerido = sugerir_tecnico(clasificacion_final, base)
+
+    response = {
+        "categoria": clasificacion_final,
+        "tecnico_responsable": tecnico_sugerido,
+        "sintoma": sintoma_activo if sintoma_activo else "Ninguno"
+    }
+
+    # Añadir explicación (metadatos legibles de la regla usada)
+    if regla_usada:
+        response["explicacion"] = {
+            "id": regla_usada.get("id"),
+            "titulo": regla_usada.get("titulo"),
+            "descripcion": regla_usada.get("descripcion"),
+            "solucion_regla": regla_usada.get("solucion"),
+        }
+    else:
+        response["explicacion"] = {"id": None, "titulo": None, "descripcion": "Ninguna regla coincidió", "solucion_regla": None}
+
+    # Dos sugerencias (y compatibilidad con campo anterior)
+    regla_id = response["explicacion"].get("id")
+    soluciones_sug = obtener_soluciones_sugeridas(response["categoria"], regla_id, base)
+    response["soluciones_sugeridas"] = soluciones_sug
+    response["solucion_sugerida"] = soluciones_sug[0] if soluciones_sug else None
+    return response
+
+
+def con_descripcion(respuesta: dict, otra_descripcion: Optional[str]) -> dict:
+    """Copia de la respuesta con 'otra_descripcion' (si vino) a continuación de 'sintoma'."""
+    if not otra_descripcion:
+        return dict(respuesta)
+    salida = {}
+    for clave, valor in respuesta.items():
+        salida[clave] = valor
+        if clave == "sintoma":
+            salida["otra_descripcion"] = otra_descripcion
+    return salida
+
+
+def clasificar_mascara(mascara: int, otra_descripcion: Optional[str] = None,
+                       base: Optional[Conocimiento] = None) -> dict:
+    """
+    Respuesta clásica para la máscara de hechos, usando la caché de resultados.
+    La clave incluye la versión de la base de conocimiento, así una recarga (reglas,
+    técnicos o soluciones) invalida las entradas anteriores.
+    """
+    base = base or BASE_ACTIVA.actual()
+    respuesta = CACHE_RESPUESTAS.obtener(mascara, base.version)
+    if respuesta is None:
+        respuesta = construir_respuesta(mascara, base)
+        CACHE_RESPUESTAS.guardar(mascara, respuesta, base.version)
+    return con_descripcion(respuesta, otra_descripcion)
+
+
+def clasificar_lote(entradas: list, base: Optional[Conocimiento] = None) -> list[dict]:
+    """
+    Clasifica una lista de (mascara, otra_descripcion) en una sola pasada: cada máscara
+    distinta se resuelve una vez y su respuesta se reutiliza para el resto del lote.
+    Devuelve las respuestas en el mismo orden que `entradas`.
+    """
+    base = base or BASE_ACTIVA.actual()
+    resueltas: dict[int, dict] = {}
+    salida = []
+    for mascara, otra_descripcion in entradas:
+        respuesta = resueltas.get(mascara)
+        if respuesta is None:
+            respuesta = clasificar_mascara(mascara, None, base)
+            resueltas[mascara] = respuesta
+        salida.append(con_descripcion(respuesta, otra_descripcion))
+    return salida
+
+
+def codificar_json(respuesta: dict) -> bytes:
+    """Serializa igual que JSONResponse de FastAPI/Starlette."""
+    return json.dumps(
+        respuesta,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class TablaRespuestas:
+    """
+    Respuestas precalculadas (dict + JSON ya codificado) para todas las entradas que envía
+    la interfaz: ningún síntoma o un único síntoma, con o sin 'otra_causa', y sin
+    'otra_descripcion'. Son 2 x (len(SINTOMAS) + 1) combinaciones.
+
+    La tabla queda asociada a una versión de la base de conocimiento. Al recargar la base se
+    recalcula antes de publicar la versión nueva (BASE_ACTIVA.al_reemplazar); mientras
+    tanto, una consulta con otra versión no usa la tabla.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._tabla: dict[int, tuple[dict, bytes]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def mascaras() -> list[int]:
+        """Máscaras cubiertas por la tabla."""
+        simples = [0] + [BIT[nombre] for nombre in SINTOMAS]
+        return simples + [m | BIT_OTRA_CAUSA for m in simples]
+
+    def precalcular(self, base: Optional[Conocimiento] = None) -> int:
+        """(Re)construye la tabla con el motor real. Devuelve la cantidad de entradas."""
+        base = base or BASE_ACTIVA.actual()
+        tabla = {}
+        for mascara in self.mascaras():
+            respuesta = construir_respuesta(mascara, base)
+            tabla[mascara] = (respuesta, codificar_json(respuesta))
+        with self._lock:
+            self._tabla = tabla
+            self.version = base.version
+        return len(tabla)
+
+    def obtener(self, mascara: int, base: Optional[Conocimiento] = None) -> Optional[tuple[dict, bytes]]:
+        """
+        (respuesta, cuerpo JSON) para la máscara, o None si no está precalculada o la tabla
+        es de otra versión de la base.
+        """
+        base = base or BASE_ACTIVA.actual()
+        with self._lock:
+            if self.version != base.version:
+                return None
+            return self._tabla.get(mascara)
+
+
+TABLA_RESPUESTAS = TablaRespuestas()
+BASE_ACTIVA.al_reemplazar(TABLA_RESPUESTAS.precalcular)
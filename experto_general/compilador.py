@@ -0,0 +1,162 @@
+# experto_general/compilador.py
+
+# Compilación de la base de reglas: en lugar de recorrer todas las reglas en cada consulta,
+# se construye (una sola vez) un índice invertido hecho -> reglas candidatas. El índice de
+# la base vigente lo conserva su `Conocimiento` (ver conocimiento.py); las listas sueltas
+# se compilan una vez y quedan en una caché chica por contenido (`compilar_reglas`).
+import hashlib
+import json
+from typing import Optional
+
+from .analisis import analizar_reglas
+from .cache import CacheLRU
+from .condiciones import hechos_referenciados
+from .hechos import BIT, codificar_hechos, decodificar_hechos
+
+# Bases compiladas por huella de contenido (`version_reglas`), ver `compilar_reglas`
+CACHE_COMPILADAS = CacheLRU(8)
+
+
+class BaseCompilada:
+    """
+    Forma compilada de una lista de reglas.
+
+    - por_bit: bit de hecho -> posiciones (en orden de prioridad) de las reglas que lo usan.
+    - indice: igual que por_bit pero por nombre, para hechos sin bit asignado.
+    - siempre: posiciones de reglas sin "hechos" declarados; se evalúan en toda consulta.
+
+    Sólo se evalúan las reglas cuyos hechos referenciados son verdaderos, respetando el
+    orden original (primera coincidencia gana). Las reglas con "condicion_mascara" se
+    evalúan con operaciones de bits sobre la máscara de hechos; el resto con "condicion".
+
+    `solo_mascara` indica que el resultado depende sólo de la máscara, así puede guardarse
+    por máscara: todas las reglas se evalúan por máscara, salvo las que usan `derivados`
+    (hechos que sólo concluye el motor encadenado, ver rete.py), que nunca llegan entre los
+    hechos base.
+
+    `analisis` es el resultado de `analisis.analizar_reglas`. Las reglas que no pueden ganar
+    con primera coincidencia (sombreadas, duplicadas, insatisfacibles) no están en el índice
+    de `primera_coincidencia_mascara`; sí en el de `coincidencias_mascara`.
+
+    `version` es un resumen del contenido de las reglas: cambia si cambia cualquier regla,
+    y sirve para invalidar cachés derivadas de ellas.
+    """
+
+    def __init__(self, reglas: list, version: Optional[str] = None, derivados=()):
+        self.reglas = reglas
+        self.tamano = len(reglas)
+        self.version = version or version_reglas(reglas)
+        self.derivados = frozenset(derivados)
+        conocidos = set(BIT) | self.derivados
+        self.solo_mascara = all(
+            regla.get("condicion_mascara") is not None
+            or ("cuando" in regla and set(hechos_referenciados(regla["cuando"])) <= conocidos)
+            for regla in reglas
+        )
+        self.analisis = analizar_reglas(reglas, conocidos)
+        self.por_bit, self.indice, self.siempre = self._indexar(range(len(reglas)))
+        descartadas = set(self.analisis["descartadas"])
+        self._primera = self._indexar(pos for pos in range(len(reglas)) if pos not in descartadas)
+
+    def _indexar(self, posiciones) -> tuple[dict[int, list[int]], dict[str, list[int]], list[int]]:
+        por_bit: dict[int, list[int]] = {}
+        indice: dict[str, list[int]] = {}
+        siempre: list[int] = []
+        for pos in posiciones:
+            hechos = self.reglas[pos].get("hechos")
+            if not hechos:
+                siempre.append(pos)
+                continue
+            for nombre in hechos:
+                if nombre in BIT:
+                    grupo = por_bit.setdefault(BIT[nombre], [])
+                else:
+                    grupo = indice.setdefault(nombre, [])
+                if not grupo or grupo[-1] != pos:
+                    grupo.append(pos)
+        return por_bit, indice, siempre
+
+    def candidatas(self, mascara: int, hechos: Optional[dict] = None, primera: bool = False) -> list[int]:
+        """
+        Posiciones de las reglas a evaluar para estos hechos, en orden de prioridad. Con
+        `primera` se omiten las reglas que nunca ganan con primera coincidencia.
+        """
+        por_bit, indice, siempre = self._primera if primera else (self.por_bit, self.indice, self.siempre)
+        posiciones = set(siempre)
+        m = mascara
+        while m:
+            bit = m & -m
+            grupo = por_bit.get(bit)
+            if grupo:
+                posiciones.update(grupo)
+            m ^= bit
+        if indice and hechos:
+            for nombre, grupo in indice.items():
+                if hechos.get(nombre):
+                    posiciones.update(grupo)
+        return sorted(posiciones)
+
+    def cumple(self, pos: int, mascara: int, hechos: Optional[dict] = None) -> bool:
+        """Evalúa la condición de la regla en `pos`, por máscara si es posible."""
+        regla = self.reglas[pos]
+        predicado = regla.get("condicion_mascara")
+        if predicado is not None:
+            return predicado(mascara)
+        if hechos is None:
+            hechos = decodificar_hechos(mascara)
+        try:
+            return bool(regla["condicion"](hechos))
+        except KeyError:
+            return False
+
+    def primera_coincidencia_mascara(self, mascara: int, hechos: Optional[dict] = None) -> Optional[dict]:
+        """Devuelve la primera regla (por prioridad) que se cumple para la máscara, o None."""
+        for pos in self.candidatas(mascara, hechos, primera=True):
+            if self.cumple(pos, mascara, hechos):
+                return self.reglas[pos]
+        return None
+
+    def coincidencias_mascara(self, mascara: int, hechos: Optional[dict] = None) -> list[dict]:
+        """
+        Todas las reglas que se cumplen para la máscara, en orden de prioridad. Cada regla
+        candidata se evalúa una sola vez; una condición que falla al evaluarse no coincide.
+        """
+        salida = []
+        for pos in self.candidatas(mascara, hechos):
+            try:
+                if self.cumple(pos, mascara, hechos):
+                    salida.append(self.reglas[pos])
+            except Exception:
+                continue
+        return salida
+
+    def coincidencias(self, hechos: dict) -> list[dict]:
+        """Igual que `coincidencias_mascara`, a partir del dict de hechos."""
+        return self.coincidencias_mascara(codificar_hechos(hechos), hechos)
+
+    def primera_coincidencia(self, hechos: dict) -> Optional[dict]:
+        """Igual que `primera_coincidencia_mascara`, a partir del dict de hechos."""
+        return self.primera_coincidencia_mascara(codificar_hechos(hechos), hechos)
+
+
+def version_reglas(reglas: list) -> str:
+    """Huella estable (sha1 abreviado) de los datos de las reglas, sin los predicados compilados."""
+    datos = [{k: v for k, v in regla.items() if not callable(v)} for regla in reglas]
+    crudo = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(crudo.encode("utf-8")).hexdigest()[:12]
+
+
+def compilar_reglas(reglas: list, derivados=()) -> BaseCompilada:
+    """
+    Base compilada para `reglas`. Se reutiliza mientras el contenido sea el mismo: la clave
+    es la huella de las reglas, así una lista modificada se vuelve a compilar y la caché
+    (acotada) no retiene listas viejas indefinidamente.
+    """
+    version = version_reglas(reglas)
+    clave = (version, frozenset(derivados))
+    compilada = CACHE_COMPILADAS.obtener(clave)
+    if compilada is None or compilada.reglas is not reglas:
+        # Otra lista con el mismo contenido: se compila la propia (los predicados pueden diferir)
+        compilada = BaseCompilada(reglas, version, derivados)
+        CACHE_COMPILADAS.guardar(clave, compilada)
+    return compilada
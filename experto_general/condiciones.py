@@ -0,0 +1,196 @@
+# experto_general/condiciones.py
+
+# Lenguaje declarativo de condiciones para las reglas. Una condición es un dato
+# (serializable con json/pickle) con una de estas formas:
+#
+#   "nombre_hecho"                 -> el hecho es verdadero
+#   {"all": [cond, cond, ...]}     -> todas se cumplen
+#   {"any": [cond, cond, ...]}     -> al menos una se cumple
+#   {"not": cond}                  -> la condición no se cumple
+#
+# `cargar_reglas` compila esas condiciones a predicados Python una sola vez, y además
+# a pruebas sobre la máscara de bits de hechos (ver `hechos.py`).
+from typing import Callable, Optional
+
+from .hechos import BIT
+
+OPERADORES = ("all", "any", "not")
+
+
+def _operador(expr: dict) -> str:
+    if len(expr) != 1:
+        raise ValueError(f"Condición inválida (se espera un único operador): {expr!r}")
+    op = next(iter(expr))
+    if op not in OPERADORES:
+        raise ValueError(f"Operador de condición desconocido: {op!r}")
+    return op
+
+
+def validar_condicion(expr) -> None:
+    """Lanza ValueError si `expr` no respeta el lenguaje de condiciones."""
+    if isinstance(expr, str):
+        if not expr:
+            raise ValueError("Nombre de hecho vacío en la condición")
+        return
+    if not isinstance(expr, dict):
+        raise ValueError(f"Condición inválida: {expr!r}")
+    op = _operador(expr)
+    if op == "not":
+        validar_condicion(expr["not"])
+        return
+    hijos = expr[op]
+    if not isinstance(hijos, (list, tuple)) or not hijos:
+        raise ValueError(f"'{op}' requiere una lista no vacía de condiciones")
+    for hijo in hijos:
+        validar_condicion(hijo)
+
+
+def hechos_referenciados(expr) -> list[str]:
+    """Todos los hechos mencionados en la condición, en orden de aparición y sin repetir."""
+    vistos: list[str] = []
+
+    def recorrer(e):
+        if isinstance(e, str):
+            if e not in vistos:
+                vistos.append(e)
+            return
+        op = _operador(e)
+        if op == "not":
+            recorrer(e["not"])
+        else:
+            for hijo in e[op]:
+                recorrer(hijo)
+
+    recorrer(expr)
+    return vistos
+
+
+def hechos_soporte(expr) -> Optional[list[str]]:
+    """
+    Hechos de los que al menos uno debe ser verdadero para que la condición se cumpla.
+    Devuelve None cuando no hay tal garantía (p. ej. la condición contiene un 'not' suelto),
+    en cuyo caso la regla debe evaluarse siempre.
+    """
+    if isinstance(expr, str):
+        return [expr]
+    op = _operador(expr)
+    if op == "not":
+        return None
+    if op == "all":
+        # Basta con el soporte de cualquiera de los hijos: elegimos el más pequeño
+        mejores = [s for s in (hechos_soporte(h) for h in expr["all"]) if s is not None]
+        return min(mejores, key=len) if mejores else None
+    soporte: list[str] = []
+    for hijo in expr["any"]:
+        s = hechos_soporte(hijo)
+        if s is None:
+            return None
+        for nombre in s:
+            if nombre not in soporte:
+                soporte.append(nombre)
+    return soporte
+
+
+def compilar_condicion(expr) -> Callable[[dict], bool]:
+    """Compila una condición declarativa a un predicado `f(hechos: dict) -> bool`."""
+    validar_condicion(expr)
+    return _compilar(expr)
+
+
+def _compilar(expr) -> Callable[[dict], bool]:
+    if isinstance(expr, str):
+        nombre = expr
+        return lambda h: bool(h.get(nombre, False))
+    op = _operador(expr)
+    if op == "not":
+        interna = _compilar(expr["not"])
+        return lambda h: not interna(h)
+    hijos = expr[op]
+    if all(isinstance(hijo, str) for hijo in hijos):
+        # Caso frecuente: lista plana de hechos, se evita una llamada por hijo
+        nombres = tuple(hijos)
+        if op == "all":
+            def todos(h):
+                for n in nombres:
+                    if not h.get(n, False):
+                        return False
+                return True
+            return todos
+
+        def alguno(h):
+            for n in nombres:
+                if h.get(n, False):
+                    return True
+            return False
+        return alguno
+    predicados = tuple(_compilar(hijo) for hijo in hijos)
+    if op == "all":
+        return lambda h: all(p(h) for p in predicados)
+    return lambda h: any(p(h) for p in predicados)
+
+
+def compilar_condicion_mascara(expr, bits: dict[str, int] = BIT) -> Optional[Callable[[int], bool]]:
+    """
+    Compila la condición a un predicado sobre la máscara de hechos `f(mascara: int) -> bool`:
+    listas planas de hechos se reducen a `m & req == req` (all) o `m & alguno != 0` (any).
+    Devuelve None si la condición usa hechos sin bit asignado.
+    """
+    validar_condicion(expr)
+    if any(nombre not in bits for nombre in hechos_referenciados(expr)):
+        return None
+    return _compilar_mascara(expr, bits)
+
+
+def _compilar_mascara(expr, bits: dict[str, int]) -> Callable[[int], bool]:
+    if isinstance(expr, str):
+        bit = bits[expr]
+        return lambda m: m & bit != 0
+    op = _operador(expr)
+    if op == "not":
+        interna = _compilar_mascara(expr["not"], bits)
+        return lambda m: not interna(m)
+    hijos = expr[op]
+    if all(isinstance(hijo, str) for hijo in hijos):
+        requerida = 0
+        for hijo in hijos:
+            requerida |= bits[hijo]
+        if op == "all":
+            return lambda m: m & requerida == requerida
+        return lambda m: m & requerida != 0
+    predicados = tuple(_compilar_mascara(hijo, bits) for hijo in hijos)
+    if op == "all":
+        return lambda m: all(p(m) for p in predicados)
+    return lambda m: any(p(m) for p in predicados)
+
+
+def cargar_reglas(reglas: list) -> list:
+    """
+    Convierte reglas declarativas (condición bajo la clave "cuando") en reglas ejecutables:
+    cada regla resultante conserva sus datos y agrega
+    - "condicion": predicado compilado
+    - "hechos": hechos de soporte usados para indexarla (ausente si debe evaluarse siempre)
+    - "condicion_mascara": predicado sobre la máscara de bits (ausente si algún hecho no
+      tiene bit asignado; en ese caso el motor usa "condicion")
+    """
+    cargadas = []
+    for regla in reglas:
+        if "cuando" not in regla:
+            raise ValueError(f"La regla {regla.get('id')!r} no tiene condición 'cuando'")
+        try:
+            predicado = compilar_condicion(regla["cuando"])
+        except ValueError as e:
+            raise ValueError(f"Regla {regla.get('id')!r}: {e}") from e
+        cargada = dict(regla)
+        cargada["condicion"] = predicado
+        predicado_mascara = compilar_condicion_mascara(regla["cuando"])
+        if predicado_mascara is not None:
+            cargada["condicion_mascara"] = predicado_mascara
+        else:
+            cargada.pop("condicion_mascara", None)
+        soporte = hechos_soporte(regla["cuando"])
+        if soporte:
+            cargada["hechos"] = soporte
+        else:
+            cargada.pop("hechos", None)
+        cargadas.append(cargada)
+    return cargadas
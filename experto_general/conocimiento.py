@@ -0,0 +1,273 @@
+# experto_general/conocimiento.py
+
+# Base de conocimiento activa y su recarga en caliente.
+#
+# Una `Conocimiento` es una versión completa e inmutable de la base: reglas (ya compiladas),
+# reglas de hechos derivados, técnicos por categoría, tablas de soluciones y palabras clave.
+# La versión vigente se toma con BASE_ACTIVA.actual(); cada petición la toma una vez al
+# empezar y la usa hasta el final, así una recarga no la afecta a mitad de camino.
+#
+# Por defecto se usa la base integrada (base_conocimiento.py). Si la variable de entorno
+# EXPERTO_BASE_ARCHIVO apunta a un JSON, la base sale de ese archivo (las claves que falten
+# se toman de la integrada) y un hilo vigila sus cambios: al modificarse se carga y compila
+# la nueva versión en segundo plano y recién entonces se reemplaza la vigente (una sola
+# asignación). Si el archivo nuevo tiene errores se conserva la versión anterior.
+#
+# Las cachés derivadas usan `version` como clave de invalidación.
+#
+# Uso:
+#   python -m experto_general.conocimiento exportar base.json   (base vigente -> JSON)
+#   python -m experto_general.conocimiento validar base.json
+import copy
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from . import base_conocimiento as integrada
+from .compilador import compilar_reglas
+from .condiciones import cargar_reglas
+from .rete import RedRete
+from .texto import construir_automata
+
+logger = logging.getLogger(__name__)
+
+VARIABLE_ARCHIVO = "EXPERTO_BASE_ARCHIVO"
+INTERVALO_VIGILANCIA = 1.0
+
+# Claves del archivo y tipo esperado de cada una
+CLAVES = {
+    "reglas": list,
+    "reglas_derivadas": list,
+    "tecnicos": dict,
+    "solucion_por_regla": dict,
+    "solucion_por_categoria": dict,
+    "soluciones_por_regla": dict,
+    "soluciones_por_categoria": dict,
+    "palabras_clave": dict,
+}
+
+
+def datos_integrados() -> dict:
+    """La base integrada en base_conocimiento.py, en el formato del archivo externo."""
+    return {
+        "reglas": integrada.REGLAS_BASE,
+        "reglas_derivadas": integrada.REGLAS_DERIVADAS,
+        "tecnicos": integrada.MAPEO_TECNICOS,
+        "solucion_por_regla": integrada.SOLUCION_POR_REGLA,
+        "solucion_por_categoria": integrada.SOLUCION_POR_CATEGORIA,
+        "soluciones_por_regla": integrada.SOLUCIONES_POR_REGLA,
+        "soluciones_por_categoria": integrada.SOLUCIONES_POR_CATEGORIA,
+        "palabras_clave": integrada.PALABRAS_CLAVE,
+    }
+
+
+class Conocimiento:
+    """Una versión de la base de conocimiento, lista para usar. No se modifica después de creada."""
+
+    def __init__(self, datos: dict, version: int = 1, origen: str = "integrada", reglas: Optional[list] = None):
+        for clave, tipo in CLAVES.items():
+            if not isinstance(datos.get(clave), tipo):
+                raise ValueError(f"base de conocimiento: '{clave}' debe ser {tipo.__name__}")
+        self.datos = datos
+        self.reglas = reglas if reglas is not None else cargar_reglas(datos["reglas"])
+        # Red de encadenamiento (clasificación + hechos derivados), ver rete.py
+        self.red = RedRete(self.reglas, datos["reglas_derivadas"])
+        self.compilada = compilar_reglas(self.reglas, derivados=self.red.hechos_derivados)
+        self.tecnicos: dict = datos["tecnicos"]
+        self.solucion_por_regla: dict = datos["solucion_por_regla"]
+        self.solucion_por_categoria: dict = datos["solucion_por_categoria"]
+        self.soluciones_por_regla: dict = datos["soluciones_por_regla"]
+        self.soluciones_por_categoria: dict = datos["soluciones_por_categoria"]
+        self.automata = construir_automata(datos["palabras_clave"])
+        crudo = json.dumps(datos, sort_keys=True, ensure_ascii=False)
+        self.huella = hashlib.sha1(crudo.encode("utf-8")).hexdigest()[:12]
+        self.version = version
+        self.origen = origen
+        self.cargada = datetime.utcnow().isoformat()
+        # Análisis estático hecho al compilar (ver analisis.py)
+        self.analisis = self.compilada.analisis
+        for h in self.analisis["hallazgos"]:
+            logger.warning("Base %s, regla %s (posición %s): %s, %s %s",
+                           origen, h["regla"], h["posicion"], h["tipo"], h["detalle"], h["por"] or "")
+
+    @classmethod
+    def desde_archivo(cls, ruta: str, version: int = 1) -> "Conocimiento":
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        if not isinstance(datos, dict):
+            raise ValueError("base de conocimiento: se esperaba un objeto JSON")
+        desconocidas = set(datos) - set(CLAVES)
+        if desconocidas:
+            raise ValueError(f"base de conocimiento: claves desconocidas {sorted(desconocidas)}")
+        return cls({**datos_integrados(), **datos}, version=version, origen=os.path.abspath(ruta))
+
+    def con_version(self, version: int) -> "Conocimiento":
+        """Copia (superficial: comparte las estructuras compiladas) con otro número de versión."""
+        copia = copy.copy(self)
+        copia.version = version
+        return copia
+
+    def resumen(self) -> dict:
+        return {
+            "version": self.version,
+            "huella": self.huella,
+            "origen": self.origen,
+            "cargada": self.cargada,
+            "reglas": len(self.reglas),
+            "hallazgos": len(self.analisis["hallazgos"]),
+        }
+
+
+def _firma_archivo(ruta: str) -> Optional[tuple]:
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class BaseActiva:
+    """
+    Referencia a la versión vigente de la base, con recarga desde archivo.
+
+    - actual(): la versión vigente (leerla es una lectura de atributo, sin bloqueo).
+    - al_reemplazar(fn): `fn(nueva)` se llama antes de publicar cada versión nueva, para
+      preparar estructuras derivadas (p. ej. respuestas precalculadas) fuera del camino
+      de las peticiones.
+    - recargar(): relee el archivo; si cambió y es válido, publica una versión nueva.
+    - vigilar(): hilo que llama a recargar() cuando cambia la fecha o el tamaño del archivo.
+    """
+
+    def __init__(self, inicial: Conocimiento, ruta: Optional[str] = None):
+        self._actual = inicial
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._preparadores: list[Callable[[Conocimiento], None]] = []
+        self._firma = _firma_archivo(ruta) if ruta else None
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self.recargas = 0
+        self.errores = 0
+        self.ultimo_error: Optional[str] = None
+
+    def actual(self) -> Conocimiento:
+        return self._actual
+
+    def al_reemplazar(self, preparador: Callable[[Conocimiento], None]) -> None:
+        self._preparadores.append(preparador)
+
+    def reemplazar(self, nueva: Conocimiento) -> Conocimiento:
+        """Publica `nueva` como la versión siguiente a la vigente y devuelve la publicada."""
+        with self._lock:
+            publicada = self._publicar(nueva)
+        logger.info("Base de conocimiento v%s (%s) publicada", publicada.version, publicada.huella)
+        return publicada
+
+    def _publicar(self, nueva: Conocimiento) -> Conocimiento:
+        # Con self._lock tomado. `nueva` no se modifica: se publica una copia numerada
+        publicada = nueva.con_version(self._actual.version + 1)
+        for preparar in self._preparadores:
+            try:
+                preparar(publicada)
+            except Exception as e:
+                # Lo derivado se recalcula solo al notar el cambio de versión
+                logger.warning("Preparando la base v%s: %s", publicada.version, e)
+        # Publicación atómica: las peticiones en curso siguen con la versión que tomaron
+        self._actual = publicada
+        self.recargas += 1
+        return publicada
+
+    def recargar(self) -> bool:
+        """
+        Devuelve True si se publicó una versión nueva. La lectura, la comparación con la
+        vigente y el reemplazo se hacen con el lock tomado: dos recargas simultáneas del
+        mismo archivo publican una sola versión.
+        """
+        if not self.ruta:
+            return False
+        with self._lock:
+            self._firma = _firma_archivo(self.ruta)
+            try:
+                nueva = Conocimiento.desde_archivo(self.ruta)
+            except Exception as e:
+                self.errores += 1
+                self.ultimo_error = f"{type(e).__name__}: {e}"
+                logger.warning("No se pudo recargar %s; se mantiene la v%s: %s", self.ruta, self._actual.version, e)
+                return False
+            if nueva.huella == self._actual.huella:
+                return False
+            publicada = self._publicar(nueva)
+        logger.info("Base de conocimiento v%s (%s) publicada", publicada.version, publicada.huella)
+        return True
+
+    def vigilar(self, intervalo: float = INTERVALO_VIGILANCIA) -> None:
+        if not self.ruta or (self._hilo is not None and self._hilo.is_alive()):
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, args=(intervalo,), name="vigilar-base", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=5)
+
+    def _bucle(self, intervalo: float) -> None:
+        while not self._detener.wait(intervalo):
+            firma = _firma_archivo(self.ruta)
+            if firma is not None and firma != self._firma:
+                self.recargar()
+
+    def metricas(self) -> dict:
+        salida = self._actual.resumen()
+        salida.update({
+            "archivo": self.ruta,
+            "vigilando": bool(self._hilo and self._hilo.is_alive()),
+            "recargas": self.recargas,
+            "errores": self.errores,
+            "ultimo_error": self.ultimo_error,
+        })
+        return salida
+
+
+def _base_inicial() -> BaseActiva:
+    ruta = os.environ.get(VARIABLE_ARCHIVO)
+    if ruta:
+        # Un archivo configurado pero inválido es un error de arranque, no se ignora
+        return BaseActiva(Conocimiento.desde_archivo(ruta), ruta)
+    return BaseActiva(Conocimiento(datos_integrados(), reglas=integrada.REGLAS_CLASIFICACION))
+
+
+BASE_ACTIVA = _base_inicial()
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] not in ("exportar", "validar"):
+        print("Uso: python -m experto_general.conocimiento exportar|validar archivo.json", file=sys.stderr)
+        return 2
+    accion, ruta = argv
+    if accion == "exportar":
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(BASE_ACTIVA.actual().datos, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(json.dumps(BASE_ACTIVA.actual().resumen(), ensure_ascii=False), file=sys.stderr)
+        return 0
+    try:
+        base = Conocimiento.desde_archivo(ruta)
+    except Exception as e:
+        print(f"Inválida: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    for h in base.analisis["hallazgos"]:
+        print(json.dumps(h, ensure_ascii=False), file=sys.stderr)
+    print(json.dumps(base.resumen(), ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
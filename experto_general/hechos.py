@@ -0,0 +1,63 @@
+# experto_general/hechos.py
+
+# Codificación de los hechos (banderas booleanas del ticket) como una máscara de bits.
+# Cada bandera ocupa un bit fijo, así el vector de hechos completo es un único entero:
+# barato de comparar, hashear, registrar y agrupar.
+
+# Síntomas en el mismo orden que los campos de TicketFacts (main.py); el orden define
+# qué síntoma se considera "activo" cuando llegan varios. No se derivan del modelo porque
+# main.py importa este módulo; tests/test_hechos.py verifica que coincidan.
+SINTOMAS = (
+    "pc_no_enciende",
+    "periferico_roto",
+    "tarjeta_video_falla",
+    "ram_falla",
+    "disco_falla",
+    "monitor_sin_senal",
+    "psu_falla",
+    "sobrecalentamiento",
+    "no_puede_conectar_wifi",
+    "sin_acceso_internet",
+    "programa_se_cierra",
+    "lentitud_sistema",
+    "actualizaciones_fallidas",
+    "incompatibilidad_software",
+    "acceso_denegado",
+    "no_puede_instalar",
+    "email_sospechoso",
+    "software_corporativo_falla",
+    "malware_detectado",
+)
+
+# Todas las banderas codificadas: síntomas + 'otra_causa'
+BANDERAS = SINTOMAS + ("otra_causa",)
+
+BIT: dict[str, int] = {nombre: 1 << i for i, nombre in enumerate(BANDERAS)}
+
+MASCARA_SINTOMAS = (1 << len(SINTOMAS)) - 1
+BIT_OTRA_CAUSA = BIT["otra_causa"]
+
+
+def codificar_hechos(hechos: dict) -> int:
+    """Empaqueta las banderas verdaderas de `hechos` en un entero. Ignora claves desconocidas."""
+    mascara = 0
+    for nombre, bit in BIT.items():
+        if hechos.get(nombre):
+            mascara |= bit
+    return mascara
+
+
+def decodificar_hechos(mascara: int) -> dict:
+    """Inverso de `codificar_hechos`: dict con todas las banderas en True/False."""
+    return {nombre: bool(mascara & bit) for nombre, bit in BIT.items()}
+
+
+def sintomas_activos(mascara: int) -> list[str]:
+    """Nombres de los síntomas presentes en la máscara, en el orden de SINTOMAS."""
+    activos = []
+    m = mascara & MASCARA_SINTOMAS
+    while m:
+        bit = m & -m
+        activos.append(SINTOMAS[bit.bit_length() - 1])
+        m ^= bit
+    return activos
@@ -0,0 +1,199 @@
+# experto_general/lote.py
+
+# Clasificador por lotes fuera de línea (sin HTTP): recorre un archivo CSV/JSONL de hechos y
+# escribe una clasificación por fila, repartiendo el trabajo en un pool de procesos.
+#
+# Uso:
+#   python -m experto_general.lote entrada.jsonl salida.jsonl [--procesos N] [--bloque 5000]
+#
+# Entrada:
+#   - .jsonl: un objeto por línea con las banderas de TicketFacts (y opcional otra_descripcion).
+#   - .csv: encabezado con los nombres de las banderas; valores 1/0, true/false, si/no, x.
+# Salida:
+#   - .jsonl: la misma respuesta que /clasificar_ticket/ por fila, en el orden de entrada.
+#   - .csv: categoria, tecnico_responsable, sintoma, regla_id, solucion_sugerida.
+# Una fila inválida (JSON mal formado, una línea que no es un objeto, un valor de bandera
+# no reconocido) no detiene el proceso: en su lugar se escribe {"linea": n, "error": "..."}
+# (en CSV, categoria "(error)" y el mensaje en solucion_sugerida).
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+from .clasificador import clasificar_lote
+from .hechos import BIT
+
+VERDADEROS = {"1", "true", "t", "si", "sí", "s", "yes", "y", "x"}
+FALSOS = {"", "0", "false", "f", "no", "n"}
+
+COLUMNAS_CSV = ["categoria", "tecnico_responsable", "sintoma", "regla_id", "solucion_sugerida"]
+
+
+def _es_verdadero(nombre: str, valor) -> bool:
+    if valor is None or isinstance(valor, bool):
+        return bool(valor)
+    if isinstance(valor, int) and valor in (0, 1):
+        return bool(valor)
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto in VERDADEROS:
+            return True
+        if texto in FALSOS:
+            return False
+    raise ValueError(f"valor inválido para '{nombre}': {valor!r}")
+
+
+def fila_a_entrada(fila: dict) -> tuple[int, Optional[str]]:
+    """Convierte una fila (dict) en (mascara, otra_descripcion). ValueError si no es válida."""
+    if not isinstance(fila, dict):
+        raise ValueError(f"se esperaba un objeto JSON, no {type(fila).__name__}")
+    mascara = 0
+    for nombre, bit in BIT.items():
+        if _es_verdadero(nombre, fila.get(nombre)):
+            mascara |= bit
+    return mascara, (fila.get("otra_descripcion") or None)
+
+
+def _entrada_o_error(numero: int, leer) -> object:
+    """(mascara, otra_descripcion) de la fila, o {"linea", "error"} si no se puede leer."""
+    try:
+        return fila_a_entrada(leer())
+    except ValueError as e:  # json.JSONDecodeError incluida
+        return {"linea": numero, "error": f"{type(e).__name__}: {e}"}
+
+
+def leer_entradas(ruta: str) -> Iterator[object]:
+    """
+    Recorre el archivo de entrada sin cargarlo completo en memoria. Cada fila produce
+    (mascara, otra_descripcion) o, si es inválida, {"linea": n, "error": "..."}.
+    """
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            lector = csv.DictReader(f)
+            for fila in lector:
+                yield _entrada_o_error(lector.line_num, lambda: fila)
+        else:
+            for numero, linea in enumerate(f, 1):
+                if linea.strip():
+                    yield _entrada_o_error(numero, lambda: json.loads(linea))
+
+
+def _bloques(entradas: Iterator, tamano: int) -> Iterator[list]:
+    bloque = []
+    for entrada in entradas:
+        bloque.append(entrada)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def clasificar_bloque(bloque: list, formato: str = "jsonl") -> str:
+    """Clasifica un bloque de entradas y devuelve las líneas de salida ya formateadas."""
+    validas = iter(clasificar_lote([e for e in bloque if not isinstance(e, dict)]))
+    # Los errores de lectura quedan en su lugar, en el orden de entrada
+    respuestas = [e if isinstance(e, dict) else next(validas) for e in bloque]
+    if formato == "csv":
+        sio = io.StringIO()
+        writer = csv.writer(sio, lineterminator="\n")
+        for r in respuestas:
+            if "error" in r:
+                writer.writerow(["(error)", "", "", "", f"línea {r['linea']}: {r['error']}"])
+                continue
+            writer.writerow([
+                r.get("categoria") or "",
+                r.get("tecnico_responsable") or "",
+                r.get("sintoma") or "",
+                (r.get("explicacion") or {}).get("id") or "",
+                r.get("solucion_sugerida") or "",
+            ])
+        return sio.getvalue()
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in respuestas)
+
+
+def _errores(bloque: list) -> int:
+    return sum(1 for e in bloque if isinstance(e, dict))
+
+
+def clasificar_archivo(entrada: str, salida: str, procesos: Optional[int] = None, bloque: int = 5000,
+                       progreso=sys.stderr) -> dict:
+    """
+    Clasifica `entrada` y escribe `salida` conservando el orden de las filas.
+    Con procesos > 1 los bloques se reparten en un ProcessPoolExecutor, con a lo sumo
+    2 bloques pendientes por proceso para acotar la memoria.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    formato = "csv" if salida.lower().endswith(".csv") else "jsonl"
+    inicio = time.monotonic()
+    filas = 0
+    errores = 0
+    ultimo_reporte = inicio
+
+    def reportar(final: bool = False):
+        nonlocal ultimo_reporte
+        ahora = time.monotonic()
+        if progreso is None or (not final and ahora - ultimo_reporte < 1.0):
+            return
+        ultimo_reporte = ahora
+        transcurrido = max(ahora - inicio, 1e-9)
+        print(f"{filas} filas clasificadas ({filas / transcurrido:,.0f} filas/s)", file=progreso, flush=True)
+
+    with open(salida, "w", encoding="utf-8", newline="") as out:
+        if formato == "csv":
+            csv.writer(out, lineterminator="\n").writerow(COLUMNAS_CSV)
+        bloques = _bloques(leer_entradas(entrada), bloque)
+        if procesos <= 1:
+            for b in bloques:
+                out.write(clasificar_bloque(b, formato))
+                filas += len(b)
+                errores += _errores(b)
+                reportar()
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                pendientes: deque = deque()
+                for b in bloques:
+                    errores += _errores(b)
+                    pendientes.append((len(b), pool.submit(clasificar_bloque, b, formato)))
+                    while len(pendientes) >= 2 * procesos:
+                        n, fut = pendientes.popleft()
+                        out.write(fut.result())
+                        filas += n
+                        reportar()
+                while pendientes:
+                    n, fut = pendientes.popleft()
+                    out.write(fut.result())
+                    filas += n
+                    reportar()
+
+    reportar(final=True)
+    transcurrido = time.monotonic() - inicio
+    return {
+        "filas": filas,
+        "errores": errores,
+        "segundos": round(transcurrido, 3),
+        "filas_por_segundo": round(filas / transcurrido, 1) if transcurrido > 0 else None,
+        "procesos": procesos,
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Clasificación por lotes de tickets (CSV/JSONL).")
+    parser.add_argument("entrada", help="Archivo .csv o .jsonl con las banderas de cada ticket")
+    parser.add_argument("salida", help="Archivo de salida .jsonl o .csv")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto: núcleos de la máquina)")
+    parser.add_argument("--bloque", type=int, default=5000, help="Filas por bloque enviado a cada proceso")
+    args = parser.parse_args(argv)
+    resumen = clasificar_archivo(args.entrada, args.salida, procesos=args.procesos, bloque=args.bloque)
+    print(json.dumps(resumen, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
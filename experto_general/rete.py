@@ -0,0 +1,241 @@
+# experto_general/rete.py
+
+# Motor de encadenamiento hacia adelante con una red de discriminación al estilo Rete.
+#
+# Las condiciones de todas las reglas (de clasificación y de hechos derivados) se compilan
+# una sola vez en un grafo de nodos compartidos:
+#   - un nodo por hecho (memoria alfa: verdadero o no),
+#   - un nodo por subexpresión 'all' / 'any' / 'not'; subexpresiones iguales en varias
+#     reglas son el mismo nodo.
+# Cada nodo conoce a sus padres. Al afirmar un hecho sólo se recorren los nodos que
+# dependen de él: un 'all' cuenta cuántos hijos ya se cumplen, un 'any' se activa con el
+# primero. Cuando se activa la raíz de una regla, ésta dispara: si deriva un hecho, ese
+# hecho se afirma a su vez (y así sucesivamente); si clasifica, entra al conjunto de
+# conflicto, que se resuelve por prioridad (orden en la lista, como `motor_inferencia`).
+#
+# La negación sólo admite hechos base, que no cambian durante el encadenamiento: los 'not'
+# se evalúan una vez al cargar los hechos y el resultado es monótono (un hecho derivado
+# nunca se retracta), así el orden en que disparan las reglas no altera el resultado.
+from typing import Optional
+
+from .condiciones import compilar_condicion, hechos_referenciados, validar_condicion
+
+HECHO, TODOS, ALGUNO, NO = "hecho", "all", "any", "not"
+
+
+class RedRete:
+    """
+    Red compilada para una lista de reglas de clasificación (con "cuando" y "resultado") y
+    una de reglas derivadas (con "cuando" y "deriva"). Se construye una vez; cada consulta
+    crea su propia `MemoriaRete` con `evaluar`.
+    """
+
+    def __init__(self, reglas: list, derivadas: list = ()):
+        self.reglas = reglas
+        self.derivadas = list(derivadas)
+        self.tipo: list[str] = []
+        self.requeridos: list[int] = []
+        self.padres: list[list[int]] = []
+        self.predicado: dict[int, object] = {}
+        self.nodo_hecho: dict[str, int] = {}
+        self._claves: dict[tuple, int] = {}
+        # nodo raíz -> reglas que disparan al activarse: (True, pos) clasifica, (False, pos) deriva
+        self.terminales: dict[int, list[tuple[bool, int]]] = {}
+        # hechos base que aparecen dentro de algún 'not'
+        self.hechos_negados: set[str] = set()
+
+        self.hechos_derivados = {}
+        for pos, regla in enumerate(self.derivadas):
+            nombre = regla.get("deriva")
+            if not isinstance(nombre, str) or not nombre:
+                raise ValueError(f"Regla derivada {regla.get('id')!r}: falta 'deriva'")
+            self.hechos_derivados.setdefault(nombre, pos)
+        for pos, regla in enumerate(self.reglas):
+            self._agregar_regla(regla, (True, pos))
+        for pos, regla in enumerate(self.derivadas):
+            self._agregar_regla(regla, (False, pos))
+
+    # --- Construcción ---
+
+    def _agregar_regla(self, regla: dict, terminal: tuple[bool, int]) -> None:
+        if "cuando" not in regla:
+            raise ValueError(f"La regla {regla.get('id')!r} no tiene condición 'cuando'")
+        try:
+            validar_condicion(regla["cuando"])
+            raiz = self._nodo(regla["cuando"])
+        except ValueError as e:
+            raise ValueError(f"Regla {regla.get('id')!r}: {e}") from e
+        self.terminales.setdefault(raiz, []).append(terminal)
+
+    def _nuevo(self, clave: tuple, tipo: str, hijos: list[int]) -> int:
+        nodo = self._claves.get(clave)
+        if nodo is not None:
+            return nodo
+        nodo = len(self.tipo)
+        self._claves[clave] = nodo
+        self.tipo.append(tipo)
+        self.padres.append([])
+        self.requeridos.append(len(hijos))
+        for hijo in hijos:
+            self.padres[hijo].append(nodo)
+        return nodo
+
+    def _nodo(self, expr) -> int:
+        if isinstance(expr, str):
+            nodo = self._nuevo((HECHO, expr), HECHO, [])
+            self.nodo_hecho[expr] = nodo
+            return nodo
+        op = next(iter(expr))  # ya validada
+        if op == NO:
+            derivados = [h for h in hechos_referenciados(expr[NO]) if h in self.hechos_derivados]
+            if derivados:
+                raise ValueError(f"la negación sólo admite hechos base, no derivados {derivados}")
+            clave = (NO, repr(expr[NO]))
+            nodo = self._claves.get(clave)
+            if nodo is None:
+                nodo = self._nuevo(clave, NO, [])
+                self.predicado[nodo] = compilar_condicion(expr[NO])
+                self.hechos_negados.update(hechos_referenciados(expr[NO]))
+            return nodo
+        hijos = sorted({self._nodo(hijo) for hijo in expr[op]})
+        if len(hijos) == 1:
+            return hijos[0]
+        return self._nuevo((op, tuple(hijos)), op, hijos)
+
+    # --- Consulta ---
+
+    def evaluar(self, hechos: dict) -> "MemoriaRete":
+        """Memoria de trabajo con los hechos base verdaderos de `hechos`, ya encadenada."""
+        return MemoriaRete(self, hechos)
+
+    def metricas(self) -> dict:
+        return {
+            "reglas": len(self.reglas),
+            "derivadas": len(self.derivadas),
+            "nodos": len(self.tipo),
+            "hechos": len(self.nodo_hecho),
+            "negaciones": len(self.predicado),
+        }
+
+
+class MemoriaRete:
+    """
+    Estado de una consulta sobre una `RedRete`: nodos activos, contadores de los 'all',
+    hechos derivados (con la regla que los produjo) y reglas de clasificación disparadas.
+    """
+
+    def __init__(self, red: RedRete, hechos: dict):
+        self.red = red
+        self._cargar(hechos)
+
+    def _cargar(self, hechos: dict) -> None:
+        red = self.red
+        self.base = {nombre: True for nombre, valor in hechos.items() if valor}
+        self.activos: set[int] = set()
+        self._cuenta: dict[int, int] = {}
+        # hecho derivado -> posición de la regla que lo derivó (en orden de derivación)
+        self.justificacion: dict[str, int] = {}
+        # posiciones de las reglas de clasificación disparadas (orden de disparo)
+        self.disparadas: list[int] = []
+        for nodo, predicado in red.predicado.items():
+            if not predicado(self.base):
+                self._propagar(nodo)
+        for nombre in self.base:
+            nodo = red.nodo_hecho.get(nombre)
+            if nodo is not None:
+                self._propagar(nodo)
+
+    def _propagar(self, inicial: int) -> None:
+        red = self.red
+        tipo, requeridos, padres, activos, cuenta = red.tipo, red.requeridos, red.padres, self.activos, self._cuenta
+        pendientes = [inicial]
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo in activos:
+                continue
+            activos.add(nodo)
+            for padre in padres[nodo]:
+                if padre in activos:
+                    continue
+                if tipo[padre] == TODOS:
+                    n = cuenta.get(padre, 0) + 1
+                    cuenta[padre] = n
+                    if n < requeridos[padre]:
+                        continue
+                pendientes.append(padre)
+            for clasifica, pos in red.terminales.get(nodo, ()):
+                if clasifica:
+                    self.disparadas.append(pos)
+                    continue
+                nombre = red.derivadas[pos]["deriva"]
+                if nombre in self.justificacion or nombre in self.base:
+                    continue
+                self.justificacion[nombre] = pos
+                nodo_hecho = red.nodo_hecho.get(nombre)
+                if nodo_hecho is not None:
+                    pendientes.append(nodo_hecho)
+
+    def afirmar(self, hecho: str) -> None:
+        """
+        Agrega un hecho base verdadero y encadena sólo lo que depende de él. Si el hecho
+        aparece negado en alguna regla, la memoria se recalcula completa (una negación
+        activa no se retracta de forma incremental).
+        """
+        if hecho in self.base:
+            return
+        if hecho in self.red.hechos_negados:
+            self._cargar(dict(self.base, **{hecho: True}))
+            return
+        self.base[hecho] = True
+        nodo = self.red.nodo_hecho.get(hecho)
+        if nodo is not None:
+            self._propagar(nodo)
+
+    # --- Resultados ---
+
+    def clasificacion(self) -> Optional[dict]:
+        """Regla de clasificación de mayor prioridad entre las disparadas (o None)."""
+        if not self.disparadas:
+            return None
+        return self.red.reglas[min(self.disparadas)]
+
+    def coincidencias(self) -> list[dict]:
+        """Todas las reglas de clasificación disparadas, en orden de prioridad."""
+        return [self.red.reglas[pos] for pos in sorted(set(self.disparadas))]
+
+    def verdadero(self, hecho: str) -> bool:
+        return hecho in self.base or hecho in self.justificacion
+
+    def _paso(self, nombre: str) -> dict:
+        regla = self.red.derivadas[self.justificacion[nombre]]
+        return {
+            "hecho": nombre,
+            "id": regla.get("id"),
+            "titulo": regla.get("titulo"),
+            "descripcion": regla.get("descripcion"),
+            "desde": [h for h in hechos_referenciados(regla["cuando"]) if self.verdadero(h)],
+        }
+
+    def derivados(self) -> list[dict]:
+        """Hechos derivados, en el orden en que se derivaron, con la regla y los hechos usados."""
+        return [self._paso(nombre) for nombre in self.justificacion]
+
+    def cadena(self, regla: Optional[dict]) -> list[dict]:
+        """
+        Pasos de derivación que llevaron a `regla`: los hechos derivados que usa su condición
+        y, recursivamente, los de las reglas que los derivaron. Primero los más básicos.
+        """
+        if regla is None:
+            return []
+        salida: list[dict] = []
+        vistos: set[str] = set()
+
+        def visitar(expr) -> None:
+            for nombre in hechos_referenciados(expr):
+                if nombre in self.justificacion and nombre not in vistos:
+                    vistos.add(nombre)
+                    visitar(self.red.derivadas[self.justificacion[nombre]]["cuando"])
+                    salida.append(self._paso(nombre))
+
+        visitar(regla["cuando"])
+        return salida
@@ -0,0 +1,114 @@
+# experto_general/sesiones.py
+
+# Sesiones del asistente paso a paso guardadas en el servidor. Al iniciar se evalúa la base
+# una sola vez (ranking completo de reglas, ver acciones.ranking_reglas) y se guarda junto
+# con la posición actual; cada paso siguiente sólo avanza un índice.
+#
+# Las sesiones viven en memoria en una CacheTTL: acotada (LRU) y con vencimiento por
+# inactividad. Una sesión vencida o desalojada simplemente deja de existir; el cliente
+# puede iniciar otra.
+import secrets
+import threading
+from typing import Optional
+
+from .acciones import ranking_reglas, resultado_sin_coincidencia
+from .cache import CacheTTL
+from .compilador import BaseCompilada
+from .conocimiento import BASE_ACTIVA
+
+CAPACIDAD_SESIONES = 10000
+TTL_SESIONES = 30 * 60
+
+ACCIONES = ("siguiente", "funciono")
+
+
+class SesionesAsistente:
+    """
+    Sesiones del asistente. Por defecto cada sesión usa la base vigente al iniciarla; con
+    `compilada` (p. ej. una base de prueba) todas usan esa base ya compilada.
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD_SESIONES, ttl: float = TTL_SESIONES,
+                 compilada: Optional[BaseCompilada] = None):
+        self.cache = CacheTTL(capacidad, ttl)
+        self.compilada = compilada
+        self._lock = threading.Lock()
+        self.iniciadas = 0
+        self.resueltas = 0
+        self.agotadas = 0
+
+    def iniciar(self, hechos: dict) -> tuple[str, dict]:
+        """Crea la sesión y devuelve (id, estado) con el primer paso ya calculado."""
+        # Las vencidas están al principio del orden LRU: limpiarlas cuesta O(vencidas)
+        self.cache.purgar_vencidas()
+        # La sesión completa usa la versión de la base vigente al iniciarla
+        base = BASE_ACTIVA.actual()
+        estado = {
+            "hechos": hechos,
+            "base": base,
+            "ranking": ranking_reglas(hechos, compilada=self.compilada) if self.compilada is not None
+            else ranking_reglas(hechos, base=base),
+            "pos": 0,
+        }
+        sesion_id = secrets.token_urlsafe(16)
+        self.cache.guardar(sesion_id, estado)
+        with self._lock:
+            self.iniciadas += 1
+        return sesion_id, estado
+
+    def obtener(self, sesion_id: str) -> Optional[dict]:
+        return self.cache.obtener(sesion_id)
+
+    def avanzar(self, sesion_id: str, accion: str) -> Optional[dict]:
+        """
+        Aplica la acción a la sesión y devuelve su estado (None si no existe o venció).
+        - "siguiente": la solución actual no funcionó, pasar a la próxima regla.
+        - "funciono": la solución actual resolvió el problema; la sesión se cierra.
+        """
+        if accion not in ACCIONES:
+            raise ValueError(f"acción desconocida {accion!r}; se esperaba una de {ACCIONES}")
+        estado = self.cache.obtener(sesion_id)
+        if estado is None:
+            return None
+        if accion == "funciono":
+            self.cache.eliminar(sesion_id)
+            with self._lock:
+                self.resueltas += 1
+            return estado
+        with self._lock:
+            if estado["pos"] < len(estado["ranking"]):
+                estado["pos"] += 1
+                if estado["pos"] == len(estado["ranking"]):
+                    self.agotadas += 1
+        return estado
+
+    @staticmethod
+    def paso_actual(estado: dict) -> dict:
+        """Resultado del motor para la posición actual (o el de 'sin coincidencias')."""
+        ranking, pos = estado["ranking"], estado["pos"]
+        if pos < len(ranking):
+            return ranking[pos]
+        return resultado_sin_coincidencia()
+
+    @staticmethod
+    def historial(estado: dict) -> list[str]:
+        """Ids de las reglas ya ofrecidas antes del paso actual."""
+        return [paso["regla_id"] for paso in estado["ranking"][:estado["pos"]]]
+
+    def metricas(self) -> dict:
+        self.cache.purgar_vencidas()
+        cache = self.cache.metricas()
+        return {
+            "activas": cache["entradas"],
+            "capacidad": cache["capacidad"],
+            "ttl": cache["ttl"],
+            "iniciadas": self.iniciadas,
+            "resueltas": self.resueltas,
+            "agotadas": self.agotadas,
+            "vencidas": cache["vencidas"],
+            "desalojadas": cache["evicciones"],
+            "no_encontradas": cache["fallos"],
+        }
+
+
+SESIONES_ASISTENTE = SesionesAsistente()
@@ -0,0 +1,116 @@
+# experto_general/texto.py
+
+# Texto libre -> hechos. Las listas de palabras clave por hecho (PALABRAS_CLAVE en
+# base_conocimiento.py) se compilan una vez en un autómata de Aho-Corasick; el texto del
+# ticket se recorre en una sola pasada, carácter a carácter, y cada frase encontrada activa
+# el bit de su hecho. El costo es lineal en el largo del texto, sin importar cuántas frases
+# haya en las listas.
+#
+# Texto y frases se normalizan igual (minúsculas, sin acentos ni signos, palabras separadas
+# por un espacio) y se rodean de espacios, así una frase sólo coincide con palabras
+# completas; un '*' final en la frase la convierte en prefijo ("imprim*").
+import re
+import unicodedata
+from typing import Optional
+
+from .base_conocimiento import PALABRAS_CLAVE
+from .hechos import BIT
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Minúsculas, sin acentos ni signos; las palabras quedan separadas por un espacio."""
+    if not texto:
+        return ""
+    sin_acentos = "".join(
+        c for c in unicodedata.normalize("NFKD", texto.lower()) if not unicodedata.combining(c)
+    )
+    return " ".join(re.findall(r"[^\W\d_]+", sin_acentos))
+
+
+class Automata:
+    """
+    Autómata de Aho-Corasick sobre caracteres. `patrones` es una lista de (cadena, dato);
+    `buscar` devuelve los datos de todos los patrones presentes en el texto.
+    """
+
+    def __init__(self, patrones: list[tuple[str, object]]):
+        self.transiciones: list[dict[str, int]] = [{}]
+        self.salidas: list[list] = [[]]
+        for cadena, dato in patrones:
+            estado = 0
+            for c in cadena:
+                siguiente = self.transiciones[estado].get(c)
+                if siguiente is None:
+                    siguiente = len(self.transiciones)
+                    self.transiciones[estado][c] = siguiente
+                    self.transiciones.append({})
+                    self.salidas.append([])
+                estado = siguiente
+            self.salidas[estado].append(dato)
+        self._enlazar()
+
+    def _enlazar(self) -> None:
+        # Enlaces de falla por BFS; cada estado hereda las salidas de su enlace de falla
+        self.falla = [0] * len(self.transiciones)
+        cola = list(self.transiciones[0].values())
+        i = 0
+        while i < len(cola):
+            estado = cola[i]
+            i += 1
+            for c, hijo in self.transiciones[estado].items():
+                cola.append(hijo)
+                f = self.falla[estado]
+                while f and c not in self.transiciones[f]:
+                    f = self.falla[f]
+                destino = self.transiciones[f].get(c, 0)
+                self.falla[hijo] = destino if destino != hijo else 0
+                self.salidas[hijo] = self.salidas[hijo] + self.salidas[self.falla[hijo]]
+
+    def buscar(self, texto: str) -> list:
+        transiciones, falla, salidas = self.transiciones, self.falla, self.salidas
+        encontrados = []
+        estado = 0
+        for c in texto:
+            while estado and c not in transiciones[estado]:
+                estado = falla[estado]
+            estado = transiciones[estado].get(c, 0)
+            if salidas[estado]:
+                encontrados.extend(salidas[estado])
+        return encontrados
+
+
+def _patron(frase: str) -> str:
+    prefijo = frase.endswith("*")
+    cuerpo = normalizar_texto(frase.rstrip("*"))
+    return " " + cuerpo if prefijo else " " + cuerpo + " "
+
+
+def construir_automata(palabras_clave: dict = PALABRAS_CLAVE) -> Automata:
+    """Compila {hecho: [frases]} en un autómata; cada patrón lleva (hecho, frase)."""
+    patrones = []
+    for hecho, frases in palabras_clave.items():
+        if hecho not in BIT:
+            raise ValueError(f"PALABRAS_CLAVE: hecho desconocido {hecho!r}")
+        for frase in frases:
+            if normalizar_texto(frase.rstrip("*")):
+                patrones.append((_patron(frase), (hecho, frase)))
+    return Automata(patrones)
+
+
+AUTOMATA_HECHOS = construir_automata()
+
+
+def extraer_hechos(texto: Optional[str], automata: Automata = AUTOMATA_HECHOS) -> tuple[int, list[dict]]:
+    """
+    Devuelve (máscara de hechos, coincidencias) para el texto. Las coincidencias son
+    {"hecho", "frase"}, sin repetir, en el orden en que aparecen en el texto.
+    """
+    mascara = 0
+    coincidencias = []
+    vistas = set()
+    for hecho, frase in automata.buscar(" " + normalizar_texto(texto) + " "):
+        mascara |= BIT[hecho]
+        if (hecho, frase) not in vistas:
+            vistas.add((hecho, frase))
+            coincidencias.append({"hecho": hecho, "frase": frase})
+    return mascara, coincidencias
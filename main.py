@@ -1,21 +1,63 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, Response
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, Response, StreamingResponse, FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, ValidationError
 from typing import Optional
 import json
 import os
-import sqlite3
 from datetime import datetime
 import io
 import csv
+import html
 # 1. IMPORTACIÓN: Importar la Base de Conocimiento
-from experto_general.base_conocimiento import REGLAS_CLASIFICACION, MAPEO_TECNICOS 
-from experto_general.acciones import motor_inferencia, sugerir_tecnico, obtener_solucion_sugerida
-from experto_general.acciones import motor_inferencia, sugerir_tecnico, obtener_solucion_sugerida, motor_inferencia_iterativo, obtener_soluciones_sugeridas
+from experto_general.acciones import sugerir_tecnico, motor_inferencia_iterativo, ranking_reglas, CACHE_RANKING
+from experto_general.clasificador import clasificar_mascara, clasificar_lote, codificar_json, CACHE_RESPUESTAS, TABLA_RESPUESTAS
+from experto_general.clasificador import respuesta_para_regla, con_descripcion
+from experto_general.hechos import codificar_hechos, decodificar_hechos, sintomas_activos, BIT_OTRA_CAUSA
+from experto_general.texto import extraer_hechos
+from experto_general.sesiones import SESIONES_ASISTENTE
+from experto_general.conocimiento import BASE_ACTIVA
 from typing import Optional, List
+from contextlib import asynccontextmanager
+from persistencia.registro import EscritorConsultas, AnexarJSONL
+from persistencia.consultas_db import ConsultasDB
+from persistencia.agregados import Agregados
+from persistencia.tail import ultimas_consultas
+from persistencia.columnar import exportar_dias_cerrados, leer_encabezado
+from persistencia.sqlite_pool import PoolSQLite
+from persistencia.grupo_commit import InsercionAgrupada
+from persistencia.nuevos_sintomas import NuevosSintomasDB, SQL_INSERTAR
+import asyncio
+from persistencia.archivos import listar_archivos_consultas, archivo_existente, compactar_dias_cerrados, directorio_datos
+import re
+import threading
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arranque: hilo escritor del log de consultas
+    ESCRITOR_CONSULTAS.iniciar()
+    INSERCION_SINTOMAS.iniciar()
+    # Mantenimiento en segundo plano: índice SQLite, exportación columnar y compactación,
+    # al arrancar y luego cada INTERVALO_MANTENIMIENTO segundos
+    FIN_MANTENIMIENTO.clear()
+    mantenimiento = threading.Thread(target=_bucle_mantenimiento, name="mantenimiento-consultas", daemon=True)
+    mantenimiento.start()
+    # Recarga en caliente de la base de conocimiento (sólo si viene de EXPERTO_BASE_ARCHIVO)
+    BASE_ACTIVA.vigilar()
+    yield
+    BASE_ACTIVA.detener()
+    FIN_MANTENIMIENTO.set()
+    mantenimiento.join(timeout=5.0)
+    # Apagado: volcar los registros pendientes antes de salir
+    ESCRITOR_CONSULTAS.detener()
+    INSERCION_SINTOMAS.detener()
+    POOL_DB.cerrar()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS - CRÍTICO para conectar el frontend
 # CORS: para desarrollo local
@@ -60,6 +102,15 @@ class NuevoSintomaInput(BaseModel):
     otra_descripcion: Optional[str] = None
 
 
+class AccionSesionInput(BaseModel):
+    # "siguiente": la solución no funcionó; "funciono": cierra la sesión
+    accion: str = "siguiente"
+
+
+class ClasificarTextoInput(BaseModel):
+    texto: str
+
+
 class ClasificarIterativoInput(BaseModel):
     facts: TicketFacts
     historial: Optional[List[str]] = None
@@ -70,90 +121,299 @@ async def root():
 
 @app.post("/clasificar_ticket/")
 async def clasificar_ticket(facts: TicketFacts):
-    # Convertir el objeto Pydantic a diccionario para ser evaluado por las lambdas
+    # Convertir el objeto Pydantic a diccionario
     # Pydantic v2: use model_dump() instead of deprecated dict()
     facts_dict = facts.model_dump()
-    
-    # 2. INFERENCIA: usar motor_inferencia (encadenamiento hacia adelante)
-    # Determinar sintoma activo (diseño del frontend: solo uno debe ser True)
-    sintoma_activo = None
-    sintomas_ignorar = {"otra_causa", "otra_descripcion"}
-    for k, v in facts_dict.items():
-        if k in sintomas_ignorar:
-            continue
-        if isinstance(v, bool) and v:
-            sintoma_activo = k
-            break
+    # Vector de hechos empaquetado en un entero (ver experto_general/hechos.py)
+    mascara = codificar_hechos(facts_dict)
+    # Versión de la base para toda la petición, aunque se recargue mientras tanto
+    base = BASE_ACTIVA.actual()
 
-    if not sintoma_activo:
-        clasificacion_final = "Sin clasificar (General)"
-        regla_usada = None
+    # 2. INFERENCIA + 3. ASIGNACIÓN: motor_inferencia, técnico y sugerencias.
+    # Entradas de un solo síntoma: respuesta precalculada al arrancar, con el JSON ya codificado.
+    # El resto se responde desde la caché de resultados o con inferencia en vivo.
+    precalculada = None if facts_dict.get("otra_descripcion") else TABLA_RESPUESTAS.obtener(mascara, base)
+    if precalculada is not None:
+        response, cuerpo = precalculada
     else:
-        clasificacion_final, regla_usada = motor_inferencia(facts_dict, REGLAS_CLASIFICACION)
+        response, cuerpo = clasificar_mascara(mascara, facts_dict.get("otra_descripcion"), base), None
 
-    # 3. ASIGNACIÓN: Usar el mapeo para determinar el técnico responsable
-    # Nueva lógica: sólo priorizar "Otra causa" si no hubo coincidencia de regla/síntoma
-    # para evitar que una marca accidental de la casilla opaque una clasificación válida.
-    # Priorizar siempre 'Otra causa' si el usuario lo marcó explícitamente
-    if facts_dict.get("otra_causa"):
-        tecnico_sugerido = "Técnico en línea (Soporte Remoto)"
-        clasificacion_final = "Otra causa"
-    else:
-        tecnico_sugerido = sugerir_tecnico(clasificacion_final)
+    # Registrar consulta realizada para retroalimentación futura
+    _registrar_consultas([_consulta_record(facts_dict, mascara, response)])
 
-    response = {
-        "categoria": clasificacion_final,
-        "tecnico_responsable": tecnico_sugerido,
-        "sintoma": sintoma_activo if sintoma_activo else "Ninguno"
+    if cuerpo is not None:
+        return Response(content=cuerpo, media_type="application/json")
+    return response
+
+
+@app.post("/clasificar_ticket/encadenado")
+async def clasificar_ticket_encadenado(facts: TicketFacts):
+    """
+    Igual que /clasificar_ticket/, pero con el motor de encadenamiento hacia adelante
+    (experto_general/rete.py). Agrega 'hechos_derivados' (conclusiones intermedias, cada una
+    con la regla y los hechos que la produjeron) y, en 'explicacion', la 'cadena' de
+    derivaciones que usó la regla ganadora.
+    """
+    facts_dict = facts.model_dump()
+    mascara = codificar_hechos(facts_dict)
+    base = BASE_ACTIVA.actual()
+    memoria = base.red.evaluar(facts_dict)
+    regla = memoria.clasificacion()
+    response = con_descripcion(respuesta_para_regla(mascara, regla, base), facts_dict.get("otra_descripcion"))
+    # La regla no se informa si no hay síntomas (igual que el flujo clásico)
+    usada = regla if response["explicacion"]["id"] is not None else None
+    response["explicacion"]["cadena"] = memoria.cadena(usada)
+    response["hechos_derivados"] = memoria.derivados()
+
+    _registrar_consultas([_consulta_record(facts_dict, mascara, response)])
+    return response
+
+
+def _consulta_record(facts_dict: dict, mascara: int, response: dict) -> dict:
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "facts": facts_dict,
+        "mascara": mascara,
+        "resultado": {
+            "categoria": response.get("categoria"),
+            "tecnico_responsable": response.get("tecnico_responsable"),
+            "sintoma": response.get("sintoma"),
+            "regla_id": (response.get("explicacion") or {}).get("id"),
+        },
     }
 
-    # Incluir la descripción si fue enviada
-    if facts_dict.get("otra_descripcion"):
-        response["otra_descripcion"] = facts_dict.get("otra_descripcion")
-
-    # Añadir explicación (metadatos legibles de la regla usada)
-    if regla_usada:
-        response["explicacion"] = {
-            "id": regla_usada.get("id"),
-            "titulo": regla_usada.get("titulo"),
-            "descripcion": regla_usada.get("descripcion"),
-            "solucion_regla": regla_usada.get("solucion"),
-        }
-    else:
-        response["explicacion"] = {"id": None, "titulo": None, "descripcion": "Ninguna regla coincidió", "solucion_regla": None}
 
-    regla_id_for_suggestion = None
-    try:
-        regla_id_for_suggestion = (response.get("explicacion") or {}).get("id")
-    except Exception:
-        regla_id_for_suggestion = None
-    # Dos sugerencias (y compatibilidad con campo anterior)
-    soluciones_sug = obtener_soluciones_sugeridas(response.get("categoria"), regla_id_for_suggestion) if response.get("categoria") else []
-    response["soluciones_sugeridas"] = soluciones_sug
-    response["solucion_sugerida"] = soluciones_sug[0] if soluciones_sug else None
+def _registrar_consultas(records: list[dict]) -> None:
+    """
+    Encola los registros para el escritor en segundo plano (no hace I/O en el handler).
+    El escritor los agrupa y los anexa al archivo de consultas del día.
+    """
+    if records:
+        ESCRITOR_CONSULTAS.encolar_muchos(records)
 
-    # Registrar consulta realizada para retroalimentación futura
+
+def _parse_facts_batch(body: bytes, content_type: str) -> list:
+    """
+    Interpreta el cuerpo de /clasificar_ticket/batch: un array JSON de TicketFacts o
+    NDJSON (un objeto por línea). Devuelve una lista de objetos crudos, en orden.
+    """
+    text = body.decode("utf-8").strip()
+    if "ndjson" in content_type or not text.startswith("["):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("Se esperaba un array de tickets")
+    return data
+
+
+@app.post("/clasificar_ticket/batch")
+async def clasificar_ticket_batch(req: Request):
+    """
+    Clasificación en lote para importaciones masivas.
+
+    Cuerpo: array JSON de TicketFacts, o NDJSON (Content-Type: application/x-ndjson).
+    Devuelve {"items": [...], "total": n} en el mismo orden de entrada; cada item es la
+    misma respuesta que /clasificar_ticket/, o {"error": ...} si ese ticket no es válido.
+    Las consultas se registran con una única escritura agrupada.
+    """
     try:
-        consulta_record = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "facts": facts_dict,
-            "resultado": {
-                "categoria": response.get("categoria"),
-                "tecnico_responsable": response.get("tecnico_responsable"),
-                "sintoma": response.get("sintoma"),
-                "regla_id": (response.get("explicacion") or {}).get("id"),
-            },
-        }
-        consultas_path = get_consultas_file_today()
-        with open(consultas_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(consulta_record, ensure_ascii=False) + "\n")
-    except Exception:
-        # No interrumpir el flujo principal si falla el guardado
-        pass
+        raw_items = _parse_facts_batch(await req.body(), req.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        return {"error": str(e)}
+
+    items: list[Optional[dict]] = [None] * len(raw_items)
+    validos = []  # (posición, facts_dict, mascara)
+    for i, obj in enumerate(raw_items):
+        try:
+            facts_dict = TicketFacts.model_validate(obj).model_dump()
+        except ValidationError as e:
+            items[i] = {"error": e.errors(include_url=False, include_context=False)}
+            continue
+        validos.append((i, facts_dict, codificar_hechos(facts_dict)))
+
+    # Una sola pasada de inferencia: cada máscara distinta se resuelve una vez
+    respuestas = clasificar_lote([(m, f.get("otra_descripcion")) for _, f, m in validos], BASE_ACTIVA.actual())
+
+    records = []
+    for (i, facts_dict, mascara), response in zip(validos, respuestas):
+        items[i] = response
+        records.append(_consulta_record(facts_dict, mascara, response))
+    _registrar_consultas(records)
+
+    return {"items": items, "total": len(items)}
 
+
+# --- Clasificación desde texto libre ---
+
+def _entrada_desde_texto(texto: str, base) -> tuple[dict, int, list[dict]]:
+    """
+    Hechos detectados en el texto (ver experto_general/texto.py). Si no se reconoce ningún
+    síntoma, el ticket va como 'Otra causa' con el texto como descripción.
+    """
+    mascara, coincidencias = extraer_hechos(texto, base.automata)
+    if not mascara:
+        mascara = BIT_OTRA_CAUSA
+    facts_dict = decodificar_hechos(mascara)
+    facts_dict["otra_descripcion"] = texto if mascara == BIT_OTRA_CAUSA else None
+    return facts_dict, mascara, coincidencias
+
+
+def _con_hechos_detectados(response: dict, mascara: int, coincidencias: list[dict]) -> dict:
+    response = dict(response)
+    response["hechos_detectados"] = sintomas_activos(mascara)
+    response["coincidencias"] = coincidencias
     return response
 
 
+@app.post("/clasificar_texto/")
+async def clasificar_texto(payload: ClasificarTextoInput):
+    """
+    Clasifica un ticket escrito en texto libre: las palabras clave activan los hechos y se
+    responde igual que /clasificar_ticket/, más 'hechos_detectados' y 'coincidencias'.
+    """
+    base = BASE_ACTIVA.actual()
+    facts_dict, mascara, coincidencias = _entrada_desde_texto(payload.texto, base)
+    response = clasificar_mascara(mascara, facts_dict.get("otra_descripcion"), base)
+    _registrar_consultas([_consulta_record(facts_dict, mascara, response)])
+    return _con_hechos_detectados(response, mascara, coincidencias)
+
+
+@app.post("/clasificar_texto/batch")
+async def clasificar_texto_batch(req: Request):
+    """
+    Versión en lote de /clasificar_texto/. Cuerpo: array JSON o NDJSON; cada elemento es
+    un texto o un objeto {"texto": ...}. Devuelve {"items": [...], "total": n} en orden.
+    """
+    try:
+        raw_items = _parse_facts_batch(await req.body(), req.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        return {"error": str(e)}
+
+    base = BASE_ACTIVA.actual()
+    items: list[Optional[dict]] = [None] * len(raw_items)
+    validos = []  # (posición, facts_dict, mascara, coincidencias)
+    for i, obj in enumerate(raw_items):
+        texto = obj.get("texto") if isinstance(obj, dict) else obj
+        if not isinstance(texto, str):
+            items[i] = {"error": "Se esperaba un texto o un objeto con 'texto'"}
+            continue
+        validos.append((i, *_entrada_desde_texto(texto, base)))
+
+    respuestas = clasificar_lote([(m, f.get("otra_descripcion")) for _, f, m, _ in validos], base)
+
+    records = []
+    for (i, facts_dict, mascara, coincidencias), response in zip(validos, respuestas):
+        items[i] = _con_hechos_detectados(response, mascara, coincidencias)
+        records.append(_consulta_record(facts_dict, mascara, response))
+    _registrar_consultas(records)
+
+    return {"items": items, "total": len(items)}
+
+
+# Tamaño máximo de una línea NDJSON en /clasificar_ticket/stream y cada cuántos registros
+# se vuelca el lote al archivo de consultas
+STREAM_MAX_LINEA = 64 * 1024
+STREAM_LOTE_REGISTRO = 1000
+
+
+class _NDJSONDuplexResponse(StreamingResponse):
+    """
+    StreamingResponse que no escucha `receive` en paralelo (Starlette lo hace con ASGI < 2.4
+    para detectar desconexiones): el generador necesita seguir leyendo el cuerpo de la
+    petición mientras envía la respuesta. La desconexión se detecta al leer o al enviar.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+def _error_linea_ndjson(numero: int, error) -> bytes:
+    return codificar_json({"linea": numero, "error": error}) + b"\n"
+
+
+def _clasificar_linea_ndjson(linea: bytes, numero: int, records: list, base) -> bytes:
+    """Resultado (o error) de una línea; una línea inválida nunca corta el stream."""
+    if len(linea) > STREAM_MAX_LINEA:
+        return _error_linea_ndjson(numero, "Línea demasiado larga")
+    try:
+        facts_dict = TicketFacts.model_validate_json(linea).model_dump()
+    except ValidationError as e:
+        errores = e.errors(include_url=False, include_context=False)
+        for err in errores:
+            # Con JSON inválido, 'input' es la línea cruda (bytes): no es serializable
+            if isinstance(err.get("input"), bytes):
+                err["input"] = err["input"].decode("utf-8", errors="replace")
+        return _error_linea_ndjson(numero, errores)
+    try:
+        mascara = codificar_hechos(facts_dict)
+        response = clasificar_mascara(mascara, facts_dict.get("otra_descripcion"), base)
+        cuerpo = codificar_json(response) + b"\n"
+    except Exception as e:
+        return _error_linea_ndjson(numero, f"{type(e).__name__}: {e}")
+    records.append(_consulta_record(facts_dict, mascara, response))
+    return cuerpo
+
+
+async def _clasificar_stream(req: Request):
+    """
+    Lee el cuerpo NDJSON por fragmentos y emite una línea de resultado por cada línea de
+    entrada. Sólo se retiene la línea incompleta en curso, así la memoria no depende del
+    tamaño total. Como el cuerpo se lee a medida que se consume la respuesta, un cliente
+    que lee lento frena también la lectura de la entrada (contrapresión).
+    """
+    # Todo el stream se clasifica con la versión de la base vigente al empezar
+    base = BASE_ACTIVA.actual()
+    pendiente = b""
+    descartando = False
+    numero = 0
+    records: list[dict] = []
+    try:
+        async for chunk in req.stream():
+            pendiente += chunk
+            *lineas, pendiente = pendiente.split(b"\n")
+            salida = []
+            for linea in lineas:
+                if descartando:
+                    # Fin de una línea demasiado larga ya informada
+                    descartando = False
+                    continue
+                if not linea.strip():
+                    continue
+                numero += 1
+                salida.append(_clasificar_linea_ndjson(linea, numero, records, base))
+            if len(pendiente) > STREAM_MAX_LINEA:
+                if not descartando:
+                    numero += 1
+                    salida.append(_error_linea_ndjson(numero, "Línea demasiado larga"))
+                descartando = True
+                pendiente = b""
+            if len(records) >= STREAM_LOTE_REGISTRO:
+                _registrar_consultas(records)
+                records = []
+            if salida:
+                yield b"".join(salida)
+        if pendiente.strip() and not descartando:
+            numero += 1
+            yield _clasificar_linea_ndjson(pendiente, numero, records, base)
+    finally:
+        _registrar_consultas(records)
+
+
+@app.post("/clasificar_ticket/stream")
+async def clasificar_ticket_stream(req: Request):
+    """
+    Clasificación en streaming para reclasificaciones masivas.
+
+    Cuerpo: NDJSON (un TicketFacts por línea), puede enviarse en chunks.
+    Respuesta: NDJSON, una línea por ticket en el mismo orden (misma respuesta que
+    /clasificar_ticket/, o {"linea": n, "error": ...}), emitida a medida que se procesa.
+    """
+    return _NDJSONDuplexResponse(_clasificar_stream(req), media_type="application/x-ndjson")
+
+
 @app.post("/clasificar_ticket_iterativo/")
 async def clasificar_ticket_iterativo(payload: ClasificarIterativoInput):
     """
@@ -168,6 +428,18 @@ async def clasificar_ticket_iterativo(payload: ClasificarIterativoInput):
     facts_dict = payload.facts.model_dump()
     historial = payload.historial or []
 
+    base = BASE_ACTIVA.actual()
+    res = motor_inferencia_iterativo(facts_dict, historial_ids=historial, base=base)
+    response = _respuesta_iterativa(facts_dict, res, base)
+
+    # Registrar consulta iterativa
+    _registrar_consultas([_consulta_iterativa_record(facts_dict, historial, response)])
+
+    return response
+
+
+def _respuesta_iterativa(facts_dict: dict, res: dict, base) -> dict:
+    """Arma la respuesta del flujo iterativo para un paso (resultado del motor iterativo)."""
     # Determinar síntoma activo (primera bandera True distinta de 'otra_causa'/'otra_descripcion')
     sintoma_activo = None
     for k, v in facts_dict.items():
@@ -177,17 +449,15 @@ async def clasificar_ticket_iterativo(payload: ClasificarIterativoInput):
             sintoma_activo = k
             break
 
-    res = motor_inferencia_iterativo(facts_dict, REGLAS_CLASIFICACION, historial)
-
     categoria = res.get("categoria") or "Sin clasificar (General)"
     # Priorizar asignación especial si es 'otra causa'
     if facts_dict.get("otra_causa"):
         categoria = "Otra causa"
         tecnico = "Técnico en línea (Soporte Remoto)"
     else:
-        tecnico = sugerir_tecnico(categoria)
+        tecnico = sugerir_tecnico(categoria, base)
 
-    response = {
+    return {
         "categoria": categoria,
         "tecnico_responsable": tecnico,
         "sintoma": sintoma_activo or "Ninguno",
@@ -201,28 +471,92 @@ async def clasificar_ticket_iterativo(payload: ClasificarIterativoInput):
         "sugerencias_futuras": res.get("sugerencias_futuras", []),
     }
 
-    # Registrar consulta iterativa
-    try:
-        consulta_record = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "facts": facts_dict,
-            "iterativo": True,
-            "historial": historial,
-            "resultado": {
-                "categoria": response.get("categoria"),
-                "tecnico_responsable": response.get("tecnico_responsable"),
-                "sintoma": response.get("sintoma"),
-                "regla_id": response.get("regla_id"),
-            },
-        }
-        consultas_path = get_consultas_file_today()
-        with open(consultas_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(consulta_record, ensure_ascii=False) + "\n")
-    except Exception:
-        pass
 
+def _consulta_iterativa_record(facts_dict: dict, historial: list, response: dict) -> dict:
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "facts": facts_dict,
+        "iterativo": True,
+        "historial": historial,
+        "resultado": {
+            "categoria": response.get("categoria"),
+            "tecnico_responsable": response.get("tecnico_responsable"),
+            "sintoma": response.get("sintoma"),
+            "regla_id": response.get("regla_id"),
+        },
+    }
+
+
+# --- Asistente con sesión en el servidor ---
+
+def _respuesta_sesion(sesion_id: str, estado: dict) -> dict:
+    response = _respuesta_iterativa(estado["hechos"], SESIONES_ASISTENTE.paso_actual(estado), estado["base"])
+    response["sesion_id"] = sesion_id
+    response["paso"] = estado["pos"] + 1
+    response["total_pasos"] = len(estado["ranking"])
     return response
 
+
+@app.post("/clasificar_ticket_iterativo/sesion")
+async def iniciar_sesion_iterativa(facts: TicketFacts):
+    """
+    Inicia el asistente con estado en el servidor: devuelve el primer paso (igual que
+    /clasificar_ticket_iterativo/) más 'sesion_id', 'paso' y 'total_pasos'. Los pasos
+    siguientes se piden con POST /clasificar_ticket_iterativo/sesion/{sesion_id}.
+    """
+    facts_dict = facts.model_dump()
+    sesion_id, estado = SESIONES_ASISTENTE.iniciar(facts_dict)
+    response = _respuesta_sesion(sesion_id, estado)
+    _registrar_consultas([_consulta_iterativa_record(facts_dict, [], response)])
+    return response
+
+
+@app.post("/clasificar_ticket_iterativo/sesion/{sesion_id}")
+async def avanzar_sesion_iterativa(sesion_id: str, payload: AccionSesionInput):
+    """
+    Cuerpo: {"accion": "siguiente"} para pasar a la próxima regla, o {"accion": "funciono"}
+    para cerrar la sesión. Una sesión inexistente o vencida devuelve 404.
+    """
+    try:
+        estado = SESIONES_ASISTENTE.avanzar(sesion_id, payload.accion)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if estado is None:
+        return JSONResponse({"error": "Sesión inexistente o vencida"}, status_code=404)
+    response = _respuesta_sesion(sesion_id, estado)
+    if payload.accion == "funciono":
+        response["finalizada"] = True
+        return response
+    historial = SESIONES_ASISTENTE.historial(estado)
+    _registrar_consultas([_consulta_iterativa_record(estado["hechos"], historial, response)])
+    return response
+
+
+@app.get("/clasificar_ticket_iterativo/sesiones/metrics")
+async def sesiones_iterativas_metrics():
+    """Sesiones activas, vencidas, desalojadas por capacidad, resueltas y agotadas."""
+    return SESIONES_ASISTENTE.metricas()
+
+
+@app.post("/clasificar_ticket/ranking")
+async def clasificar_ticket_ranking(facts: TicketFacts, desde: int = 0, limit: Optional[int] = None):
+    """
+    Todas las reglas que coinciden con los hechos, en orden de prioridad, evaluadas una sola
+    vez. Cada item tiene la misma forma que la respuesta de /clasificar_ticket_iterativo/,
+    así el cliente puede recorrer los pasos del asistente sin volver a llamar al motor.
+    `desde` y `limit` permiten pedir sólo una parte de la lista.
+    """
+    facts_dict = facts.model_dump()
+    base = BASE_ACTIVA.actual()
+    ranking = ranking_reglas(facts_dict, base=base)
+    desde = max(desde, 0)
+    pagina = ranking[desde:] if limit is None else ranking[desde:desde + max(limit, 0)]
+    items = [_respuesta_iterativa(facts_dict, paso, base) for paso in pagina]
+
+    if items:
+        _registrar_consultas([_consulta_iterativa_record(facts_dict, [], items[0])])
+    return {"items": items, "total": len(ranking), "desde": desde}
+
 # --- Endpoints de salud y retroalimentación ---
 
 @app.get("/healthz")
@@ -230,9 +564,55 @@ async def healthz():
     return {"status": "ok"}
 
 
-# --- Paths de datos persistentes (centralizados en ./data) ---
+@app.get("/cache/metrics")
+async def cache_metrics():
+    """Aciertos/fallos/evicciones de la caché de resultados de /clasificar_ticket/."""
+    return CACHE_RESPUESTAS.metricas()
+
+
+@app.get("/cache/ranking/metrics")
+async def cache_ranking_metrics():
+    """Caché de rankings de reglas por máscara (flujo iterativo y /clasificar_ticket/ranking)."""
+    return CACHE_RANKING.metricas()
+
+
+# --- Base de conocimiento (ver experto_general/conocimiento.py) ---
+
+@app.get("/base/version")
+async def base_version():
+    """Versión vigente de la base de conocimiento, su origen y el estado de las recargas."""
+    return BASE_ACTIVA.metricas()
+
+
+@app.get("/reglas/analisis")
+async def reglas_analisis():
+    """
+    Análisis estático de las reglas de la versión vigente (experto_general/analisis.py):
+    reglas sombreadas, duplicadas, insatisfacibles, con hechos desconocidos o id repetido.
+    Las tres primeras no se evalúan en la clasificación por primera coincidencia.
+    """
+    base = BASE_ACTIVA.actual()
+    analisis = base.analisis
+    return {
+        "version": base.version,
+        **analisis,
+        "en_primera_coincidencia": analisis["reglas"] - len(analisis["descartadas"]),
+    }
+
+
+@app.post("/base/recargar")
+async def base_recargar():
+    """
+    Relee el archivo de EXPERTO_BASE_ARCHIVO sin esperar al vigilante. Si el archivo tiene
+    errores se mantiene la versión vigente y el error queda en 'ultimo_error'.
+    """
+    publicada = await run_in_threadpool(BASE_ACTIVA.recargar)
+    return {"recargada": publicada, **BASE_ACTIVA.metricas()}
+
+
+# --- Paths de datos persistentes (centralizados en ./data, o en EXPERTO_DATA_DIR) ---
 BASE_DIR = os.path.dirname(__file__)
-DATA_DIR = os.path.join(BASE_DIR, "data")
+DATA_DIR = directorio_datos()
 os.makedirs(DATA_DIR, exist_ok=True)
 
 FEEDBACK_FILE = os.path.join(DATA_DIR, "feedback.jsonl")
@@ -255,14 +635,9 @@ def get_consultas_file_today() -> str:
     return consultas_file_for_date(_today_str())
 
 def list_consultas_files() -> list[str]:
+    # Un archivo por día: .jsonl el día en curso, .jsonl.gz los días ya compactados
     try:
-        return sorted(
-            [
-                os.path.join(DATA_DIR, f)
-                for f in os.listdir(DATA_DIR)
-                if f.startswith("consultas-") and f.endswith(".jsonl")
-            ]
-        )
+        return listar_archivos_consultas(DATA_DIR)
     except Exception:
         return []
 
@@ -287,32 +662,37 @@ def _ensure_data_files():
     except Exception:
         pass
 
-def _init_db():
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS nuevos_sintomas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                texto TEXT NOT NULL,
-                categoria_predicha TEXT,
-                sintoma TEXT,
-                otra_descripcion TEXT,
-                user_agent TEXT,
-                created_at TEXT NOT NULL
-            )
-            """
-        )
-        conn.commit()
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
+# Conexiones SQLite compartidas (WAL + pragmas, ver persistencia/sqlite_pool.py)
+POOL_DB = PoolSQLite(DB_FILE)
+
+# Tabla nuevos_sintomas: listado por cursor, total en caché y búsqueda FTS
+# (ver persistencia/nuevos_sintomas.py)
+SINTOMAS_DB = NuevosSintomasDB(POOL_DB)
+
+# Contadores para los endpoints de métricas, en la misma base (ver persistencia/agregados.py)
+AGREGADOS = Agregados(DB_FILE)
+
+# Índice SQLite de consultas, derivado de los JSONL (ver persistencia/consultas_db.py). Al
+# importar cada tanda también suma los agregados, en la misma transacción.
+CONSULTAS_DB = ConsultasDB(DB_FILE, consultas_file_for_date, agregados=AGREGADOS)
+
+# Log de consultas: cola acotada + hilo escritor (ver persistencia/registro.py).
+# Cada lote se anexa al JSONL del día y se indexa en SQLite.
+ESCRITOR_CONSULTAS = EscritorConsultas([AnexarJSONL(consultas_file_for_date), CONSULTAS_DB])
 
-_init_db()
+SINTOMAS_DB.inicializar()
+CONSULTAS_DB.inicializar()
+# Tablas de agregados recién creadas (primer arranque): contar lo ya indexado y el feedback
+if AGREGADOS.inicializar():
+    AGREGADOS.reconstruir(FEEDBACK_FILE)
 _ensure_data_files()
+# Precalcular las respuestas de un solo síntoma antes de atender tráfico
+TABLA_RESPUESTAS.precalcular()
+
+def _anexar_feedback(record: dict) -> None:
+    with open(FEEDBACK_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
 
 @app.post("/feedback")
 async def post_feedback(req: Request):
@@ -333,143 +713,157 @@ async def post_feedback(req: Request):
         "_source": "ui",
     }
     try:
-        with open(FEEDBACK_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        await run_in_threadpool(_anexar_feedback, record)
     except Exception as e:
         return {"saved": False, "error": str(e)}
+    try:
+        await run_in_threadpool(AGREGADOS.registrar_feedback, record)
+    except Exception:
+        pass
     return {"saved": True}
 
 
 @app.get("/feedback/metrics")
 async def feedback_metrics():
     """Devuelve conteos agregados de coincidencia vs. no coincidencia."""
-    total = 0
-    matches = 0
-    mismatches = 0
-    try:
-        if os.path.exists(FEEDBACK_FILE):
-            with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-                for line in f:
-                    total += 1
-                    try:
-                        rec = json.loads(line)
-                        if rec.get("categoria_predicha") == rec.get("categoria_correcta"):
-                            matches += 1
-                        else:
-                            mismatches += 1
-                    except Exception:
-                        continue
-    except Exception as e:
-        return {"error": str(e)}
-    return {"total": total, "matches": matches, "mismatches": mismatches}
+    return await run_in_threadpool(AGREGADOS.feedback)
 
 # --- Nuevos síntomas: guardar y exportar ---
 
+# Inserciones de nuevos síntomas con commit agrupado: un commit (y un fsync) por tanda de
+# filas que llegan juntas, no por fila (ver persistencia/grupo_commit.py)
+INSERCION_SINTOMAS = InsercionAgrupada(
+    POOL_DB, SQL_INSERTAR, nombre="insercion-sintomas", al_confirmar=SINTOMAS_DB.sumar
+)
+
+
 @app.post("/nuevos_sintomas")
 async def guardar_nuevo_sintoma(payload: NuevoSintomaInput, request: Request):
     ua = request.headers.get("user-agent", "")
     now = datetime.utcnow().isoformat()
+    fila = (
+        payload.texto.strip(),
+        payload.categoria_predicha,
+        payload.sintoma,
+        payload.otra_descripcion,
+        ua,
+        now,
+    )
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO nuevos_sintomas (texto, categoria_predicha, sintoma, otra_descripcion, user_agent, created_at) VALUES (?,?,?,?,?,?)",
-            (
-                payload.texto.strip(),
-                payload.categoria_predicha,
-                payload.sintoma,
-                payload.otra_descripcion,
-                ua,
-                now,
-            ),
-        )
-        conn.commit()
-        new_id = cur.lastrowid
+        # La fila se entrega al hilo de commit agrupado; se espera su id sin bloquear el event loop
+        new_id = await asyncio.wrap_future(INSERCION_SINTOMAS.enviar(fila))
         return {"saved": True, "id": new_id}
     except Exception as e:
         return {"saved": False, "error": str(e)}
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 @app.get("/nuevos_sintomas")
-async def listar_nuevos_sintomas(limit: int = 50):
-    items = []
-    total = 0
+async def listar_nuevos_sintomas(limit: int = 50, antes_de: Optional[int] = None, cluster: Optional[int] = None):
+    """
+    Más recientes primero. Para la página siguiente se pasa `antes_de=next_cursor`
+    (paginación por id, sin OFFSET). `total` sale de un contador en memoria.
+    Con `cluster` se listan sólo las filas de ese grupo de casi-duplicados.
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cur = conn.cursor()
-        # total count
-        try:
-            cur.execute("SELECT COUNT(1) FROM nuevos_sintomas")
-            row = cur.fetchone()
-            total = int(row[0]) if row and row[0] is not None else 0
-        except Exception:
-            total = 0
-        cur.execute(
-            "SELECT id, texto, categoria_predicha, sintoma, otra_descripcion, user_agent, created_at FROM nuevos_sintomas ORDER BY id DESC LIMIT ?",
-            (limit,),
-        )
-        for row in cur.fetchall():
-            items.append(
-                {
-                    "id": row[0],
-                    "texto": row[1],
-                    "categoria_predicha": row[2],
-                    "sintoma": row[3],
-                    "otra_descripcion": row[4],
-                    "user_agent": row[5],
-                    "created_at": row[6],
-                }
-            )
+        items = await run_in_threadpool(SINTOMAS_DB.listar, limit, antes_de, cluster)
+        total = await run_in_threadpool(SINTOMAS_DB.total)
     except Exception as e:
         return {"error": str(e)}
+    next_cursor = items[-1]["id"] if items and len(items) >= limit else None
+    return {"items": items, "total": total, "next_cursor": next_cursor}
+
+
+@app.get("/nuevos_sintomas/buscar")
+async def buscar_nuevos_sintomas(q: str, limit: int = 50):
+    """Búsqueda de texto completo en texto y otra_descripcion, por relevancia."""
+    try:
+        items = await run_in_threadpool(SINTOMAS_DB.buscar, q, min(max(limit, 1), 500))
+    except Exception as e:
+        return {"error": str(e)}
+    return {"items": items, "total": len(items), "fts": SINTOMAS_DB.fts}
+
+
+@app.get("/nuevos_sintomas/clusters")
+async def nuevos_sintomas_clusters(min_tamano: int = 2, limit: int = 50):
+    """Grupos de reportes casi duplicados (según la última corrida del agrupamiento)."""
+    try:
+        return {"clusters": await run_in_threadpool(SINTOMAS_DB.clusters, min_tamano, limit)}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.post("/nuevos_sintomas/clusters/recalcular")
+async def nuevos_sintomas_clusters_recalcular():
+    """Vuelve a agrupar toda la tabla (MinHash/LSH, ver experto_general/agrupamiento.py)."""
+    try:
+        return await run_in_threadpool(SINTOMAS_DB.agrupar)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get("/db/pool/metrics")
+async def db_pool_metrics():
+    """Uso del pool de conexiones SQLite: abiertas, libres, préstamos y esperas."""
+    return POOL_DB.metricas()
+
+
+@app.get("/nuevos_sintomas/escritor/metrics")
+async def nuevos_sintomas_escritor_metrics():
+    """Commit agrupado de nuevos síntomas: filas, commits y filas por commit."""
+    return INSERCION_SINTOMAS.metricas()
+
+
+_ESTILO_EXPORT = """
+          body { font-family: Arial, sans-serif; margin: 24px; }
+          table { border-collapse: collapse; width: 100%; }
+          th, td { border: 1px solid #ddd; padding: 8px; font-size: 12px; }
+          th { background: #f3f4f6; text-align: left; }
+"""
+
+
+def _html_tabla(titulo: str, columnas: list[str], filas):
+    """Genera el documento HTML por partes: encabezado, una fila por vez y cierre."""
+    yield (
+        "<!doctype html>\n<html lang=es>\n  <head>\n    <meta charset=utf-8 />\n"
+        f"    <title>{titulo}</title>\n    <style>{_ESTILO_EXPORT}    </style>\n  </head>\n"
+        f"  <body>\n    <h1>{titulo}</h1>\n    <table>\n      <thead><tr>"
+        + "".join(f"<th>{c}</th>" for c in columnas)
+        + "</tr></thead>\n      <tbody>\n"
+    )
+    for fila in filas:
+        yield "<tr>" + "".join(f"<td>{html.escape(str(v or ''))}</td>" for v in fila) + "</tr>\n"
+    yield "      </tbody>\n    </table>\n  </body>\n</html>\n"
+
+
+def _iterar_nuevos_sintomas(lote: int = 500):
+    # Conexión propia (no del pool): una exportación larga no debe retener una del pool
+    conn = POOL_DB.conectar()
+    try:
+        cur = conn.execute(
+            "SELECT id, texto, categoria_predicha, sintoma, otra_descripcion, created_at FROM nuevos_sintomas ORDER BY id DESC"
+        )
+        while True:
+            filas = cur.fetchmany(lote)
+            if not filas:
+                break
+            yield from filas
     finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
-    return {"items": items, "total": total}
+        conn.close()
 
 
 @app.get("/nuevos_sintomas/export/html", response_class=HTMLResponse)
 async def exportar_nuevos_sintomas_html():
-    # Export simple en HTML para poder "Imprimir como PDF" desde el navegador sin dependencias extra
-    res = await listar_nuevos_sintomas(limit=1000)
-    if isinstance(res, dict) and res.get("error"):
-        return HTMLResponse(content=f"<html><body><h1>Error</h1><pre>{res['error']}</pre></body></html>")
-    items = res.get("items", [])
-    rows = []
-    for it in items:
-        rows.append(
-            f"<tr><td>{it['id']}</td><td>{(it['texto'] or '').replace('<','&lt;')}</td><td>{it.get('categoria_predicha') or ''}</td><td>{it.get('sintoma') or ''}</td><td>{(it.get('otra_descripcion') or '').replace('<','&lt;')}</td><td>{it.get('created_at') or ''}</td></tr>"
-        )
-    html = f"""
-    <!doctype html>
-    <html lang=es>
-      <head>
-        <meta charset=utf-8 />
-        <title>Nuevos Síntomas</title>
-        <style>
-          body {{ font-family: Arial, sans-serif; margin: 24px; }}
-          table {{ border-collapse: collapse; width: 100%; }}
-          th, td {{ border: 1px solid #ddd; padding: 8px; font-size: 12px; }}
-          th {{ background: #f3f4f6; text-align: left; }}
-        </style>
-      </head>
-      <body>
-        <h1>Nuevos Síntomas</h1>
-        <table>
-          <thead><tr><th>ID</th><th>Texto</th><th>Categoría predicha</th><th>Síntoma</th><th>Otra descripción</th><th>Creado</th></tr></thead>
-          <tbody>{''.join(rows)}</tbody>
-        </table>
-      </body>
-    </html>
-    """
-    return HTMLResponse(content=html)
+    # Export simple en HTML para poder "Imprimir como PDF" desde el navegador sin dependencias extra.
+    # Se emite fila por fila desde el cursor, sin tope de filas y con memoria constante.
+    filas = _iterar_nuevos_sintomas()
+    return StreamingResponse(
+        _html_tabla(
+            "Nuevos Síntomas",
+            ["ID", "Texto", "Categoría predicha", "Síntoma", "Otra descripción", "Creado"],
+            filas,
+        ),
+        media_type="text/html; charset=utf-8",
+    )
 
 # --- Consultas: listar y métricas ---
 
@@ -477,132 +871,166 @@ def _select_consulta_files(date: Optional[str] = None, all: bool = False) -> lis
     if all:
         files = list_consultas_files()
         return files
-    if date:
-        return [consultas_file_for_date(date)]
-    return [get_consultas_file_today()]
+    return [archivo_existente(DATA_DIR, (date or _today_str()).strip())]
 
 
 @app.get("/consultas")
-async def listar_consultas(limit: int = 100, date: Optional[str] = None, all: bool = False):
-    items = []
-    total = 0
+async def listar_consultas(limit: int = 100, date: Optional[str] = None, all: bool = False, fuente: str = "indice"):
+    """
+    Últimas consultas, más recientes primero.
+    - fuente=indice (por defecto): consulta al índice SQLite.
+    - fuente=jsonl: lectura inversa de los JSONL (sin índice), también usada si el índice falla.
+    """
     try:
-        files = _select_consulta_files(date=date, all=all)
-        all_lines: list[str] = []
-        for path in files:
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    total += len(lines)
-                    all_lines.extend(lines)
-        # Tomar los últimos 'limit' globalmente
-        for line in all_lines[-limit:]:
+        fecha = (date or _today_str()).strip()
+        total = await run_in_threadpool(AGREGADOS.total_consultas, fecha, all)
+        if fuente != "jsonl":
             try:
-                rec = json.loads(line)
-                items.append(
-                    {
-                        "timestamp": rec.get("timestamp"),
-                        "categoria": (rec.get("resultado") or {}).get("categoria"),
-                        "sintoma": (rec.get("resultado") or {}).get("sintoma"),
-                        "regla_id": (rec.get("resultado") or {}).get("regla_id"),
-                    }
-                )
+                return {"items": CONSULTAS_DB.listar(limit=limit, fecha=fecha, todas=all), "total": total}
             except Exception:
-                continue
+                pass
+        items = ultimas_consultas(_select_consulta_files(date=date, all=all), limit)
     except Exception as e:
         return {"error": str(e)}
-    return {"items": items[::-1], "total": total}
+    return {"items": items, "total": total}
 
 
 @app.get("/consultas/metrics")
 async def consultas_metrics(date: Optional[str] = None, all: bool = False):
-    por_categoria: dict[str, int] = {}
-    por_sintoma: dict[str, int] = {}
-    total = 0
     try:
-        files = _select_consulta_files(date=date, all=all)
-        for path in files:
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        try:
-                            rec = json.loads(line)
-                            total += 1
-                            cat = (rec.get("resultado") or {}).get("categoria") or "(desconocida)"
-                            por_categoria[cat] = por_categoria.get(cat, 0) + 1
-                            sint = (rec.get("resultado") or {}).get("sintoma") or "(ninguno)"
-                            por_sintoma[sint] = por_sintoma.get(sint, 0) + 1
-                        except Exception:
-                            continue
+        fecha = (date or _today_str()).strip()
+        return await run_in_threadpool(AGREGADOS.consultas, fecha, all)
     except Exception as e:
         return {"error": str(e)}
-    return {"total": total, "por_categoria": por_categoria, "por_sintoma": por_sintoma}
 
 
 @app.get("/consultas/export/html", response_class=HTMLResponse)
-async def exportar_consultas_html(limit: int = 1000, date: Optional[str] = None, all: bool = False):
-    try:
-        items_resp = await listar_consultas(limit=limit, date=date, all=all)
-        if isinstance(items_resp, dict) and items_resp.get("error"):
-            return HTMLResponse(content=f"<html><body><h1>Error</h1><pre>{items_resp['error']}</pre></body></html>")
-        items = items_resp.get("items", []) if isinstance(items_resp, dict) else []
-        rows = []
-        for it in items:
-            rows.append(
-                f"<tr><td>{(it.get('timestamp') or '')}</td><td>{(it.get('categoria') or '')}</td><td>{(it.get('sintoma') or '')}</td><td>{(it.get('regla_id') or '')}</td></tr>"
-            )
-        html = f"""
-        <!doctype html>
-        <html lang=es>
-            <head>
-                <meta charset=utf-8 />
-                <title>Consultas realizadas</title>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 24px; }}
-                    table {{ border-collapse: collapse; width: 100%; }}
-                    th, td {{ border: 1px solid #ddd; padding: 8px; font-size: 12px; }}
-                    th {{ background: #f3f4f6; text-align: left; }}
-                </style>
-            </head>
-            <body>
-                <h1>Consultas realizadas</h1>
-                <table>
-                    <thead><tr><th>Fecha (UTC)</th><th>Categoría</th><th>Síntoma</th><th>Regla</th></tr></thead>
-                    <tbody>{''.join(rows)}</tbody>
-                </table>
-            </body>
-        </html>
-        """
-        return HTMLResponse(content=html)
-    except Exception as e:
-        return HTMLResponse(content=f"<html><body><h1>Error</h1><pre>{str(e)}</pre></body></html>")
+async def exportar_consultas_html(limit: Optional[int] = None, date: Optional[str] = None, all: bool = False):
+    # Streaming desde el cursor del índice SQLite: sin tope de filas y memoria constante
+    fecha = (date or _today_str()).strip()
+    filas = CONSULTAS_DB.iterar(limit=limit, fecha=fecha, todas=all)
+    return StreamingResponse(
+        _html_tabla("Consultas realizadas", ["Fecha (UTC)", "Categoría", "Síntoma", "Regla"], filas),
+        media_type="text/html; charset=utf-8",
+    )
+
+
+def _csv_consultas(filas):
+    sio = io.StringIO()
+    writer = csv.writer(sio)
+    writer.writerow(["timestamp", "categoria", "sintoma", "regla_id"])
+    for fila in filas:
+        writer.writerow([v or '' for v in fila])
+        # Vaciar el buffer cada tanto para no acumular el documento completo
+        if sio.tell() > 64 * 1024:
+            yield sio.getvalue()
+            sio.seek(0)
+            sio.truncate()
+    yield sio.getvalue()
 
 
 @app.get("/consultas/export/csv")
-async def exportar_consultas_csv(limit: int = 1000, date: Optional[str] = None, all: bool = False):
+async def exportar_consultas_csv(limit: Optional[int] = None, date: Optional[str] = None, all: bool = False):
+    fecha = (date or _today_str()).strip()
+    filas = CONSULTAS_DB.iterar(limit=limit, fecha=fecha, todas=all)
+    return StreamingResponse(
+        _csv_consultas(filas),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": "attachment; filename=consultas.csv"},
+    )
+
+@app.get("/consultas/registro/metrics")
+async def consultas_registro_metrics():
+    """Estado del escritor de consultas: en cola, escritos y descartados por cola llena."""
+    return ESCRITOR_CONSULTAS.metricas()
+
+# --- Exportación columnar (análisis masivo) ---
+
+COLUMNAR_DIR = os.path.join(DATA_DIR, "columnar")
+
+
+def _exportar_columnar() -> list[str]:
+    try:
+        return exportar_dias_cerrados(list_consultas_files(), COLUMNAR_DIR, _today_str())
+    except Exception:
+        return []
+
+
+def _compactar_consultas() -> list[str]:
+    # Antes de compactar cada día se termina de indexar su JSONL
     try:
-        items_resp = await listar_consultas(limit=limit, date=date, all=all)
-        if isinstance(items_resp, dict) and items_resp.get("error"):
-            return Response(content=f"error,{items_resp['error']}", media_type="text/plain; charset=utf-8")
-        items = items_resp.get("items", []) if isinstance(items_resp, dict) else []
-        sio = io.StringIO()
-        writer = csv.writer(sio)
-        writer.writerow(["timestamp", "categoria", "sintoma", "regla_id"])
-        for it in items:
-            writer.writerow([
-                (it.get('timestamp') or ''),
-                (it.get('categoria') or ''),
-                (it.get('sintoma') or ''),
-                (it.get('regla_id') or ''),
-            ])
-        data = sio.getvalue()
-        return Response(
-            content=data,
-            media_type="text/csv; charset=utf-8",
-            headers={"Content-Disposition": "attachment; filename=consultas.csv"},
+        return compactar_dias_cerrados(
+            list_consultas_files(), _today_str(), antes_de_compactar=lambda ruta: CONSULTAS_DB.sincronizar([ruta])
         )
-    except Exception as e:
-        return Response(content=f"error,{str(e)}", media_type="text/plain; charset=utf-8")
+    except Exception:
+        return []
+
+
+def _mantenimiento_consultas() -> None:
+    # Orden: poner al día el índice (migración incremental), exportar los días cerrados al
+    # formato columnar y recién entonces compactar los JSONL viejos
+    try:
+        CONSULTAS_DB.sincronizar(list_consultas_files())
+    except Exception:
+        pass
+    _exportar_columnar()
+    _compactar_consultas()
+
+
+# Cada pasada es incremental (offsets del índice, mtime de los columnares, días ya
+# compactados), así que repetirla seguido cuesta poco y los días cierran a tiempo.
+INTERVALO_MANTENIMIENTO = 3600.0
+FIN_MANTENIMIENTO = threading.Event()
+
+
+def _bucle_mantenimiento() -> None:
+    while True:
+        _mantenimiento_consultas()
+        if FIN_MANTENIMIENTO.wait(INTERVALO_MANTENIMIENTO):
+            return
+
+
+@app.post("/consultas/columnar/exportar")
+async def consultas_columnar_exportar():
+    """Genera los archivos columnares de los días cerrados que falten."""
+    generados = await run_in_threadpool(_exportar_columnar)
+    return {"generados": [os.path.basename(p) for p in generados]}
+
+
+@app.get("/consultas/columnar")
+async def consultas_columnar():
+    files = []
+    try:
+        nombres = sorted(f for f in os.listdir(COLUMNAR_DIR) if f.endswith(".col"))
+    except FileNotFoundError:
+        nombres = []
+    for nombre in nombres:
+        path = os.path.join(COLUMNAR_DIR, nombre)
+        try:
+            enc = leer_encabezado(path)
+            files.append({"archivo": nombre, "fecha": enc.get("fecha"), "filas": enc.get("filas"), "bytes": os.path.getsize(path)})
+        except Exception:
+            continue
+    return {"files": files}
+
+
+@app.get("/consultas/columnar/{fecha}")
+async def consultas_columnar_archivo(fecha: str):
+    """Descarga el archivo columnar de un día (formato descrito en persistencia/columnar.py)."""
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", fecha):
+        return Response(content="fecha inválida", status_code=400, media_type="text/plain; charset=utf-8")
+    path = os.path.join(COLUMNAR_DIR, f"consultas-{fecha}.col")
+    if not os.path.exists(path):
+        return Response(content="no encontrado", status_code=404, media_type="text/plain; charset=utf-8")
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
+
+@app.post("/consultas/compactar")
+async def consultas_compactar():
+    """Comprime los JSONL de días pasados (ver persistencia/archivos.py)."""
+    compactados = await run_in_threadpool(_compactar_consultas)
+    return {"compactados": [os.path.basename(p) for p in compactados]}
+
 
 # Listar archivos de consultas disponibles
 @app.get("/consultas/files")
@@ -616,13 +1044,40 @@ async def consultas_purge(date: Optional[str] = None, all: bool = False):
     targets = _select_consulta_files(date=date, all=all)
     deleted = 0
     for path in targets:
+        # Ambas variantes del día: la compactada y un posible .jsonl restante
+        base = path[:-3] if path.endswith(".gz") else path
+        for variante in (base, base + ".gz"):
+            try:
+                if os.path.exists(variante):
+                    os.remove(variante)
+                    deleted += 1
+            except Exception:
+                continue
+    fecha = (date or _today_str()).strip()
+    try:
+        # También descuenta los agregados de esos días
+        CONSULTAS_DB.purgar(fecha=fecha, todas=all)
+    except Exception:
+        pass
+    # Y borra sus exportaciones columnares
+    if all:
+        try:
+            columnares = [os.path.join(COLUMNAR_DIR, f) for f in os.listdir(COLUMNAR_DIR) if f.endswith(".col")]
+        except FileNotFoundError:
+            columnares = []
+    elif re.fullmatch(r"\d{4}-\d{2}-\d{2}", fecha):
+        columnares = [os.path.join(COLUMNAR_DIR, f"consultas-{fecha}.col")]
+    else:
+        columnares = []
+    deleted_columnar = 0
+    for path in columnares:
         try:
             if os.path.exists(path):
                 os.remove(path)
-                deleted += 1
+                deleted_columnar += 1
         except Exception:
             continue
-    return {"deleted": deleted}
+    return {"deleted": deleted, "deleted_columnar": deleted_columnar}
 
 # Si estás ejecutando esto como un módulo (ej. 'uvicorn main:app --reload'), la importación anterior
 # debería funcionar. Si tienes problemas de importación (ej. ModuleNotFoundError), intenta la
@@ -0,0 +1,6 @@
+from .registro import EscritorConsultas, AnexarJSONL
+
+__all__ = [
+	"EscritorConsultas",
+	"AnexarJSONL",
+]
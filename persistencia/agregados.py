@@ -0,0 +1,226 @@
+# persistencia/agregados.py
+
+# Agregados incrementales de consultas y feedback, en SQLite junto al índice de consultas
+# (data/data.db), así /consultas/metrics y /feedback/metrics responden sin releer los logs.
+#
+# - Consultas: contadores por día (total, por categoría, síntoma y regla). Los suma el
+#   índice de consultas (persistencia/consultas_db.py) en la misma transacción en que
+#   importa cada tanda de líneas: cada línea se cuenta una sola vez aunque haya varios
+#   procesos (uvicorn --workers N), y tras una caída contadores e índice quedan de acuerdo.
+# - Feedback: total / coincide / no coincide, con incrementos UPSERT por registro.
+#
+# Para recalcularlos desde el índice y feedback.jsonl (p. ej. tras editar los logs a mano):
+#   python -m persistencia.agregados reconstruir [directorio_data]
+import json
+import os
+import sqlite3
+import sys
+from collections import Counter
+from contextlib import closing
+from typing import Optional
+
+from persistencia.archivos import directorio_datos, listar_archivos_consultas
+
+CAMPOS = ("por_categoria", "por_sintoma", "por_regla")
+TOTAL = "total"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS agregados_consultas (
+    fecha TEXT NOT NULL,
+    campo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (fecha, campo, clave)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agregados_feedback (
+    clave TEXT PRIMARY KEY,
+    n INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+SQL_SUMAR = (
+    "INSERT INTO agregados_consultas (fecha, campo, clave, n) VALUES (?,?,?,?) "
+    "ON CONFLICT(fecha, campo, clave) DO UPDATE SET n = n + excluded.n"
+)
+SQL_SUMAR_FEEDBACK = (
+    "INSERT INTO agregados_feedback (clave, n) VALUES (?, 1) "
+    "ON CONFLICT(clave) DO UPDATE SET n = n + 1"
+)
+
+# Valores por defecto de cada campo, iguales en la suma incremental y en la reconstrucción
+POR_DEFECTO = {"por_categoria": "(desconocida)", "por_sintoma": "(ninguno)", "por_regla": "(ninguna)"}
+# Columna de la tabla consultas de la que sale cada campo
+COLUMNA = {"por_categoria": "categoria", "por_sintoma": "sintoma", "por_regla": "regla_id"}
+
+
+def _bucket_vacio() -> dict:
+    return {"total": 0, "por_categoria": {}, "por_sintoma": {}, "por_regla": {}}
+
+
+class Agregados:
+    """
+    Contadores de consultas por día y de feedback, compartidos por todos los procesos que
+    usan la misma base. Las lecturas son consultas por clave primaria (por día) o una suma
+    sobre los días (acumulado global).
+    """
+
+    def __init__(self, ruta_db: str):
+        self.ruta_db = ruta_db
+
+    def conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.ruta_db, timeout=30.0)
+
+    def inicializar(self) -> bool:
+        """Crea las tablas. Devuelve True si no existían (hay que reconstruir)."""
+        with closing(self.conectar()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existia = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'agregados_consultas'"
+            ).fetchone()
+            for sentencia in ESQUEMA.split(";"):
+                if sentencia.strip():
+                    conn.execute(sentencia)
+            conn.commit()
+        return not existia
+
+    # --- Actualización (dentro de la transacción de quien llama) ---
+
+    @staticmethod
+    def sumar_filas(conn: sqlite3.Connection, filas: list[tuple]) -> None:
+        """
+        Suma filas del índice de consultas (ver consultas_db.fila_de_registro:
+        fecha, timestamp, categoria, sintoma, regla_id, ...). No hace commit.
+        """
+        conteo: Counter = Counter()
+        for fila in filas:
+            fecha, _, categoria, sintoma, regla_id = fila[:5]
+            conteo[(fecha, TOTAL, "")] += 1
+            for campo, valor in zip(CAMPOS, (categoria, sintoma, regla_id)):
+                conteo[(fecha, campo, valor or POR_DEFECTO[campo])] += 1
+        conn.executemany(SQL_SUMAR, [clave + (n,) for clave, n in conteo.items()])
+
+    @staticmethod
+    def borrar_dias(conn: sqlite3.Connection, fecha: Optional[str] = None, todas: bool = False) -> None:
+        """Descuenta los días purgados o reindexados. No hace commit."""
+        if todas:
+            conn.execute("DELETE FROM agregados_consultas")
+        else:
+            conn.execute("DELETE FROM agregados_consultas WHERE fecha = ?", (fecha,))
+
+    def registrar_feedback(self, rec: dict) -> None:
+        coincide = rec.get("categoria_predicha") == rec.get("categoria_correcta")
+        with closing(self.conectar()) as conn:
+            conn.execute(SQL_SUMAR_FEEDBACK, ("total",))
+            conn.execute(SQL_SUMAR_FEEDBACK, ("matches" if coincide else "mismatches",))
+            conn.commit()
+
+    # --- Lecturas ---
+
+    def consultas(self, fecha: Optional[str] = None, todas: bool = False) -> dict:
+        salida = _bucket_vacio()
+        with closing(self.conectar()) as conn:
+            if todas:
+                filas = conn.execute(
+                    "SELECT campo, clave, SUM(n) FROM agregados_consultas GROUP BY campo, clave"
+                ).fetchall()
+                por_dia = conn.execute(
+                    "SELECT fecha, n FROM agregados_consultas WHERE campo = ? ORDER BY fecha", (TOTAL,)
+                ).fetchall()
+            else:
+                filas = conn.execute(
+                    "SELECT campo, clave, n FROM agregados_consultas WHERE fecha = ?", (fecha,)
+                ).fetchall()
+        for campo, clave, n in filas:
+            if not n:
+                continue
+            if campo == TOTAL:
+                salida["total"] += n
+            elif campo in salida:
+                salida[campo][clave] = n
+        if todas:
+            salida["por_dia"] = {dia: n for dia, n in por_dia if n}
+        return salida
+
+    def total_consultas(self, fecha: Optional[str] = None, todas: bool = False) -> int:
+        with closing(self.conectar()) as conn:
+            if todas:
+                row = conn.execute("SELECT SUM(n) FROM agregados_consultas WHERE campo = ?", (TOTAL,)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT n FROM agregados_consultas WHERE fecha = ? AND campo = ? AND clave = ''", (fecha, TOTAL)
+                ).fetchone()
+        return int(row[0] or 0) if row else 0
+
+    def feedback(self) -> dict:
+        salida = {"total": 0, "matches": 0, "mismatches": 0}
+        with closing(self.conectar()) as conn:
+            for clave, n in conn.execute("SELECT clave, n FROM agregados_feedback"):
+                salida[clave] = n
+        return salida
+
+    # --- Reconstrucción ---
+
+    def reconstruir(self, ruta_feedback: Optional[str]) -> dict:
+        """
+        Recalcula todo en una transacción: las consultas desde el índice (tabla consultas),
+        el feedback desde el archivo crudo.
+        """
+        fb = Counter()
+        if ruta_feedback and os.path.exists(ruta_feedback):
+            with open(ruta_feedback, "r", encoding="utf-8") as f:
+                for line in f:
+                    fb["total"] += 1
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        # Igual que antes: la línea cuenta en el total aunque no se pueda leer
+                        continue
+                    coincide = rec.get("categoria_predicha") == rec.get("categoria_correcta")
+                    fb["matches" if coincide else "mismatches"] += 1
+        with closing(self.conectar()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM agregados_consultas")
+                conn.execute(
+                    "INSERT INTO agregados_consultas (fecha, campo, clave, n) "
+                    "SELECT fecha, ?, '', COUNT(1) FROM consultas GROUP BY fecha",
+                    (TOTAL,),
+                )
+                for campo in CAMPOS:
+                    conn.execute(
+                        f"INSERT INTO agregados_consultas (fecha, campo, clave, n) "
+                        f"SELECT fecha, ?, COALESCE(NULLIF({COLUMNA[campo]}, ''), ?), COUNT(1) "
+                        f"FROM consultas GROUP BY 1, 3",
+                        (campo, POR_DEFECTO[campo]),
+                    )
+                conn.execute("DELETE FROM agregados_feedback")
+                conn.executemany("INSERT INTO agregados_feedback (clave, n) VALUES (?, ?)", list(fb.items()))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return {"consultas": self.total_consultas(todas=True), "feedback": fb["total"]}
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "reconstruir":
+        print("Uso: python -m persistencia.agregados reconstruir [directorio_data]", file=sys.stderr)
+        return 2
+    data_dir = argv[1] if len(argv) > 1 else directorio_datos()
+    from persistencia.consultas_db import ConsultasDB
+
+    ruta_db = os.path.join(data_dir, "data.db")
+    agregados = Agregados(ruta_db)
+    agregados.inicializar()
+    # Se cuenta desde el índice: primero ponerlo al día con los JSONL
+    indice = ConsultasDB(ruta_db, agregados=agregados)
+    indice.inicializar()
+    indice.sincronizar(listar_archivos_consultas(data_dir))
+    resumen = agregados.reconstruir(os.path.join(data_dir, "feedback.jsonl"))
+    print(json.dumps(resumen, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# persistencia/archivos.py
+
+# Directorio de datos y archivos diarios de consultas: listado, lectura y compactación.
+#
+# El día en curso se escribe en consultas-YYYY-MM-DD.jsonl. Los días pasados se compactan a
+# consultas-YYYY-MM-DD.jsonl.gz con una codificación dispersa de los hechos: en lugar del
+# dict completo de banderas (casi todas en False) se guarda sólo la lista de las verdaderas
+# ("hechos_activos"). `leer_registros` lee ambos formatos y devuelve siempre el registro
+# expandido, así el resto del código no distingue entre uno y otro.
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+
+from experto_general.hechos import BANDERAS
+
+# Directorio de datos: EXPERTO_DATA_DIR si está definida, si no ./data junto a main.py.
+# Lo usan la API y todas las herramientas de línea de comandos.
+VARIABLE_DATOS = "EXPERTO_DATA_DIR"
+
+PREFIJO = "consultas-"
+SUFIJO = ".jsonl"
+SUFIJO_COMPACTO = ".jsonl.gz"
+
+
+def directorio_datos() -> str:
+    return os.environ.get(VARIABLE_DATOS) or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def fecha_de_archivo(ruta: str) -> str:
+    """'.../consultas-2024-05-01.jsonl[.gz]' -> '2024-05-01'."""
+    nombre = os.path.basename(ruta)
+    return nombre[len(PREFIJO):].split(".", 1)[0]
+
+
+def listar_archivos_consultas(data_dir: str) -> list[str]:
+    """
+    Un archivo por día, en orden cronológico. Si un día ya está compactado se usa el .gz
+    (un .jsonl que quede junto a él es un resto de una compactación interrumpida).
+    """
+    por_fecha: dict[str, str] = {}
+    try:
+        nombres = os.listdir(data_dir)
+    except OSError:
+        return []
+    for nombre in nombres:
+        if not nombre.startswith(PREFIJO):
+            continue
+        if nombre.endswith(SUFIJO_COMPACTO) or (nombre.endswith(SUFIJO) and fecha_de_archivo(nombre) not in por_fecha):
+            por_fecha[fecha_de_archivo(nombre)] = os.path.join(data_dir, nombre)
+    return [por_fecha[f] for f in sorted(por_fecha)]
+
+
+def archivo_existente(data_dir: str, fecha: str) -> str:
+    """Ruta del archivo del día (compactado si existe, si no el .jsonl)."""
+    compacto = os.path.join(data_dir, f"{PREFIJO}{fecha}{SUFIJO_COMPACTO}")
+    if os.path.exists(compacto):
+        return compacto
+    return os.path.join(data_dir, f"{PREFIJO}{fecha}{SUFIJO}")
+
+
+# --- Codificación dispersa ---
+
+def compactar_registro(rec: dict) -> dict:
+    """Reemplaza 'facts' por 'hechos_activos' (+ 'otra_descripcion' si la hay)."""
+    facts = rec.get("facts")
+    if not isinstance(facts, dict):
+        return rec
+    salida = {}
+    for clave, valor in rec.items():
+        if clave != "facts":
+            salida[clave] = valor
+            continue
+        salida["hechos_activos"] = [k for k, v in facts.items() if v is True]
+        if facts.get("otra_descripcion"):
+            salida["otra_descripcion"] = facts["otra_descripcion"]
+    return salida
+
+
+def expandir_registro(rec: dict) -> dict:
+    """Inverso de `compactar_registro`: reconstruye el dict 'facts' completo."""
+    if "hechos_activos" not in rec:
+        return rec
+    facts = {nombre: False for nombre in BANDERAS}
+    for nombre in rec["hechos_activos"]:
+        facts[nombre] = True
+    facts["otra_descripcion"] = rec.get("otra_descripcion")
+    salida = {}
+    for clave, valor in rec.items():
+        if clave == "hechos_activos":
+            salida["facts"] = facts
+        elif clave != "otra_descripcion":
+            salida[clave] = valor
+    return salida
+
+
+# --- Lectura ---
+
+def abrir_texto(ruta: str):
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, "rt", encoding="utf-8")
+    return open(ruta, "r", encoding="utf-8")
+
+
+def leer_registros(ruta: str) -> Iterator[dict]:
+    """Registros del archivo (plano o compactado), ya expandidos. Ignora líneas ilegibles."""
+    with abrir_texto(ruta) as f:
+        for line in f:
+            try:
+                yield expandir_registro(json.loads(line))
+            except Exception:
+                continue
+
+
+# --- Compactación ---
+
+def compactar_archivo(ruta: str) -> Optional[str]:
+    """
+    Reescribe un .jsonl como .jsonl.gz con hechos dispersos y borra el original.
+    Si ya existía el .gz, el .jsonl es un resto y sólo se elimina.
+    """
+    destino = ruta[: -len(SUFIJO)] + SUFIJO_COMPACTO
+    if os.path.exists(destino):
+        os.remove(ruta)
+        return destino
+    tmp = destino + ".tmp"
+    with open(ruta, "r", encoding="utf-8") as src, gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as dst:
+        for line in src:
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            dst.write(json.dumps(compactar_registro(rec), ensure_ascii=False, separators=(",", ":")) + "\n")
+    # Se conserva la fecha de modificación del original (la exportación columnar la compara)
+    st = os.stat(ruta)
+    os.utime(tmp, (st.st_atime, st.st_mtime))
+    os.replace(tmp, destino)
+    os.remove(ruta)
+    return destino
+
+
+def limite_dias_cerrados(hoy: str) -> str:
+    """
+    Primer día que todavía no se da por cerrado: ayer. Se deja un día de margen para
+    registros que todavía estén en la cola del escritor.
+    """
+    return (datetime.strptime(hoy, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def compactar_dias_cerrados(rutas: list[str], hoy: str,
+                            antes_de_compactar: Optional[Callable[[str], None]] = None) -> list[str]:
+    """
+    Compacta los .jsonl de días anteriores a ayer (ver `limite_dias_cerrados`).
+    `antes_de_compactar(ruta)` permite, por ejemplo, terminar de indexar el archivo.
+    Devuelve las rutas compactadas.
+    """
+    limite = limite_dias_cerrados(hoy)
+    compactados = []
+    for ruta in rutas:
+        if not ruta.endswith(SUFIJO) or fecha_de_archivo(ruta) >= limite or not os.path.exists(ruta):
+            continue
+        if antes_de_compactar is not None:
+            antes_de_compactar(ruta)
+        destino = compactar_archivo(ruta)
+        if destino:
+            compactados.append(destino)
+    return compactados
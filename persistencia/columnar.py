@@ -0,0 +1,183 @@
+# persistencia/columnar.py
+
+# Exportación columnar de los días cerrados de consultas, para análisis masivo (notebooks).
+# Sin dependencias externas: un formato simple, al estilo Arrow/Parquet, con una columna por
+# campo, enteros empaquetados y compresión zlib por columna.
+#
+# Formato de archivo (consultas-YYYY-MM-DD.col):
+#   b"CONSCOL1"                         firma
+#   uint32 LE                           largo del encabezado
+#   encabezado JSON (utf-8)             {"version", "fecha", "filas", "columnas": [...]}
+#   bloques de columnas                 zlib(array little-endian), en el orden del encabezado
+#
+# Cada columna en el encabezado: {"nombre", "tipo" (código de array), "bytes", "diccionario"?}.
+# Las columnas de texto (categoría, síntoma, regla, técnico) van codificadas por diccionario:
+# el bloque guarda índices y "diccionario" la lista de valores (null incluido).
+# El timestamp se guarda como entero (microsegundos desde epoch, UTC).
+#
+# Uso:
+#   python -m persistencia.columnar exportar [directorio_data]
+import array
+import json
+import os
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from experto_general.hechos import codificar_hechos
+from persistencia.archivos import directorio_datos, leer_registros, limite_dias_cerrados, listar_archivos_consultas
+
+FIRMA = b"CONSCOL1"
+VERSION = 1
+COLUMNAS_DICCIONARIO = ("categoria", "sintoma", "regla_id", "tecnico_responsable")
+EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _a_micros(timestamp: Optional[str]) -> int:
+    if not timestamp:
+        return 0
+    try:
+        dt = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    # Aritmética entera: con float se pierden microsegundos en fechas actuales
+    return (dt - EPOCA) // timedelta(microseconds=1)
+
+
+def _bloque(valores: array.array) -> bytes:
+    if sys.byteorder == "big":
+        valores = array.array(valores.typecode, valores)
+        valores.byteswap()
+    return zlib.compress(valores.tobytes(), 6)
+
+
+def _tipo_indices(n: int) -> str:
+    return "B" if n <= 0xFF else "H" if n <= 0xFFFF else "I"
+
+
+def escribir_columnar(registros, destino: str, fecha: str) -> int:
+    """Escribe los registros (dicts del log de consultas) en formato columnar. Devuelve las filas."""
+    timestamps = array.array("q")
+    iterativo = array.array("B")
+    mascaras = array.array("I")
+    diccionarios: dict[str, dict] = {c: {} for c in COLUMNAS_DICCIONARIO}
+    indices: dict[str, list[int]] = {c: [] for c in COLUMNAS_DICCIONARIO}
+    for rec in registros:
+        resultado = rec.get("resultado") or {}
+        timestamps.append(_a_micros(rec.get("timestamp")))
+        iterativo.append(1 if rec.get("iterativo") else 0)
+        mascara = rec.get("mascara")
+        if mascara is None:
+            mascara = codificar_hechos(rec.get("facts") or {})
+        mascaras.append(mascara)
+        for col in COLUMNAS_DICCIONARIO:
+            dic = diccionarios[col]
+            valor = resultado.get(col)
+            indices[col].append(dic.setdefault(valor, len(dic)))
+
+    columnas = [("timestamp", timestamps, None), ("iterativo", iterativo, None), ("mascara", mascaras, None)]
+    for col in COLUMNAS_DICCIONARIO:
+        dic = diccionarios[col]
+        columnas.append((col, array.array(_tipo_indices(len(dic)), indices[col]), list(dic)))
+
+    bloques = []
+    encabezado_cols = []
+    for nombre, valores, diccionario in columnas:
+        datos = _bloque(valores)
+        bloques.append(datos)
+        meta = {"nombre": nombre, "tipo": valores.typecode, "bytes": len(datos)}
+        if diccionario is not None:
+            meta["diccionario"] = diccionario
+        encabezado_cols.append(meta)
+    encabezado = json.dumps(
+        {"version": VERSION, "fecha": fecha, "filas": len(timestamps), "columnas": encabezado_cols},
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    tmp = destino + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(FIRMA)
+        f.write(struct.pack("<I", len(encabezado)))
+        f.write(encabezado)
+        for datos in bloques:
+            f.write(datos)
+    os.replace(tmp, destino)
+    return len(timestamps)
+
+
+def leer_encabezado(ruta: str) -> dict:
+    with open(ruta, "rb") as f:
+        if f.read(len(FIRMA)) != FIRMA:
+            raise ValueError(f"{ruta} no es un archivo columnar de consultas")
+        (largo,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(largo).decode("utf-8"))
+
+
+def leer_columnar(ruta: str, columnas: Optional[list[str]] = None, decodificar: bool = True) -> dict[str, list]:
+    """
+    Lee el archivo y devuelve {columna: valores}. Con `columnas` sólo se descomprimen esas.
+    Con decodificar=False las columnas de diccionario se devuelven como índices.
+    """
+    salida: dict[str, list] = {}
+    with open(ruta, "rb") as f:
+        if f.read(len(FIRMA)) != FIRMA:
+            raise ValueError(f"{ruta} no es un archivo columnar de consultas")
+        (largo,) = struct.unpack("<I", f.read(4))
+        encabezado = json.loads(f.read(largo).decode("utf-8"))
+        for col in encabezado["columnas"]:
+            if columnas is not None and col["nombre"] not in columnas:
+                f.seek(col["bytes"], os.SEEK_CUR)
+                continue
+            valores = array.array(col["tipo"])
+            valores.frombytes(zlib.decompress(f.read(col["bytes"])))
+            if sys.byteorder == "big":
+                valores.byteswap()
+            if decodificar and "diccionario" in col:
+                dic = col["diccionario"]
+                salida[col["nombre"]] = [dic[i] for i in valores]
+            else:
+                salida[col["nombre"]] = valores.tolist()
+    return salida
+
+
+def exportar_dias_cerrados(rutas: list[str], destino_dir: str, hoy: str, leer=leer_registros) -> list[str]:
+    """
+    Convierte a formato columnar los archivos diarios anteriores a ayer (el mismo margen que
+    la compactación, ver `limite_dias_cerrados`) que aún no tengan su versión columnar (o
+    cuya fuente sea más nueva). Devuelve las rutas generadas.
+    """
+    os.makedirs(destino_dir, exist_ok=True)
+    limite = limite_dias_cerrados(hoy)
+    generados = []
+    for ruta in rutas:
+        nombre = os.path.basename(ruta)
+        fecha = nombre[len("consultas-"):].split(".", 1)[0]
+        if fecha >= limite or not os.path.exists(ruta):
+            continue
+        destino = os.path.join(destino_dir, f"consultas-{fecha}.col")
+        if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(ruta):
+            continue
+        escribir_columnar(leer(ruta), destino, fecha)
+        generados.append(destino)
+    return generados
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "exportar":
+        print("Uso: python -m persistencia.columnar exportar [directorio_data]", file=sys.stderr)
+        return 2
+    data_dir = argv[1] if len(argv) > 1 else directorio_datos()
+    rutas = listar_archivos_consultas(data_dir)
+    hoy = datetime.utcnow().strftime("%Y-%m-%d")
+    generados = exportar_dias_cerrados(rutas, os.path.join(data_dir, "columnar"), hoy)
+    print(f"{len(generados)} archivos columnares generados", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# persistencia/consultas_db.py
+
+# Índice SQLite del historial de consultas. Los archivos consultas-YYYY-MM-DD.jsonl siguen
+# siendo el log crudo; esta tabla es un índice derivado de ellos (fecha, categoría, síntoma,
+# regla) para que listar y agregar sean consultas y no recorridos completos de archivos.
+#
+# El índice se sincroniza leyendo sólo los bytes nuevos de cada archivo (se guarda el offset
+# ya importado), así la migración de los JSONL existentes y la actualización continua son el
+# mismo proceso y ninguna línea se importa dos veces (el offset se lee y avanza dentro de
+# una transacción BEGIN IMMEDIATE, también entre procesos). Se lee por tandas de líneas,
+# así la memoria no depende del tamaño del historial. Los días compactados (.jsonl.gz, ver
+# persistencia/archivos.py) se importan enteros sólo si el día no se había indexado antes.
+#
+# Con `agregados` (persistencia/agregados.py) los contadores de métricas se actualizan en la
+# misma transacción que las filas del índice.
+#
+# Migración manual:
+#   python -m persistencia.consultas_db migrar [directorio_data]
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import closing
+from typing import Callable, Iterator, Optional
+
+from persistencia.archivos import SUFIJO_COMPACTO, directorio_datos, fecha_de_archivo, leer_registros, listar_archivos_consultas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS consultas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha TEXT NOT NULL,
+    timestamp TEXT,
+    categoria TEXT,
+    sintoma TEXT,
+    regla_id TEXT,
+    tecnico_responsable TEXT,
+    iterativo INTEGER NOT NULL DEFAULT 0,
+    mascara INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_consultas_fecha ON consultas (fecha, id);
+CREATE INDEX IF NOT EXISTS idx_consultas_categoria ON consultas (categoria, fecha);
+CREATE INDEX IF NOT EXISTS idx_consultas_sintoma ON consultas (sintoma, fecha);
+CREATE INDEX IF NOT EXISTS idx_consultas_regla ON consultas (regla_id, fecha);
+CREATE TABLE IF NOT EXISTS consultas_archivos (
+    archivo TEXT PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    bytes_leidos INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+SQL_INSERTAR = (
+    "INSERT INTO consultas (fecha, timestamp, categoria, sintoma, regla_id, tecnico_responsable, iterativo, mascara) "
+    "VALUES (?,?,?,?,?,?,?,?)"
+)
+
+# Líneas importadas por transacción al sincronizar: acota la memoria de la migración inicial
+LOTE_SINCRONIZACION = 5000
+
+
+def fila_de_registro(rec: dict, fecha_archivo: str) -> tuple:
+    resultado = rec.get("resultado") or {}
+    timestamp = rec.get("timestamp")
+    fecha = str(timestamp)[:10] if timestamp else fecha_archivo
+    return (
+        fecha,
+        timestamp,
+        resultado.get("categoria"),
+        resultado.get("sintoma"),
+        resultado.get("regla_id"),
+        resultado.get("tecnico_responsable"),
+        1 if rec.get("iterativo") else 0,
+        rec.get("mascara"),
+    )
+
+
+class ConsultasDB:
+    """Acceso al índice de consultas en SQLite (misma base que nuevos_sintomas)."""
+
+    def __init__(self, ruta_db: str, ruta_para_fecha: Optional[Callable[[Optional[str]], str]] = None,
+                 agregados=None):
+        self.ruta_db = ruta_db
+        self.ruta_para_fecha = ruta_para_fecha
+        self.agregados = agregados
+        # Serializa las sincronizaciones (hilo escritor y migración inicial)
+        self._sync_lock = threading.Lock()
+
+    def conectar(self) -> sqlite3.Connection:
+        # Espera generosa: otro proceso puede estar importando una tanda
+        return sqlite3.connect(self.ruta_db, timeout=30.0)
+
+    def inicializar(self) -> None:
+        with closing(self.conectar()) as conn:
+            conn.executescript(ESQUEMA)
+            conn.commit()
+
+    # --- Sincronización con los JSONL ---
+
+    def sincronizar(self, rutas: list[str]) -> int:
+        """
+        Importa las líneas completas nuevas de cada archivo desde el último offset registrado.
+        Devuelve la cantidad de consultas importadas.
+        """
+        importadas = 0
+        with self._sync_lock, closing(self.conectar()) as conn:
+            for ruta in rutas:
+                importadas += self._sincronizar_archivo(conn, ruta)
+        return importadas
+
+    def _sincronizar_archivo(self, conn: sqlite3.Connection, ruta: str) -> int:
+        if not os.path.exists(ruta):
+            return 0
+        if ruta.endswith(SUFIJO_COMPACTO):
+            return self._importar_compactado(conn, ruta)
+        importadas = 0
+        while True:
+            n, completo = self._importar_tramo(conn, ruta)
+            importadas += n
+            if completo:
+                return importadas
+
+    def _importar_tramo(self, conn: sqlite3.Connection, ruta: str) -> tuple[int, bool]:
+        """
+        Importa hasta LOTE_SINCRONIZACION líneas completas desde el offset registrado, en una
+        transacción BEGIN IMMEDIATE: leer el offset, insertar y avanzarlo es atómico aun con
+        varios procesos sincronizando el mismo archivo. Devuelve (importadas, llegó_al_final).
+        """
+        archivo = os.path.basename(ruta)
+        fecha = fecha_de_archivo(ruta)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT bytes_leidos FROM consultas_archivos WHERE archivo = ?", (archivo,)).fetchone()
+            offset = row[0] if row else 0
+            reiniciado = False
+            if os.path.getsize(ruta) < offset:
+                # El archivo fue truncado/reemplazado: reindexarlo desde cero
+                conn.execute("DELETE FROM consultas WHERE fecha = ?", (fecha,))
+                if self.agregados is not None:
+                    self.agregados.borrar_dias(conn, fecha)
+                offset = 0
+                reiniciado = True
+            filas = []
+            leidos = 0
+            lineas = 0
+            completo = True
+            with open(ruta, "rb") as f:
+                f.seek(offset)
+                for linea in f:
+                    if not linea.endswith(b"\n"):
+                        # Línea incompleta (se está escribiendo): queda para la próxima
+                        break
+                    leidos += len(linea)
+                    lineas += 1
+                    if linea.strip():
+                        try:
+                            filas.append(fila_de_registro(json.loads(linea), fecha))
+                        except Exception:
+                            pass
+                    if lineas >= LOTE_SINCRONIZACION:
+                        completo = False
+                        break
+            self._insertar(conn, filas)
+            if leidos or reiniciado:
+                conn.execute(
+                    "INSERT INTO consultas_archivos (archivo, fecha, bytes_leidos) VALUES (?,?,?) "
+                    "ON CONFLICT(archivo) DO UPDATE SET bytes_leidos = excluded.bytes_leidos",
+                    (archivo, fecha, offset + leidos),
+                )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return len(filas), completo
+
+    def _insertar(self, conn: sqlite3.Connection, filas: list[tuple]) -> None:
+        conn.executemany(SQL_INSERTAR, filas)
+        if self.agregados is not None:
+            self.agregados.sumar_filas(conn, filas)
+
+    def _importar_compactado(self, conn: sqlite3.Connection, ruta: str) -> int:
+        # Un .gz no crece ni se puede leer por offset: si el día ya tiene archivo registrado
+        # (se indexó antes de compactarlo) no hay nada nuevo; si no, se importa completo, por
+        # tandas de LOTE_SINCRONIZACION filas y en una sola transacción (todo o nada).
+        fecha = fecha_de_archivo(ruta)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM consultas_archivos WHERE fecha = ? LIMIT 1", (fecha,)).fetchone():
+                conn.rollback()
+                return 0
+            importadas = 0
+            filas = []
+            for rec in leer_registros(ruta):
+                filas.append(fila_de_registro(rec, fecha))
+                if len(filas) >= LOTE_SINCRONIZACION:
+                    self._insertar(conn, filas)
+                    importadas += len(filas)
+                    filas = []
+            self._insertar(conn, filas)
+            importadas += len(filas)
+            conn.execute(
+                "INSERT INTO consultas_archivos (archivo, fecha, bytes_leidos) VALUES (?,?,?)",
+                (os.path.basename(ruta), fecha, os.path.getsize(ruta)),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return importadas
+
+    def __call__(self, records: list[dict]) -> None:
+        """Destino para EscritorConsultas: indexa lo recién anexado a los archivos tocados."""
+        if self.ruta_para_fecha is None:
+            return
+        rutas = {self.ruta_para_fecha(str(rec.get("timestamp") or "")[:10] or None) for rec in records}
+        self.sincronizar(sorted(rutas))
+
+    # --- Consultas ---
+
+    @staticmethod
+    def _filtro(fecha: Optional[str], todas: bool) -> tuple[str, tuple]:
+        if todas:
+            return "", ()
+        return " WHERE fecha = ?", (fecha,)
+
+    def listar(self, limit: int = 100, fecha: Optional[str] = None, todas: bool = False) -> list[dict]:
+        """Últimas `limit` consultas de la selección, más recientes primero."""
+        where, params = self._filtro(fecha, todas)
+        with closing(self.conectar()) as conn:
+            cur = conn.execute(
+                f"SELECT timestamp, categoria, sintoma, regla_id FROM consultas{where} ORDER BY fecha DESC, id DESC LIMIT ?",
+                params + (limit,),
+            )
+            return [
+                {"timestamp": r[0], "categoria": r[1], "sintoma": r[2], "regla_id": r[3]}
+                for r in cur.fetchall()
+            ]
+
+    def iterar(self, limit: Optional[int] = None, fecha: Optional[str] = None, todas: bool = False,
+               lote: int = 500) -> Iterator[tuple]:
+        """
+        Recorre (timestamp, categoria, sintoma, regla_id) más recientes primero, sin límite
+        por defecto, trayendo `lote` filas por vez del cursor. Pensado para exportaciones en
+        streaming: la conexión admite uso desde distintos hilos (uno por vez).
+        """
+        where, params = self._filtro(fecha, todas)
+        sql = f"SELECT timestamp, categoria, sintoma, regla_id FROM consultas{where} ORDER BY fecha DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = params + (limit,)
+        conn = sqlite3.connect(self.ruta_db, check_same_thread=False)
+        try:
+            cur = conn.execute(sql, params)
+            while True:
+                filas = cur.fetchmany(lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            conn.close()
+
+    def contar(self, fecha: Optional[str] = None, todas: bool = False) -> int:
+        where, params = self._filtro(fecha, todas)
+        with closing(self.conectar()) as conn:
+            return int(conn.execute(f"SELECT COUNT(1) FROM consultas{where}", params).fetchone()[0] or 0)
+
+    def purgar(self, fecha: Optional[str] = None, todas: bool = False) -> None:
+        """Elimina del índice lo correspondiente a archivos purgados."""
+        where, params = self._filtro(fecha, todas)
+        with self._sync_lock, closing(self.conectar()) as conn:
+            conn.execute(f"DELETE FROM consultas{where}", params)
+            conn.execute(f"DELETE FROM consultas_archivos{where}", params)
+            if self.agregados is not None:
+                self.agregados.borrar_dias(conn, fecha, todas)
+            conn.commit()
+
+
+def main(argv: Optional[list] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "migrar":
+        print("Uso: python -m persistencia.consultas_db migrar [directorio_data]", file=sys.stderr)
+        return 2
+    data_dir = argv[1] if len(argv) > 1 else directorio_datos()
+    db = ConsultasDB(os.path.join(data_dir, "data.db"))
+    db.inicializar()
+    rutas = listar_archivos_consultas(data_dir)
+    importadas = db.sincronizar(rutas)
+    print(f"{importadas} consultas importadas desde {len(rutas)} archivos", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# persistencia/grupo_commit.py
+
+# Inserciones con commit agrupado ("group commit"). Cada commit de SQLite implica un fsync;
+# con muchas inserciones simultáneas ese fsync es el cuello de botella. Aquí los handlers
+# entregan la fila y reciben un Future; un hilo dedicado junta las filas que lleguen en
+# unos pocos milisegundos, las inserta en una sola transacción y resuelve cada Future con
+# el id asignado a su fila.
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from persistencia.segundo_plano import HiloEscritor
+
+
+class InsercionAgrupada(HiloEscritor):
+    """
+    Cola + hilo escritor (ver segundo_plano.HiloEscritor) para un INSERT parametrizado.
+
+    - enviar(fila): devuelve un Future que se resuelve con el lastrowid de la fila
+      (desde async: `await asyncio.wrap_future(...)`).
+    - El hilo espera la primera fila y junta las que lleguen durante `espera` segundos
+      (hasta `lote`); todas van en una transacción con un solo commit.
+    - Si la transacción falla se reintenta fila por fila, así un error sólo afecta a la
+      fila que lo provoca.
+    - `al_confirmar(n)`, si se indica, se llama tras cada commit con las filas confirmadas.
+    """
+
+    def __init__(self, pool, sql: str, espera: float = 0.005, lote: int = 500, nombre: str = "insercion-agrupada",
+                 al_confirmar: Optional[Callable[[int], None]] = None):
+        super().__init__(nombre, lote=lote, espera=espera)
+        self.pool = pool
+        self.sql = sql
+        self.al_confirmar = al_confirmar
+        self.filas = 0
+        self.commits = 0
+
+    def enviar(self, fila: tuple) -> Future:
+        futuro: Future = Future()
+        self._poner((fila, futuro))
+        return futuro
+
+    def _procesar(self, pendientes: list) -> None:
+        pendientes = [(fila, futuro) for fila, futuro in pendientes if futuro.set_running_or_notify_cancel()]
+        if not pendientes:
+            return
+        try:
+            with self.pool.conexion() as conn:
+                ids = [conn.execute(self.sql, fila).lastrowid for fila, _ in pendientes]
+                conn.commit()
+        except Exception as e:
+            self._error(e)
+            if len(pendientes) > 1:
+                for par in pendientes:
+                    self._escribir_una(*par)
+            else:
+                pendientes[0][1].set_exception(e)
+            return
+        self._confirmadas(len(pendientes))
+        for (_, futuro), id_ in zip(pendientes, ids):
+            futuro.set_result(id_)
+
+    def _escribir_una(self, fila: tuple, futuro: Future) -> None:
+        try:
+            with self.pool.conexion() as conn:
+                id_ = conn.execute(self.sql, fila).lastrowid
+                conn.commit()
+        except Exception as e:
+            self._error(e)
+            futuro.set_exception(e)
+            return
+        self._confirmadas(1)
+        futuro.set_result(id_)
+
+    def _confirmadas(self, n: int) -> None:
+        self.commits += 1
+        self.filas += n
+        if self.al_confirmar is not None:
+            try:
+                self.al_confirmar(n)
+            except Exception as e:
+                self.ultimo_error = str(e)
+
+    def metricas(self) -> dict:
+        return dict(
+            super().metricas(),
+            filas=self.filas,
+            commits=self.commits,
+            filas_por_commit=round(self.filas / self.commits, 2) if self.commits else 0.0,
+            errores=self.errores,
+            ultimo_error=self.ultimo_error,
+        )
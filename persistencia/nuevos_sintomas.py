@@ -0,0 +1,267 @@
+# persistencia/nuevos_sintomas.py
+
+# Acceso a la tabla nuevos_sintomas: esquema, listado paginado por cursor, total en caché y
+# búsqueda de texto completo.
+#
+# - Paginación por cursor (keyset) sobre id: `antes_de` es el último id recibido; la consulta
+#   usa la clave primaria y cuesta lo mismo en la primera página que en la número mil.
+# - El total se cuenta una vez y después se mantiene sumando lo que confirma el escritor,
+#   en lugar de un COUNT(1) (recorrido de tabla) por pedido.
+# - Búsqueda: tabla virtual FTS5 de contenido externo sobre texto y otra_descripcion,
+#   sincronizada con triggers. Si el SQLite instalado no trae FTS5 se cae a LIKE.
+# - Agrupamiento de casi-duplicados (experto_general/agrupamiento.py): un proceso fuera de
+#   línea asigna cluster_id a cada fila; las filas nuevas quedan sin grupo hasta la próxima
+#   corrida.
+#     python -m persistencia.nuevos_sintomas agrupar [directorio_data]
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+from experto_general.agrupamiento import agrupar
+from persistencia.archivos import directorio_datos
+
+SQL_INSERTAR = (
+    "INSERT INTO nuevos_sintomas (texto, categoria_predicha, sintoma, otra_descripcion, user_agent, created_at) "
+    "VALUES (?,?,?,?,?,?)"
+)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS nuevos_sintomas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    texto TEXT NOT NULL,
+    categoria_predicha TEXT,
+    sintoma TEXT,
+    otra_descripcion TEXT,
+    user_agent TEXT,
+    created_at TEXT NOT NULL
+);
+"""
+
+ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE nuevos_sintomas_fts USING fts5(
+    texto, otra_descripcion,
+    content='nuevos_sintomas', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS nuevos_sintomas_fts_ai AFTER INSERT ON nuevos_sintomas BEGIN
+    INSERT INTO nuevos_sintomas_fts (rowid, texto, otra_descripcion) VALUES (new.id, new.texto, new.otra_descripcion);
+END;
+CREATE TRIGGER IF NOT EXISTS nuevos_sintomas_fts_ad AFTER DELETE ON nuevos_sintomas BEGIN
+    INSERT INTO nuevos_sintomas_fts (nuevos_sintomas_fts, rowid, texto, otra_descripcion)
+    VALUES ('delete', old.id, old.texto, old.otra_descripcion);
+END;
+CREATE TRIGGER IF NOT EXISTS nuevos_sintomas_fts_au AFTER UPDATE OF texto, otra_descripcion ON nuevos_sintomas BEGIN
+    INSERT INTO nuevos_sintomas_fts (nuevos_sintomas_fts, rowid, texto, otra_descripcion)
+    VALUES ('delete', old.id, old.texto, old.otra_descripcion);
+    INSERT INTO nuevos_sintomas_fts (rowid, texto, otra_descripcion) VALUES (new.id, new.texto, new.otra_descripcion);
+END;
+"""
+
+COLUMNAS = ("id", "texto", "categoria_predicha", "sintoma", "otra_descripcion", "user_agent", "created_at", "cluster_id")
+_SELECT = "SELECT " + ", ".join(f"s.{c}" for c in COLUMNAS) + " FROM nuevos_sintomas s"
+
+
+def _item(row: tuple) -> dict:
+    return dict(zip(COLUMNAS, row))
+
+
+def terminos_busqueda(q: str) -> list[str]:
+    """Palabras de la búsqueda (sin operadores ni comillas del usuario)."""
+    return re.findall(r"\w+", q or "")
+
+
+class NuevosSintomasDB:
+    """Operaciones sobre nuevos_sintomas usando un PoolSQLite."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.fts = False
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    def inicializar(self) -> None:
+        with self.pool.conexion() as conn:
+            conn.executescript(ESQUEMA)
+            columnas = {r[1] for r in conn.execute("PRAGMA table_info(nuevos_sintomas)")}
+            if "cluster_id" not in columnas:
+                conn.execute("ALTER TABLE nuevos_sintomas ADD COLUMN cluster_id INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_nuevos_sintomas_cluster ON nuevos_sintomas (cluster_id, id)")
+            self.fts = self._inicializar_fts(conn)
+            conn.commit()
+
+    @staticmethod
+    def _inicializar_fts(conn: sqlite3.Connection) -> bool:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'nuevos_sintomas_fts'"
+        ).fetchone()
+        if existe:
+            return True
+        try:
+            conn.executescript(ESQUEMA_FTS)
+        except sqlite3.OperationalError:
+            # SQLite compilado sin FTS5
+            return False
+        # Tabla recién creada: indexar las filas que ya existían
+        conn.execute("INSERT INTO nuevos_sintomas_fts (nuevos_sintomas_fts) VALUES ('rebuild')")
+        return True
+
+    def reconstruir_fts(self) -> None:
+        if not self.fts:
+            return
+        with self.pool.conexion() as conn:
+            conn.execute("INSERT INTO nuevos_sintomas_fts (nuevos_sintomas_fts) VALUES ('rebuild')")
+            conn.commit()
+
+    # --- Total en caché ---
+
+    def total(self) -> int:
+        with self._lock:
+            if self._total is not None:
+                return self._total
+        with self.pool.conexion() as conn:
+            row = conn.execute("SELECT COUNT(1) FROM nuevos_sintomas").fetchone()
+        with self._lock:
+            if self._total is None:
+                self._total = int(row[0] or 0)
+            return self._total
+
+    def sumar(self, n: int) -> None:
+        """Llamado por el escritor tras cada commit (sólo si el total ya se contó)."""
+        with self._lock:
+            if self._total is not None:
+                self._total += n
+
+    # --- Lecturas ---
+
+    def listar(self, limit: int = 50, antes_de: Optional[int] = None, cluster_id: Optional[int] = None) -> list[dict]:
+        """Más recientes primero; con `antes_de` continúa desde ese id (exclusivo)."""
+        condiciones = []
+        params: tuple = ()
+        if antes_de is not None:
+            condiciones.append("s.id < ?")
+            params += (antes_de,)
+        if cluster_id is not None:
+            condiciones.append("s.cluster_id = ?")
+            params += (cluster_id,)
+        sql = _SELECT
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY s.id DESC LIMIT ?"
+        with self.pool.conexion() as conn:
+            return [_item(r) for r in conn.execute(sql, params + (limit,)).fetchall()]
+
+    def buscar(self, q: str, limit: int = 50) -> list[dict]:
+        """
+        Filas que contienen todas las palabras de `q` (por prefijo, sin distinguir acentos ni
+        mayúsculas), ordenadas por relevancia (bm25). Sin FTS5: LIKE, más recientes primero.
+        """
+        terminos = terminos_busqueda(q)
+        if not terminos:
+            return []
+        with self.pool.conexion() as conn:
+            if self.fts:
+                consulta = " ".join(f'"{t}"*' for t in terminos)
+                cur = conn.execute(
+                    f"{_SELECT} JOIN nuevos_sintomas_fts f ON f.rowid = s.id "
+                    "WHERE nuevos_sintomas_fts MATCH ? ORDER BY f.rank LIMIT ?",
+                    (consulta, limit),
+                )
+            else:
+                condiciones = " AND ".join(
+                    "(s.texto LIKE ? ESCAPE '\\' OR s.otra_descripcion LIKE ? ESCAPE '\\')" for _ in terminos
+                )
+                params = []
+                for t in terminos:
+                    patron = "%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                    params += [patron, patron]
+                cur = conn.execute(
+                    f"{_SELECT} WHERE {condiciones} ORDER BY s.id DESC LIMIT ?", tuple(params) + (limit,)
+                )
+            return [_item(r) for r in cur.fetchall()]
+
+    # --- Agrupamiento de casi-duplicados ---
+
+    def agrupar(self, lote: int = 5000) -> dict:
+        """
+        Recalcula cluster_id para todas las filas (ver experto_general/agrupamiento.py) y lo
+        escribe en una sola transacción. Devuelve un resumen de la corrida.
+        """
+        inicio = time.monotonic()
+        # Conexión propia para el recorrido completo: no retiene una del pool
+        conn = self.pool.conectar()
+        try:
+            def textos():
+                cur = conn.execute("SELECT id, texto, otra_descripcion FROM nuevos_sintomas ORDER BY id")
+                while True:
+                    filas = cur.fetchmany(lote)
+                    if not filas:
+                        break
+                    for id_, texto, otra in filas:
+                        yield id_, f"{texto or ''} {otra or ''}"
+
+            asignacion = agrupar(textos())
+        finally:
+            conn.close()
+        with self.pool.conexion() as conn:
+            conn.executemany(
+                "UPDATE nuevos_sintomas SET cluster_id = ? WHERE id = ?",
+                ((cluster, id_) for id_, cluster in asignacion.items()),
+            )
+            conn.commit()
+        tamanos: dict[int, int] = {}
+        for cluster in asignacion.values():
+            tamanos[cluster] = tamanos.get(cluster, 0) + 1
+        return {
+            "filas": len(asignacion),
+            "clusters": len(tamanos),
+            "clusters_con_duplicados": sum(1 for n in tamanos.values() if n > 1),
+            "segundos": round(time.monotonic() - inicio, 3),
+        }
+
+    def clusters(self, min_tamano: int = 2, limit: int = 50, ejemplos: int = 3) -> list[dict]:
+        """Grupos con al menos `min_tamano` filas, los más grandes primero, con textos de ejemplo."""
+        with self.pool.conexion() as conn:
+            grupos = conn.execute(
+                "SELECT cluster_id, COUNT(1) AS n, MAX(created_at) FROM nuevos_sintomas "
+                "WHERE cluster_id IS NOT NULL GROUP BY cluster_id HAVING n >= ? ORDER BY n DESC, cluster_id LIMIT ?",
+                (min_tamano, limit),
+            ).fetchall()
+            salida = []
+            for cluster_id, n, ultimo in grupos:
+                textos = conn.execute(
+                    "SELECT texto FROM nuevos_sintomas WHERE cluster_id = ? ORDER BY id LIMIT ?",
+                    (cluster_id, ejemplos),
+                ).fetchall()
+                salida.append({
+                    "cluster_id": cluster_id,
+                    "tamano": n,
+                    "ultimo": ultimo,
+                    "ejemplos": [t[0] for t in textos],
+                })
+            return salida
+
+
+def main(argv: Optional[list] = None) -> int:
+    from persistencia.sqlite_pool import PoolSQLite
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "agrupar":
+        print("Uso: python -m persistencia.nuevos_sintomas agrupar [directorio_data]", file=sys.stderr)
+        return 2
+    data_dir = argv[1] if len(argv) > 1 else directorio_datos()
+    pool = PoolSQLite(os.path.join(data_dir, "data.db"), tamano=1)
+    db = NuevosSintomasDB(pool)
+    db.inicializar()
+    resumen = db.agrupar()
+    pool.cerrar()
+    print(json.dumps(resumen, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# persistencia/registro.py
+
+# Escritura en segundo plano del log de consultas. Los handlers sólo encolan el registro
+# (operación en memoria, no bloquea el event loop); un hilo dedicado agrupa los registros
+# y los vuelca por tamaño o por tiempo, una escritura por archivo diario.
+import json
+from typing import Callable
+
+from persistencia.segundo_plano import HiloEscritor
+
+
+class AnexarJSONL:
+    """Destino que anexa los registros al archivo diario correspondiente a su timestamp."""
+
+    def __init__(self, ruta_para_fecha: Callable[[str], str]):
+        self.ruta_para_fecha = ruta_para_fecha
+
+    def __call__(self, records: list[dict]) -> None:
+        por_archivo: dict[str, list[str]] = {}
+        for rec in records:
+            # Rotación diaria: la fecha sale del propio registro (YYYY-MM-DD...)
+            fecha = str(rec.get("timestamp") or "")[:10] or None
+            ruta = self.ruta_para_fecha(fecha)
+            por_archivo.setdefault(ruta, []).append(json.dumps(rec, ensure_ascii=False) + "\n")
+        for ruta, lineas in por_archivo.items():
+            with open(ruta, "a", encoding="utf-8") as f:
+                f.write("".join(lineas))
+
+
+class EscritorConsultas(HiloEscritor):
+    """
+    Cola acotada + hilo escritor (ver segundo_plano.HiloEscritor).
+
+    - encolar()/encolar_muchos(): no bloquean; si la cola está llena el registro se descarta
+      y se cuenta en `descartados`.
+    - El hilo vuelca cuando junta `lote` registros o pasan `intervalo` segundos desde el
+      primero.
+    - Cada lote se entrega a todos los `destinos` (callables que reciben list[dict]).
+    - detener(): vuelca lo pendiente y termina el hilo (se registra también en atexit).
+    """
+
+    def __init__(self, destinos: list, capacidad: int = 10000, lote: int = 500, intervalo: float = 0.5):
+        super().__init__("escritor-consultas", capacidad=capacidad, lote=lote, espera=intervalo)
+        self.destinos = list(destinos)
+        self.encolados = 0
+        self.escritos = 0
+        self.descartados = 0
+
+    def encolar(self, record: dict) -> bool:
+        if not self._poner(record):
+            self.descartados += 1
+            return False
+        self.encolados += 1
+        return True
+
+    def encolar_muchos(self, records: list[dict]) -> int:
+        return sum(1 for rec in records if self.encolar(rec))
+
+    def _procesar(self, records: list[dict]) -> None:
+        for destino in self.destinos:
+            try:
+                destino(records)
+            except Exception as e:
+                # Un destino con problemas no impide escribir en los demás
+                self._error(e)
+        self.escritos += len(records)
+
+    def metricas(self) -> dict:
+        return dict(
+            super().metricas(),
+            capacidad=self._cola.maxsize,
+            encolados=self.encolados,
+            escritos=self.escritos,
+            descartados=self.descartados,
+            errores=self.errores,
+            ultimo_error=self.ultimo_error,
+        )
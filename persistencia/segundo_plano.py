@@ -0,0 +1,128 @@
+# persistencia/segundo_plano.py
+
+# Base de los escritores en segundo plano (registro.EscritorConsultas y
+# grupo_commit.InsercionAgrupada): una cola, un hilo dedicado que la consume por lotes y el
+# ciclo de vida (iniciar / detener, también al salir del proceso vía atexit).
+import atexit
+import queue
+import threading
+import time
+from typing import Optional
+
+# Marca interna para despertar al hilo y pedirle que termine
+_FIN = object()
+
+
+class HiloEscritor:
+    """
+    Cola + hilo que entrega los elementos por lotes a `_procesar(lote)`, que define cada
+    subclase.
+
+    - El hilo espera el primer elemento y junta los que lleguen durante `espera` segundos
+      (hasta `lote`); si no llega nada, no se despierta.
+    - `capacidad` acota la cola (0: sin límite); `_poner` devuelve False si está llena.
+    - detener(): procesa lo pendiente y termina el hilo (se registra también en atexit).
+    """
+
+    def __init__(self, nombre: str, capacidad: int = 0, lote: int = 500, espera: float = 0.005):
+        self.nombre = nombre
+        self.lote = lote
+        self.espera = espera
+        self._cola: "queue.Queue" = queue.Queue(maxsize=capacidad)
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._atexit = False
+        self.errores = 0
+        self.ultimo_error: Optional[str] = None
+
+    def activo(self) -> bool:
+        return bool(self._hilo and self._hilo.is_alive())
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self.activo():
+                return
+            self._hilo = threading.Thread(target=self._bucle, name=self.nombre, daemon=True)
+            self._hilo.start()
+            if not self._atexit:
+                atexit.register(self.detener)
+                self._atexit = True
+
+    def _poner(self, item) -> bool:
+        if not self.activo():
+            self.iniciar()
+        try:
+            self._cola.put_nowait(item)
+        except queue.Full:
+            return False
+        return True
+
+    def vaciar(self, timeout: float = 5.0) -> bool:
+        """Espera a que todo lo encolado hasta ahora esté procesado. Devuelve False si vence el plazo."""
+        limite = time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if not self.activo() or time.monotonic() > limite:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def detener(self, timeout: float = 5.0) -> None:
+        hilo = self._hilo
+        if hilo is None or not hilo.is_alive():
+            return
+        try:
+            self._cola.put(_FIN, timeout=timeout)
+        except queue.Full:
+            pass
+        hilo.join(timeout)
+
+    def _bucle(self) -> None:
+        terminar = False
+        while not terminar:
+            item = self._cola.get()
+            if item is _FIN:
+                self._cola.task_done()
+                break
+            pendientes = [item]
+            limite = time.monotonic() + self.espera
+            # Juntar lo que llegue durante la ventana de espera
+            while len(pendientes) < self.lote:
+                restante = limite - time.monotonic()
+                try:
+                    item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _FIN:
+                    self._cola.task_done()
+                    terminar = True
+                    break
+                pendientes.append(item)
+            if terminar:
+                # Lo que quede en la cola también se procesa antes de salir
+                while True:
+                    try:
+                        item = self._cola.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _FIN:
+                        self._cola.task_done()
+                        continue
+                    pendientes.append(item)
+            try:
+                self._procesar(pendientes)
+            except Exception as e:
+                # No perder el hilo por un lote con problemas
+                self._error(e)
+            finally:
+                for _ in pendientes:
+                    self._cola.task_done()
+
+    def _procesar(self, lote: list) -> None:
+        raise NotImplementedError
+
+    def _error(self, e: Exception) -> None:
+        self.errores += 1
+        self.ultimo_error = str(e)
+
+    def metricas(self) -> dict:
+        return {"activo": self.activo(), "en_cola": self._cola.qsize()}
@@ -0,0 +1,109 @@
+# persistencia/sqlite_pool.py
+
+# Pool chico de conexiones SQLite reutilizables, configuradas para acceso concurrente:
+# - journal_mode=WAL: los lectores no bloquean al escritor ni viceversa.
+# - synchronous=NORMAL: con WAL es seguro ante caídas del proceso y evita un fsync por commit.
+# - busy_timeout: ante un bloqueo se espera en vez de fallar con "database is locked".
+#
+# Las conexiones se crean con check_same_thread=False porque se usan desde los hilos del
+# threadpool; el pool garantiza que cada una la use un solo hilo por vez.
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+
+
+class PoolSQLite:
+    """Hasta `tamano` conexiones abiertas; si están todas en uso se espera hasta `espera` s."""
+
+    def __init__(self, ruta_db: str, tamano: int = 4, espera: float = 10.0):
+        self.ruta_db = ruta_db
+        self.tamano = tamano
+        self.espera = espera
+        self._libres: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._abiertas = 0
+        self._prestamos = 0
+        self._esperas = 0
+
+    def conectar(self) -> sqlite3.Connection:
+        """Conexión nueva con los pragmas del pool (fuera del pool, p. ej. para exportaciones largas)."""
+        conn = sqlite3.connect(self.ruta_db, timeout=5.0, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _tomar(self) -> sqlite3.Connection:
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._abiertas < self.tamano:
+                self._abiertas += 1
+                crear = True
+            else:
+                self._esperas += 1
+                crear = False
+        if crear:
+            try:
+                return self.conectar()
+            except Exception:
+                with self._lock:
+                    self._abiertas -= 1
+                raise
+        try:
+            return self._libres.get(timeout=self.espera)
+        except queue.Empty:
+            raise TimeoutError("no hay conexiones SQLite libres") from None
+
+    @contextmanager
+    def conexion(self) -> Iterator[sqlite3.Connection]:
+        """Presta una conexión; ante un error se hace rollback antes de devolverla."""
+        conn = self._tomar()
+        with self._lock:
+            self._prestamos += 1
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                # Conexión inutilizable: se descarta
+                conn.close()
+                with self._lock:
+                    self._abiertas -= 1
+                raise
+            self._libres.put(conn)
+            raise
+        else:
+            self._libres.put(conn)
+
+    def cerrar(self) -> None:
+        while True:
+            try:
+                conn = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._abiertas -= 1
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {
+                "tamano": self.tamano,
+                "abiertas": self._abiertas,
+                "libres": self._libres.qsize(),
+                "prestamos": self._prestamos,
+                "esperas": self._esperas,
+            }
@@ -0,0 +1,78 @@
+# persistencia/tail.py
+
+# Lectura de las últimas consultas directamente de los JSONL, sin índice: se lee cada
+# archivo desde el final hacia atrás en bloques y se pasa al archivo anterior sólo si hace
+# falta. Memoria O(limit) y latencia independiente del tamaño del historial.
+# Los días compactados (.jsonl.gz) no admiten lectura hacia atrás: se descomprimen hacia
+# adelante conservando sólo las últimas líneas necesarias.
+import gzip
+import json
+import os
+from collections import deque
+from typing import Iterator
+
+from persistencia.archivos import SUFIJO_COMPACTO
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+def lineas_al_reves(ruta: str, bloque: int = TAMANO_BLOQUE) -> Iterator[bytes]:
+    """Devuelve las líneas del archivo de la última a la primera, leyendo por bloques."""
+    with open(ruta, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        resto = b""
+        while pos > 0:
+            leer = min(bloque, pos)
+            pos -= leer
+            f.seek(pos)
+            datos = f.read(leer) + resto
+            lineas = datos.split(b"\n")
+            # La primera puede estar cortada: se completa con el bloque anterior
+            resto = lineas[0]
+            for linea in reversed(lineas[1:]):
+                if linea.strip():
+                    yield linea
+        if resto.strip():
+            yield resto
+
+
+def _ultimas_lineas_gz(ruta: str, n: int) -> Iterator[bytes]:
+    with gzip.open(ruta, "rb") as f:
+        ultimas = deque((linea for linea in f if linea.strip()), maxlen=n)
+    return reversed(ultimas)
+
+
+def _item(rec: dict) -> dict:
+    resultado = rec.get("resultado") or {}
+    return {
+        "timestamp": rec.get("timestamp"),
+        "categoria": resultado.get("categoria"),
+        "sintoma": resultado.get("sintoma"),
+        "regla_id": resultado.get("regla_id"),
+    }
+
+
+def ultimas_consultas(rutas: list[str], limit: int) -> list[dict]:
+    """
+    Las `limit` consultas más recientes (más nuevas primero) de `rutas`, que deben venir en
+    orden cronológico (como list_consultas_files). Se detiene apenas junta `limit`.
+    """
+    items: list[dict] = []
+    if limit <= 0:
+        return items
+    for ruta in reversed(rutas):
+        if not os.path.exists(ruta):
+            continue
+        if ruta.endswith(SUFIJO_COMPACTO):
+            lineas = _ultimas_lineas_gz(ruta, limit - len(items))
+        else:
+            lineas = lineas_al_reves(ruta)
+        for linea in lineas:
+            try:
+                items.append(_item(json.loads(linea)))
+            except Exception:
+                continue
+            if len(items) >= limit:
+                return items
+    return items
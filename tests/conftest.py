@@ -0,0 +1,23 @@
+# tests/conftest.py
+
+# Fixtures compartidas. `cliente` importa la API con un directorio de datos temporal
+# (EXPERTO_DATA_DIR), así las pruebas no escriben en data/.
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(scope="session")
+def cliente(tmp_path_factory):
+    from fastapi.testclient import TestClient
+
+    os.environ["EXPERTO_DATA_DIR"] = str(tmp_path_factory.mktemp("data"))
+    import main
+
+    with TestClient(main.app) as c:
+        yield c
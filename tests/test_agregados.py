@@ -0,0 +1,103 @@
+# tests/test_agregados.py
+
+# Contadores de métricas en SQLite: la suma incremental del índice coincide con la
+# reconstrucción, y varias instancias sobre la misma base no cuentan dos veces.
+import json
+
+from persistencia.agregados import Agregados
+from persistencia.consultas_db import ConsultasDB
+
+
+def _linea(i: int, dia: str = "2026-10-17") -> str:
+    rec = {
+        "timestamp": f"{dia}T10:00:{i % 60:02d}",
+        "hechos": {"ram_falla": i % 2 == 0},
+        "resultado": {"categoria": "Hardware" if i % 3 else "", "regla_id": f"R-{i % 4}"},
+    }
+    return json.dumps(rec) + "\n"
+
+
+def _preparar(tmp_path):
+    ruta_db = str(tmp_path / "data.db")
+    agregados = Agregados(ruta_db)
+    assert agregados.inicializar() is True
+    assert agregados.inicializar() is False
+    db = ConsultasDB(ruta_db, agregados=agregados)
+    db.inicializar()
+    return agregados, db
+
+
+def test_suma_incremental_igual_a_reconstruir(tmp_path):
+    agregados, db = _preparar(tmp_path)
+    hoy = tmp_path / "consultas-2026-10-17.jsonl"
+    ayer = tmp_path / "consultas-2026-10-16.jsonl"
+    hoy.write_text("".join(_linea(i) for i in range(30)), encoding="utf-8")
+    ayer.write_text("".join(_linea(i, "2026-10-16") for i in range(5)), encoding="utf-8")
+    db.sincronizar([str(hoy), str(ayer)])
+
+    incremental = agregados.consultas(todas=True)
+    assert incremental["total"] == 35
+    assert incremental["por_dia"] == {"2026-10-16": 5, "2026-10-17": 30}
+    assert agregados.total_consultas(fecha="2026-10-17") == 30
+    assert sum(incremental["por_regla"].values()) == 35
+    assert "(desconocida)" in incremental["por_categoria"]
+
+    agregados.reconstruir(None)
+    assert agregados.consultas(todas=True) == incremental
+    assert agregados.consultas(fecha="2026-10-16")["total"] == 5
+
+
+def test_dos_instancias_no_cuentan_dos_veces(tmp_path):
+    agregados, db = _preparar(tmp_path)
+    otra = ConsultasDB(db.ruta_db, agregados=Agregados(db.ruta_db))
+    ruta = tmp_path / "consultas-2026-10-17.jsonl"
+    ruta.write_text("".join(_linea(i) for i in range(10)), encoding="utf-8")
+    assert db.sincronizar([str(ruta)]) + otra.sincronizar([str(ruta)]) == 10
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(_linea(10))
+    otra.sincronizar([str(ruta)])
+    db.sincronizar([str(ruta)])
+    assert agregados.total_consultas(todas=True) == 11
+
+
+def test_purga_y_reindexado_descuentan(tmp_path):
+    agregados, db = _preparar(tmp_path)
+    hoy = tmp_path / "consultas-2026-10-17.jsonl"
+    ayer = tmp_path / "consultas-2026-10-16.jsonl"
+    hoy.write_text("".join(_linea(i) for i in range(8)), encoding="utf-8")
+    ayer.write_text(_linea(0, "2026-10-16"), encoding="utf-8")
+    db.sincronizar([str(hoy), str(ayer)])
+
+    # Archivo reemplazado por uno más corto: el día se vuelve a contar desde cero
+    hoy.write_text(_linea(0), encoding="utf-8")
+    db.sincronizar([str(hoy)])
+    assert agregados.consultas(todas=True)["por_dia"] == {"2026-10-16": 1, "2026-10-17": 1}
+
+    db.purgar(fecha="2026-10-16")
+    assert agregados.consultas(todas=True)["por_dia"] == {"2026-10-17": 1}
+    db.purgar(todas=True)
+    assert agregados.total_consultas(todas=True) == 0
+
+
+def test_feedback(tmp_path):
+    agregados, _ = _preparar(tmp_path)
+    registros = [
+        {"categoria_predicha": "Hardware", "categoria_correcta": "Hardware"},
+        {"categoria_predicha": "Hardware", "categoria_correcta": "Redes"},
+    ]
+    for rec in registros:
+        agregados.registrar_feedback(rec)
+    assert agregados.feedback() == {"total": 2, "matches": 1, "mismatches": 1}
+
+    ruta = tmp_path / "feedback.jsonl"
+    ruta.write_text("".join(json.dumps(r) + "\n" for r in registros) + "{roto\n", encoding="utf-8")
+    agregados.reconstruir(str(ruta))
+    assert agregados.feedback() == {"total": 3, "matches": 1, "mismatches": 1}
+
+
+def test_metricas_por_la_api(cliente):
+    r = cliente.post("/feedback", json={"categoria_predicha": "Hardware", "categoria_correcta": "Hardware"})
+    assert r.status_code == 200
+    fb = cliente.get("/feedback/metrics").json()
+    assert fb["total"] >= 1 and fb["matches"] >= 1
+    assert "por_dia" in cliente.get("/consultas/metrics", params={"all": True}).json()
@@ -0,0 +1,77 @@
+# tests/test_columnar.py
+
+# Exportación columnar de consultas: lo que se escribe se lee igual.
+import json
+import os
+
+from experto_general.hechos import codificar_hechos
+from persistencia.columnar import escribir_columnar, exportar_dias_cerrados, leer_columnar, leer_encabezado
+
+
+def _consulta(i: int, fecha: str = "2026-10-17") -> dict:
+    return {
+        "timestamp": f"{fecha}T10:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}",
+        "iterativo": i % 3 == 0,
+        "facts": {"ram_falla": i % 2 == 0, "disco_falla": i % 5 == 0},
+        "resultado": {
+            "categoria": "Hardware" if i % 4 else None,
+            "sintoma": f"s{i % 7}",
+            "regla_id": f"R-{i % 11}",
+            "tecnico_responsable": "Técnico Juan",
+        },
+    }
+
+
+def test_columnar_ida_y_vuelta(tmp_path):
+    registros = [_consulta(i) for i in range(300)]
+    registros.append({"timestamp": "2026-10-17T23:59:59.999999+00:00", "mascara": 5, "resultado": {}})
+    ruta = str(tmp_path / "consultas-2026-10-17.col")
+    assert escribir_columnar(iter(registros), ruta, "2026-10-17") == len(registros)
+
+    encabezado = leer_encabezado(ruta)
+    assert encabezado["fecha"] == "2026-10-17" and encabezado["filas"] == len(registros)
+
+    cols = leer_columnar(ruta)
+    assert cols["iterativo"] == [1 if r.get("iterativo") else 0 for r in registros]
+    assert cols["mascara"][:-1] == [codificar_hechos(r["facts"]) for r in registros[:-1]]
+    assert cols["mascara"][-1] == 5
+    for col in ("categoria", "sintoma", "regla_id", "tecnico_responsable"):
+        assert cols[col] == [r["resultado"].get(col) for r in registros]
+    # Microsegundos exactos (sin pasar por float)
+    assert cols["timestamp"][-1] == 1792281599999999
+    assert cols["timestamp"][1] - cols["timestamp"][0] == 1_000_001
+
+
+def test_columnar_subconjunto_de_columnas(tmp_path):
+    ruta = str(tmp_path / "c.col")
+    escribir_columnar([_consulta(i) for i in range(10)], ruta, "2026-10-17")
+    cols = leer_columnar(ruta, columnas=["sintoma"], decodificar=False)
+    assert list(cols) == ["sintoma"]
+    assert cols["sintoma"] == [i % 7 for i in range(10)]
+
+
+def test_exporta_solo_dias_anteriores_a_ayer(tmp_path):
+    rutas = []
+    for fecha in ("2026-10-15", "2026-10-16", "2026-10-17"):
+        ruta = tmp_path / f"consultas-{fecha}.jsonl"
+        ruta.write_text(json.dumps(_consulta(0, fecha)) + "\n", encoding="utf-8")
+        rutas.append(str(ruta))
+    destino = tmp_path / "columnar"
+    generados = exportar_dias_cerrados(rutas, str(destino), "2026-10-17")
+    assert [os.path.basename(p) for p in generados] == ["consultas-2026-10-15.col"]
+    assert exportar_dias_cerrados(rutas, str(destino), "2026-10-17") == []
+
+
+def test_purga_borra_el_columnar_del_dia(cliente):
+    import main
+
+    fecha = "2026-01-01"
+    jsonl = os.path.join(main.DATA_DIR, f"consultas-{fecha}.jsonl")
+    with open(jsonl, "w", encoding="utf-8") as f:
+        f.write(json.dumps(_consulta(0, fecha)) + "\n")
+    assert "consultas-2026-01-01.col" in cliente.post("/consultas/columnar/exportar").json()["generados"]
+
+    r = cliente.post("/consultas/purge", params={"date": fecha}).json()
+    assert r == {"deleted": 1, "deleted_columnar": 1}
+    assert not os.path.exists(os.path.join(main.COLUMNAR_DIR, f"consultas-{fecha}.col"))
+    assert cliente.post("/consultas/purge", params={"date": "../x"}).json()["deleted_columnar"] == 0
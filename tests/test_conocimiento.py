@@ -0,0 +1,94 @@
+# tests/test_conocimiento.py
+
+# Recarga de la base de conocimiento (BaseActiva) y caché invalidada por versión.
+import json
+import threading
+
+from experto_general.cache import CacheLRU
+from experto_general.conocimiento import BaseActiva, Conocimiento, datos_integrados
+
+
+def _escribir(ruta, datos: dict) -> None:
+    ruta.write_text(json.dumps(datos, ensure_ascii=False), encoding="utf-8")
+
+
+def test_recarga_publica_version_nueva_y_conserva_la_anterior(tmp_path):
+    ruta = tmp_path / "base.json"
+    datos = datos_integrados()
+    _escribir(ruta, datos)
+    activa = BaseActiva(Conocimiento.desde_archivo(str(ruta)), str(ruta))
+    preparadas = []
+    activa.al_reemplazar(lambda nueva: preparadas.append((nueva.version, activa.actual().version)))
+    vieja = activa.actual()
+
+    # Sin cambios de contenido no se publica nada
+    assert activa.recargar() is False
+    assert activa.actual() is vieja
+
+    tecnicos = dict(datos["tecnicos"], Hardware="Técnica Ana")
+    _escribir(ruta, dict(datos, tecnicos=tecnicos))
+    assert activa.recargar() is True
+    nueva = activa.actual()
+    assert nueva.version == vieja.version + 1
+    assert nueva.tecnicos["Hardware"] == "Técnica Ana"
+    # La versión tomada antes de la recarga no cambia
+    assert vieja.tecnicos["Hardware"] == datos["tecnicos"]["Hardware"]
+    # El preparador corre antes de publicar
+    assert preparadas == [(nueva.version, vieja.version)]
+
+    # Un archivo inválido no reemplaza la versión vigente
+    ruta.write_text("{roto", encoding="utf-8")
+    assert activa.recargar() is False
+    assert activa.actual() is nueva
+    assert activa.errores == 1 and activa.ultimo_error
+
+    _escribir(ruta, dict(datos, reglas="no es una lista"))
+    assert activa.recargar() is False
+    assert activa.actual() is nueva
+    assert activa.metricas()["errores"] == 2
+
+
+def test_recargas_simultaneas_publican_una_sola_version(tmp_path):
+    ruta = tmp_path / "base.json"
+    datos = datos_integrados()
+    _escribir(ruta, datos)
+    activa = BaseActiva(Conocimiento.desde_archivo(str(ruta)), str(ruta))
+    preparadas = []
+    activa.al_reemplazar(lambda nueva: preparadas.append(nueva.version))
+    _escribir(ruta, dict(datos, tecnicos=dict(datos["tecnicos"], Redes="Técnico Leo")))
+
+    hilos = [threading.Thread(target=activa.recargar) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert activa.recargas == 1 and preparadas == [2]
+    assert activa.actual().version == 2
+
+
+def test_reemplazar_no_modifica_la_base_recibida():
+    activa = BaseActiva(Conocimiento(datos_integrados()))
+    nueva = Conocimiento(datos_integrados())
+    publicada = activa.reemplazar(nueva)
+    assert publicada is not nueva and publicada is activa.actual()
+    assert (nueva.version, publicada.version) == (1, 2)
+    assert publicada.compilada is nueva.compilada
+
+
+def test_cache_se_invalida_solo_con_version_nueva():
+    cache = CacheLRU(8)
+    cache.guardar("a", 1, version=1)
+    assert cache.obtener("a", version=1) == 1
+
+    # Una petición que empezó antes de la recarga no vacía la caché ni la usa
+    cache.guardar("b", 2, version=0)
+    assert cache.obtener("a", version=0) is None
+    assert cache.obtener("b", version=1) is None
+    assert cache.obtener("a", version=1) == 1
+
+    # La versión nueva la vacía una sola vez
+    assert cache.obtener("a", version=2) is None
+    cache.guardar("a", 3, version=2)
+    cache.guardar("a", 99, version=1)
+    assert cache.obtener("a", version=2) == 3
+    assert cache.metricas()["invalidaciones"] == 1
@@ -0,0 +1,51 @@
+# tests/test_consultas_db.py
+
+# Sincronización del índice de consultas con los JSONL: por tandas, sin duplicar líneas
+# aunque varios procesos sincronicen el mismo archivo.
+import json
+import multiprocessing
+
+from persistencia import consultas_db
+from persistencia.consultas_db import ConsultasDB
+
+
+def _linea(i: int) -> str:
+    return json.dumps({"timestamp": f"2026-10-17T10:00:{i % 60:02d}", "resultado": {"regla_id": f"R-{i}"}}) + "\n"
+
+
+def _sincronizar(ruta_db: str, ruta: str) -> int:
+    return ConsultasDB(ruta_db).sincronizar([ruta])
+
+
+def test_sincroniza_por_tandas_y_retoma_desde_el_offset(tmp_path, monkeypatch):
+    monkeypatch.setattr(consultas_db, "LOTE_SINCRONIZACION", 7)
+    ruta = tmp_path / "consultas-2026-10-17.jsonl"
+    ruta.write_text("".join(_linea(i) for i in range(50)) + "\n{roto\n" + '{"timestamp": "2026-10-17T11', encoding="utf-8")
+    db = ConsultasDB(str(tmp_path / "data.db"))
+    db.inicializar()
+
+    assert db.sincronizar([str(ruta)]) == 50
+    assert db.sincronizar([str(ruta)]) == 0
+    # Se completa la línea que se estaba escribiendo
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(':00:00", "resultado": {"regla_id": "R-50"}}\n' + _linea(51))
+    assert db.sincronizar([str(ruta)]) == 2
+    assert db.contar(todas=True) == 52
+    assert db.listar(limit=1, todas=True)[0]["regla_id"] == "R-51"
+
+    # Archivo reemplazado por uno más corto: se reindexa desde cero
+    ruta.write_text(_linea(0), encoding="utf-8")
+    assert db.sincronizar([str(ruta)]) == 1
+    assert db.contar(todas=True) == 1
+
+
+def test_procesos_concurrentes_no_duplican(tmp_path):
+    ruta = tmp_path / "consultas-2026-10-17.jsonl"
+    ruta.write_text("".join(_linea(i) for i in range(20000)), encoding="utf-8")
+    ruta_db = str(tmp_path / "data.db")
+    ConsultasDB(ruta_db).inicializar()
+
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        importadas = pool.starmap(_sincronizar, [(ruta_db, str(ruta))] * 4)
+    assert sum(importadas) == 20000
+    assert ConsultasDB(ruta_db).contar(todas=True) == 20000
@@ -0,0 +1,15 @@
+# tests/test_hechos.py
+
+# Las banderas de experto_general/hechos.py deben seguir el orden de los campos booleanos
+# de TicketFacts (main.py): el orden define los bits de las máscaras ya registradas y qué
+# síntoma se considera "activo" cuando llegan varios.
+from experto_general.hechos import BANDERAS, BIT, SINTOMAS
+
+
+def test_banderas_en_el_orden_de_ticketfacts(cliente):
+    import main
+
+    campos = [nombre for nombre, campo in main.TicketFacts.model_fields.items() if campo.annotation is bool]
+    assert list(BANDERAS) == campos
+    assert SINTOMAS == BANDERAS[:-1] and BANDERAS[-1] == "otra_causa"
+    assert [BIT[n] for n in BANDERAS] == [1 << i for i in range(len(BANDERAS))]
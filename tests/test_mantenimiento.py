@@ -0,0 +1,27 @@
+# tests/test_mantenimiento.py
+
+# Hilo de mantenimiento de la API: repite la pasada (índice, columnar, compactación) cada
+# INTERVALO_MANTENIMIENTO segundos hasta que se pide terminar.
+import threading
+
+
+def test_mantenimiento_se_repite_hasta_detenerlo(cliente, monkeypatch):
+    import main
+
+    pasadas = []
+    tres = threading.Event()
+
+    def pasada():
+        pasadas.append(1)
+        if len(pasadas) >= 3:
+            tres.set()
+
+    monkeypatch.setattr(main, "_mantenimiento_consultas", pasada)
+    monkeypatch.setattr(main, "INTERVALO_MANTENIMIENTO", 0.01)
+    monkeypatch.setattr(main, "FIN_MANTENIMIENTO", threading.Event())
+    hilo = threading.Thread(target=main._bucle_mantenimiento, daemon=True)
+    hilo.start()
+    assert tres.wait(5.0)
+    main.FIN_MANTENIMIENTO.set()
+    hilo.join(5.0)
+    assert not hilo.is_alive()
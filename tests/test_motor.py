@@ -0,0 +1,65 @@
+# tests/test_motor.py
+
+# Los motores compilados (índice + máscara de bits) deben dar lo mismo que el recorrido
+# lineal original: evaluar `condicion` regla por regla, en orden de prioridad.
+import itertools
+import random
+
+from experto_general.acciones import motor_inferencia, motor_inferencia_mascara, ranking_reglas
+from experto_general.base_conocimiento import REGLAS_CLASIFICACION
+from experto_general.compilador import compilar_reglas
+from experto_general.hechos import BIT, codificar_hechos
+
+SINTOMAS = [nombre for nombre in BIT if nombre != "otra_causa"]
+
+
+def _cumple(regla: dict, hechos: dict) -> bool:
+    try:
+        return bool(regla["condicion"](hechos))
+    except KeyError:
+        return False
+
+
+def _primera_lineal(hechos: dict):
+    for regla in REGLAS_CLASIFICACION:
+        if _cumple(regla, hechos):
+            return regla["resultado"], regla["id"]
+    return "Sin clasificar (General)", None
+
+
+def _casos() -> list[dict]:
+    casos = [{}]
+    casos += [{a: True} for a in SINTOMAS]
+    casos += [{a: True, b: True} for a, b in itertools.combinations(SINTOMAS, 2)]
+    azar = random.Random(7)
+    casos += [{n: azar.random() < 0.25 for n in SINTOMAS} for _ in range(500)]
+    return [{n: bool(c.get(n)) for n in BIT} for c in casos]
+
+
+CASOS = _casos()
+
+
+def test_mascara_igual_a_recorrido_lineal():
+    for hechos in CASOS:
+        categoria, regla = motor_inferencia_mascara(codificar_hechos(hechos))
+        assert (categoria, regla and regla["id"]) == _primera_lineal(hechos), hechos
+
+
+def test_motor_inferencia_igual_a_recorrido_lineal():
+    for hechos in CASOS:
+        categoria, regla = motor_inferencia(hechos, REGLAS_CLASIFICACION)
+        assert (categoria, regla and regla["id"]) == _primera_lineal(hechos), hechos
+
+
+def test_ranking_igual_a_todas_las_coincidencias():
+    for hechos in CASOS:
+        esperadas = [r["id"] for r in REGLAS_CLASIFICACION if _cumple(r, hechos)]
+        assert [p["regla_id"] for p in ranking_reglas(hechos)] == esperadas, hechos
+
+
+def test_lista_suelta_se_compila_una_vez():
+    assert compilar_reglas(REGLAS_CLASIFICACION) is compilar_reglas(REGLAS_CLASIFICACION)
+    copia = [dict(r) for r in REGLAS_CLASIFICACION]
+    copia[0]["resultado"] = "Otra"
+    assert compilar_reglas(copia) is not compilar_reglas(REGLAS_CLASIFICACION)
+    assert compilar_reglas(copia).reglas[0]["resultado"] == "Otra"
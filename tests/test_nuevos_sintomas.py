@@ -0,0 +1,28 @@
+# tests/test_nuevos_sintomas.py
+
+# Paginación por cursor (keyset) de nuevos_sintomas.
+from persistencia.nuevos_sintomas import SQL_INSERTAR, NuevosSintomasDB
+from persistencia.sqlite_pool import PoolSQLite
+
+
+def test_paginacion_por_cursor(tmp_path):
+    pool = PoolSQLite(str(tmp_path / "data.db"))
+    db = NuevosSintomasDB(pool)
+    db.inicializar()
+    with pool.conexion() as conn:
+        conn.executemany(SQL_INSERTAR, [
+            (f"texto {i}", "Hardware", None, None, None, "2026-10-17T00:00:00") for i in range(23)
+        ])
+        conn.commit()
+
+    vistos, cursor = [], None
+    while True:
+        pagina = db.listar(limit=5, antes_de=cursor)
+        if not pagina:
+            break
+        vistos += [item["id"] for item in pagina]
+        cursor = pagina[-1]["id"]
+    assert vistos == list(range(23, 0, -1))
+    assert db.listar(limit=5, antes_de=1) == []
+    assert db.total() == 23
+    pool.cerrar()
@@ -0,0 +1,88 @@
+# tests/test_rete.py
+
+# Motor de encadenamiento (RedRete): cadenas de derivación, negación sólo de hechos base,
+# afirmación incremental y la regla de clasificación sobre un hecho derivado.
+import pytest
+
+from experto_general.base_conocimiento import REGLAS_CLASIFICACION, REGLAS_DERIVADAS
+from experto_general.compilador import compilar_reglas
+from experto_general.condiciones import cargar_reglas
+from experto_general.rete import RedRete
+
+RED = RedRete(REGLAS_CLASIFICACION, REGLAS_DERIVADAS)
+
+
+def _ids(pasos: list[dict]) -> list[str]:
+    return [p["id"] for p in pasos]
+
+
+def test_cadena_de_derivaciones():
+    memoria = RED.evaluar({"sobrecalentamiento": True, "lentitud_sistema": True})
+    assert [p["hecho"] for p in memoria.derivados()] == ["degradacion_termica", "hardware_inestable"]
+    assert memoria.derivados()[1]["desde"] == ["degradacion_termica"]
+
+    memoria = RED.evaluar({"email_sospechoso": True, "acceso_denegado": True})
+    regla = memoria.clasificacion()
+    assert regla["id"] == "R-SEC-CUENTA-01"
+    # La cadena va de lo más básico a lo que usa la regla
+    assert _ids(memoria.cadena(regla)) == ["D-SEC-RIESGO-01", "D-SEC-CUENTA-01"]
+    assert memoria.cadena(regla)[0]["desde"] == ["email_sospechoso"]
+
+
+def test_sin_derivado_gana_la_regla_base():
+    memoria = RED.evaluar({"acceso_denegado": True})
+    assert memoria.clasificacion()["id"] == "R-PM-01"
+    assert memoria.derivados() == []
+    assert memoria.cadena(memoria.clasificacion()) == []
+
+
+def test_primera_coincidencia_no_ve_los_derivados():
+    hechos = {"email_sospechoso": True, "acceso_denegado": True}
+    compilada = compilar_reglas(REGLAS_CLASIFICACION, derivados=RED.hechos_derivados)
+    assert compilada.primera_coincidencia(hechos)["id"] == "R-PM-01"
+    assert "R-SEC-CUENTA-01" not in _ids(compilada.coincidencias(hechos))
+    # El resultado sigue dependiendo sólo de la máscara (caché del ranking)
+    assert compilada.solo_mascara
+    assert not compilar_reglas(REGLAS_CLASIFICACION).solo_mascara
+
+
+def test_negacion_de_hecho_derivado_se_rechaza():
+    clasificacion = cargar_reglas([
+        {"id": "X-1", "cuando": {"all": ["acceso_denegado", {"not": "riesgo_seguridad"}]}, "resultado": "Permisos"},
+    ])
+    with pytest.raises(ValueError, match="X-1.*riesgo_seguridad"):
+        RedRete(clasificacion, REGLAS_DERIVADAS)
+    derivada = {"id": "D-X", "cuando": {"not": "falla_energia"}, "deriva": "otro"}
+    with pytest.raises(ValueError, match="D-X"):
+        RedRete([], REGLAS_DERIVADAS + [derivada])
+
+
+def test_afirmar_encadena_como_evaluar_desde_cero():
+    memoria = RED.evaluar({"acceso_denegado": True})
+    memoria.afirmar("malware_detectado")
+    assert memoria.clasificacion()["id"] == "R-SEC-CUENTA-01"
+    assert [p["hecho"] for p in memoria.derivados()] == ["riesgo_seguridad", "posible_cuenta_comprometida"]
+
+    # Un hecho negado en alguna regla recalcula la memoria: la negación activa se retira
+    memoria = RED.evaluar({"sin_acceso_internet": True})
+    assert memoria.verdadero("problema_dns")
+    memoria.afirmar("no_puede_conectar_wifi")
+    assert not memoria.verdadero("problema_dns")
+    assert memoria.verdadero("problema_red_local")
+
+    for hechos, extra in [({"ram_falla": True}, "sobrecalentamiento"), ({}, "psu_falla")]:
+        memoria = RED.evaluar(hechos)
+        memoria.afirmar(extra)
+        completa = RED.evaluar(dict(hechos, **{extra: True}))
+        assert memoria.derivados() == completa.derivados()
+        assert memoria.coincidencias() == completa.coincidencias()
+
+
+def test_endpoint_encadenado_usa_la_regla_derivada(cliente):
+    hechos = {"email_sospechoso": True, "acceso_denegado": True}
+    clasico = cliente.post("/clasificar_ticket/", json=hechos).json()
+    encadenado = cliente.post("/clasificar_ticket/encadenado", json=hechos).json()
+    assert clasico["explicacion"]["id"] == "R-PM-01"
+    assert encadenado["categoria"] == "Seguridad"
+    assert encadenado["explicacion"]["id"] == "R-SEC-CUENTA-01"
+    assert _ids(encadenado["explicacion"]["cadena"]) == ["D-SEC-RIESGO-01", "D-SEC-CUENTA-01"]
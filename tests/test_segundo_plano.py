@@ -0,0 +1,60 @@
+# tests/test_segundo_plano.py
+
+# HiloEscritor y sus dos usos: lotes acotados, vaciado al detener, errores que no matan
+# el hilo y cola llena que descarta.
+import sqlite3
+
+from persistencia.grupo_commit import InsercionAgrupada
+from persistencia.registro import EscritorConsultas
+from persistencia.segundo_plano import HiloEscritor
+from persistencia.sqlite_pool import PoolSQLite
+
+
+class _Anotador(HiloEscritor):
+    def __init__(self, **kw):
+        super().__init__("prueba", **kw)
+        self.lotes = []
+
+    def _procesar(self, lote: list) -> None:
+        if "falla" in lote:
+            raise ValueError("lote con falla")
+        self.lotes.append(list(lote))
+
+
+def test_lotes_acotados_y_detener_procesa_lo_pendiente():
+    hilo = _Anotador(lote=3, espera=0.05)
+    for i in range(7):
+        assert hilo._poner(i)
+    assert hilo.vaciar()
+    assert all(len(lote) <= 3 for lote in hilo.lotes)
+    hilo._poner("falla")
+    assert hilo.vaciar()
+    hilo._poner(7)
+    hilo.detener()
+    assert not hilo.activo()
+    assert [x for lote in hilo.lotes for x in lote] == list(range(8))
+    assert hilo.metricas() == {"activo": False, "en_cola": 0}
+    assert hilo.errores == 1 and hilo.ultimo_error == "lote con falla"
+
+
+def test_escritor_consultas_descarta_con_cola_llena():
+    recibidos = []
+    escritor = EscritorConsultas([recibidos.extend], capacidad=2, intervalo=60.0)
+    escritor._cola.put_nowait({"previo": 1})
+    escritor._cola.put_nowait({"previo": 2})
+    escritor.iniciar = lambda: None  # sin consumidor la cola no se vacía
+    assert escritor.encolar({"a": 1}) is False
+    assert escritor.metricas()["descartados"] == 1
+
+
+def test_insercion_agrupada_resuelve_cada_fila(tmp_path):
+    ruta = str(tmp_path / "t.db")
+    with sqlite3.connect(ruta) as conn:
+        conn.execute("CREATE TABLE t (a INTEGER NOT NULL)")
+    insercion = InsercionAgrupada(PoolSQLite(ruta), "INSERT INTO t (a) VALUES (?)", lote=50)
+    futuros = [insercion.enviar((i,)) for i in range(120)] + [insercion.enviar((None,))]
+    ids = [f.result(5) for f in futuros[:-1]]
+    assert sorted(ids) == list(range(1, 121))
+    assert isinstance(futuros[-1].exception(5), sqlite3.IntegrityError)
+    insercion.detener()
+    assert insercion.metricas()["filas"] == 120
@@ -0,0 +1,23 @@
+# tests/test_sesiones.py
+
+# Sesiones del asistente: ranking calculado una vez al iniciar y avance por índice.
+from experto_general.base_conocimiento import REGLAS_CLASIFICACION
+from experto_general.compilador import compilar_reglas
+from experto_general.sesiones import SesionesAsistente
+
+HECHOS = {"pc_no_enciende": True, "psu_falla": True}
+
+
+def test_sesion_con_base_compilada_propia():
+    compilada = compilar_reglas(REGLAS_CLASIFICACION)
+    sesiones = SesionesAsistente(compilada=compilada)
+    sesion_id, estado = sesiones.iniciar(HECHOS)
+    esperadas = [r["id"] for r in compilada.coincidencias(HECHOS)]
+    assert [p["regla_id"] for p in estado["ranking"]] == esperadas and len(esperadas) > 1
+
+    estado = sesiones.avanzar(sesion_id, "siguiente")
+    assert SesionesAsistente.paso_actual(estado)["regla_id"] == esperadas[1]
+    assert SesionesAsistente.historial(estado) == esperadas[:1]
+    assert sesiones.avanzar(sesion_id, "funciono") is estado
+    assert sesiones.obtener(sesion_id) is None
+    assert sesiones.metricas()["resueltas"] == 1
@@ -0,0 +1,53 @@
+# tests/test_stream.py
+
+# /clasificar_ticket/stream: una línea inválida produce {"linea", "error"} y el stream sigue.
+import json
+
+
+def _stream(cliente, cuerpo: bytes) -> list[dict]:
+    r = cliente.post("/clasificar_ticket/stream", content=cuerpo, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    return [json.loads(linea) for linea in r.text.splitlines()]
+
+
+def test_lineas_validas_en_orden(cliente):
+    salida = _stream(cliente, b'{"ram_falla": true}\n\n{"disco_falla": true}')
+    assert [s["sintoma"] for s in salida] == ["ram_falla", "disco_falla"]
+
+
+def test_errores_por_linea_no_cortan_el_stream(cliente):
+    import main  # ya importado por `cliente`, con el directorio de datos temporal
+
+    largo = b'{"ram_falla": true, "otra_descripcion": "' + b"x" * (main.STREAM_MAX_LINEA + 10) + b'"}'
+    cuerpo = b"\n".join([
+        b'{"ram_falla": true}',
+        b"esto no es json",
+        b'{"ram_falla": "zz"}',
+        largo,
+        b"[1, 2]",
+        b'{"disco_falla": true}',
+    ]) + b"\n"
+    salida = _stream(cliente, cuerpo)
+    assert len(salida) == 6
+    assert salida[0]["sintoma"] == "ram_falla"
+    errores = salida[1:5]
+    assert [e["linea"] for e in errores] == [2, 3, 4, 5]
+    assert errores[0]["error"][0]["type"] == "json_invalid"
+    assert errores[1]["error"][0]["type"] == "bool_parsing"
+    assert errores[2]["error"] == "Línea demasiado larga"
+    assert all("sintoma" not in e for e in errores)
+    assert salida[5]["sintoma"] == "disco_falla"
+
+
+def test_linea_larga_partida_en_fragmentos(cliente):
+    import main
+
+    largo = b"x" * (main.STREAM_MAX_LINEA * 2)
+
+    def fragmentos():
+        yield largo[: len(largo) // 2]
+        yield largo[len(largo) // 2:] + b'\n{"ram_falla": true}\n'
+
+    salida = _stream(cliente, fragmentos())
+    assert salida[0] == {"linea": 1, "error": "Línea demasiado larga"}
+    assert salida[1]["sintoma"] == "ram_falla"
@@ -0,0 +1,53 @@
+# tests/test_tail.py
+
+# Últimas consultas leídas desde el final de los JSONL (planos y compactados).
+import gzip
+import json
+
+from persistencia.tail import lineas_al_reves, ultimas_consultas
+
+
+def _consulta(i: int, fecha: str = "2026-10-17") -> dict:
+    return {
+        "timestamp": f"{fecha}T10:{i // 60 % 60:02d}:{i % 60:02d}",
+        "resultado": {"categoria": "Hardware", "sintoma": f"s{i % 7}", "regla_id": f"R-{i % 11}"},
+    }
+
+
+def _escribir_jsonl(ruta, registros, comprimir: bool = False) -> str:
+    texto = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros)
+    if comprimir:
+        with gzip.open(ruta, "wt", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        ruta.write_text(texto, encoding="utf-8")
+    return str(ruta)
+
+
+def test_lineas_al_reves_con_bloques_chicos(tmp_path):
+    ruta = tmp_path / "x.jsonl"
+    lineas = [f"línea {i} " + "x" * (i % 13) for i in range(200)]
+    ruta.write_text("\n".join(lineas) + "\n\n", encoding="utf-8")
+    leidas = [b.decode("utf-8") for b in lineas_al_reves(str(ruta), bloque=7)]
+    assert leidas == lineas[::-1]
+
+
+def test_ultimas_consultas_recorre_archivos_hacia_atras(tmp_path):
+    viejo = [_consulta(i, "2026-10-15") for i in range(30)]
+    medio = [_consulta(i, "2026-10-16") for i in range(20)]
+    nuevo = [_consulta(i, "2026-10-17") for i in range(5)]
+    rutas = [
+        _escribir_jsonl(tmp_path / "consultas-2026-10-15.jsonl.gz", viejo, comprimir=True),
+        _escribir_jsonl(tmp_path / "consultas-2026-10-16.jsonl", medio),
+        str(tmp_path / "consultas-faltante.jsonl"),
+        _escribir_jsonl(tmp_path / "consultas-2026-10-17.jsonl", nuevo),
+    ]
+    with open(rutas[-1], "a", encoding="utf-8") as f:
+        f.write("{roto\n")
+
+    items = ultimas_consultas(rutas, 40)
+    esperados = (viejo + medio + nuevo)[::-1][:40]
+    assert [i["timestamp"] for i in items] == [r["timestamp"] for r in esperados]
+    assert items[0]["regla_id"] == nuevo[-1]["resultado"]["regla_id"]
+    assert ultimas_consultas(rutas, 0) == []
+    assert len(ultimas_consultas(rutas, 1000)) == 55